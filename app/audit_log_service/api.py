@@ -1,30 +1,128 @@
 # /app/audit_log_service/api.py
 import uuid
-from typing import List
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.responses import StreamingResponse
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from core.database import get_db_session
 from app.user_service.dependencies import require_role
-from . import schemas, services, crud
+from . import schemas, services
 
 router = APIRouter()
 
 @router.get(
     "",
-    response_model=List[schemas.AuditLogOut],
+    response_model=List[schemas.AuditLogSearchResult],
     summary="Search and filter audit logs",
     dependencies=[Depends(require_role(["super_admin", "admin"]))],
 )
 async def search_audit_logs(
+    response: Response,
     db: AsyncSession = Depends(get_db_session),
     filters: schemas.AuditLogFilterParams = Depends(),
 ):
     """
     Retrieves a list of audit logs based on filter criteria.
+    `q` searches actions, entities and the text of before/after/changes
+    (web search syntax: quoted phrases, `or`, `-word`); use
+    `sort=relevance` to get the best matches first.
+
+    Sorted by `created_at`, a full page sets the `X-Next-Cursor` header;
+    pass it back as `cursor` for the next page. Unlike `offset`, this costs
+    the same on every page.
+    Requires `admin` or `super_admin` role.
+    """
+    results, next_cursor = await services.search_audit_logs(db, filters)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return results
+
+
+@router.get(
+    "/export",
+    summary="Export audit logs as gzipped NDJSON or CSV",
+    response_class=StreamingResponse,
+    dependencies=[Depends(require_role(["super_admin", "admin"]))],
+)
+async def export_audit_logs(filters: schemas.AuditLogExportParams = Depends()):
+    """
+    Streams every audit log matching the filters, oldest first, as a
+    gzip-compressed NDJSON (default) or CSV download. Rows are read and
+    compressed as they are sent, so large exports take no extra memory.
+    Requires `admin` or `super_admin` role.
+    """
+    filename = f"audit_logs_{datetime.utcnow():%Y%m%dT%H%M%SZ}.{filters.format}.gz"
+    return StreamingResponse(
+        services.export_audit_logs(filters),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get(
+    "/entities/{entity_type}/changed",
+    response_model=List[schemas.ChangedEntityOut],
+    summary="Find entities that changed a given field",
+    dependencies=[Depends(require_role(["super_admin", "admin"]))],
+)
+async def get_entities_changing_field(
+    entity_type: str,
+    field: str = Query(..., description="Changed field, e.g. `selling_price` or `role.name`."),
+    start_ts: Optional[datetime] = None,
+    end_ts: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """
+    Lists the entities of a type whose `field` changed in the time range,
+    with how many times and when last, most recent first.
+    Requires `admin` or `super_admin` role.
+    """
+    return await services.get_entities_changing_field(db, field, entity_type, start_ts, end_ts, limit)
+
+
+@router.get(
+    "/entities/{entity_type}/{entity_id}/history",
+    response_model=schemas.EntityHistoryOut,
+    summary="Get the field-level change history of an entity",
+    dependencies=[Depends(require_role(["super_admin", "admin"]))],
+)
+async def get_entity_history(
+    entity_type: str,
+    entity_id: str,
+    start_ts: Optional[datetime] = None,
+    end_ts: Optional[datetime] = None,
+    field: Optional[str] = Query(None, description="Only changes to this field."),
+    limit: int = Query(1000, ge=1, le=10000, description="Maximum audit events read."),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """
+    Returns one entry per changed field per audit event, oldest first,
+    e.g. every `selling_price` change of a StoreProduct.
+    Requires `admin` or `super_admin` role.
+    """
+    return await services.get_entity_history(db, entity_type, entity_id, start_ts, end_ts, field, limit)
+
+
+@router.get(
+    "/entities/{entity_type}/{entity_id}/state",
+    response_model=schemas.EntityStateOut,
+    summary="Rebuild the state of an entity at a point in time",
+    dependencies=[Depends(require_role(["super_admin", "admin"]))],
+)
+async def get_entity_state(
+    entity_type: str,
+    entity_id: str,
+    at: datetime = Query(..., description="Point in time to rebuild the entity at."),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """
+    Rebuilds the entity as it was at `at` from its audit log.
     Requires `admin` or `super_admin` role.
     """
-    return await crud.get_audit_logs(db, filters)
+    return await services.get_entity_state_at(db, entity_type, entity_id, at)
 
 
 @router.get(
@@ -35,13 +133,11 @@ async def search_audit_logs(
 )
 async def get_audit_log(log_id: uuid.UUID, db: AsyncSession = Depends(get_db_session)):
     """
-    Retrieves a single audit log by its unique ID.
+    Retrieves a single audit log by its unique ID, with its before/after
+    states rebuilt if it was stored compactly.
     Requires `admin` or `super_admin` role.
     """
-    log = await crud.get_audit_log_by_id(db, log_id)
-    if not log:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audit log not found")
-    return log
+    return await services.get_audit_log(db, log_id)
 
 
 @router.post(
@@ -52,10 +148,10 @@ async def get_audit_log(log_id: uuid.UUID, db: AsyncSession = Depends(get_db_ses
 )
 async def trigger_cleanup(db: AsyncSession = Depends(get_db_session)):
     """
-    Manually triggers the job to delete old audit logs based on the retention policy.
+    Drops the monthly audit log partitions that are past the retention
+    policy and creates any missing future ones. Only the catalog changes,
+    so this returns in milliseconds.
     Requires `super_admin` role.
     """
-    # In a production system, this would likely be a background task.
-    # For this example, we'll run it synchronously.
     result = await services.cleanup_old_audit_logs(db)
     return {"message": "Audit log cleanup job triggered.", "details": result}
\ No newline at end of file
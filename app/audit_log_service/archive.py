@@ -0,0 +1,280 @@
+# /app/audit_log_service/archive.py
+import gzip
+import hashlib
+import json
+import os
+import re
+import uuid
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import export, schemas
+
+# Archived logs live under AUDIT_ARCHIVE_DIR as one gzip-compressed JSONL
+# file per day (YYYY/MM/audit_logs_YYYY-MM-DD.jsonl.gz), rows newest
+# first so a search can stop reading as soon as it has a page, described
+# by manifest.json. Every log older than the manifest's `archived_before`
+# is in the archive; newer ones are in the database. Day files written
+# before `newest_first` was recorded in their entry are oldest first.
+ARCHIVE_COLUMNS = (*export.EXPORT_COLUMNS, "raw")
+MANIFEST_NAME = "manifest.json"
+_MANIFEST_VERSION = 1
+_TEMP_SUFFIX = ".tmp"
+
+Position = Tuple[datetime, uuid.UUID]
+
+
+def day_path(day: date) -> str:
+    """A day file's path, relative to the archive root."""
+    return f"{day:%Y}/{day:%m}/audit_logs_{day.isoformat()}.jsonl.gz"
+
+
+def naive_utc(value: datetime) -> datetime:
+    """created_at is stored as naive UTC; filters may come with a timezone."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _replace_file(path: Path, data: bytes) -> None:
+    """Writes a file so readers see either the old or the new content, never half of it."""
+    temp = path.with_name(path.name + _TEMP_SUFFIX)
+    with open(temp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+class ArchiveManifest:
+    """What the archive holds: one entry per day file, and how far back the database was emptied."""
+
+    def __init__(self, root: Path, days: Optional[Dict[str, Dict[str, Any]]] = None, archived_before: Optional[datetime] = None):
+        self.root = root
+        self.days = days or {}
+        self.archived_before = archived_before
+
+    @classmethod
+    def load(cls, root: str) -> "ArchiveManifest":
+        path = Path(root) / MANIFEST_NAME
+        if not path.exists():
+            return cls(Path(root))
+        data = json.loads(path.read_text())
+        archived_before = data.get("archived_before")
+        return cls(
+            Path(root),
+            days=data.get("days", {}),
+            archived_before=datetime.fromisoformat(archived_before) if archived_before else None,
+        )
+
+    def save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": _MANIFEST_VERSION,
+            "archived_before": self.archived_before.isoformat() if self.archived_before else None,
+            "days": dict(sorted(self.days.items())),
+        }
+        _replace_file(self.root / MANIFEST_NAME, json.dumps(data, indent=2).encode())
+
+    def add(self, entries: Sequence[Dict[str, Any]], archived_before: datetime) -> None:
+        for entry in entries:
+            self.days[entry["day"]] = entry
+        if self.archived_before is None or archived_before > self.archived_before:
+            self.archived_before = archived_before
+
+    def expire_before(self, day: date) -> List[str]:
+        """Deletes the day files older than `day`; returns their days."""
+        expired = sorted(name for name in self.days if date.fromisoformat(name) < day)
+        for name in expired:
+            entry = self.days.pop(name)
+            (self.root / entry["path"]).unlink(missing_ok=True)
+        return expired
+
+
+class ArchiveWriter:
+    """
+    Writes rows, newest (created_at, id) first, to per-day gzip JSONL
+    files. Files keep a temporary name until `finish()`, so an interrupted
+    run leaves nothing that looks archived.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self._open: Dict[date, Tuple[gzip.GzipFile, BinaryIO, Path, Dict[str, Any]]] = {}
+
+    def write(self, rows: Sequence[Dict[str, Any]]) -> None:
+        for row in rows:
+            day = row["created_at"].date()
+            entry = self._open.get(day)
+            if entry is None:
+                path = self.root / day_path(day)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                temp = path.with_name(path.name + _TEMP_SUFFIX)
+                stats = {
+                    "day": day.isoformat(), "path": day_path(day), "rows": 0, "newest_first": True,
+                    "last_created_at": row["created_at"].isoformat(),
+                }
+                raw = open(temp, "wb")
+                entry = self._open[day] = (gzip.GzipFile(fileobj=raw, mode="wb", mtime=0), raw, temp, stats)
+            f, _, _, stats = entry
+            f.write(json.dumps(row, default=_json_default, separators=(",", ":")).encode() + b"\n")
+            stats["rows"] += 1
+            stats["first_created_at"] = row["created_at"].isoformat()
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Closes and publishes every day file; returns their manifest entries."""
+        entries = []
+        for f, raw, temp, stats in self._open.values():
+            f.close()
+            raw.flush()
+            os.fsync(raw.fileno())
+            raw.close()
+            digest = hashlib.sha256()
+            with open(temp, "rb") as written:
+                for block in iter(lambda: written.read(1 << 20), b""):
+                    digest.update(block)
+            path = self.root / stats["path"]
+            os.replace(temp, path)
+            entries.append({**stats, "bytes": path.stat().st_size, "sha256": digest.hexdigest()})
+        self._open.clear()
+        return entries
+
+    def abort(self) -> None:
+        for f, raw, temp, _ in self._open.values():
+            f.close()
+            raw.close()
+            temp.unlink(missing_ok=True)
+        self._open.clear()
+
+
+def read_day(root: str, entry: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    A day file's rows, newest first, decoded one line at a time so the
+    caller can stop early. Older oldest-first files are read whole and
+    reversed.
+    """
+    with gzip.open(Path(root) / entry["path"], "rb") as f:
+        if entry.get("newest_first"):
+            for line in f:
+                yield json.loads(line)
+        else:
+            yield from reversed([json.loads(line) for line in f])
+
+
+# --- SEARCH ---
+# The archive has no full-text index: `q` is matched as words and quoted
+# phrases that must all appear (or must not, with a leading `-`), with
+# `or` between alternatives. Rank and headline are left empty.
+_QUERY_TOKEN = re.compile(r'(-?)"([^"]*)"|(\S+)')
+
+
+def _query_alternatives(q: str) -> List[Tuple[List[str], List[str]]]:
+    alternatives, required, excluded = [], [], []
+    for match in _QUERY_TOKEN.finditer(q.lower()):
+        negated, phrase, word = match.groups()
+        if word == "or":
+            alternatives.append((required, excluded))
+            required, excluded = [], []
+            continue
+        if word is not None:
+            negated, phrase = ("-", word[1:]) if word.startswith("-") and len(word) > 1 else ("", word)
+        (excluded if negated else required).append(phrase)
+    alternatives.append((required, excluded))
+    return [alternative for alternative in alternatives if alternative[0] or alternative[1]]
+
+
+def _document(record: Dict[str, Any]) -> str:
+    parts = [record.get("action"), record.get("entity_type"), record.get("entity_id")]
+    for column in ("changes", "after", "before"):
+        if record.get(column):
+            parts.append(json.dumps(record[column]))
+    return " ".join(part for part in parts if part).lower()
+
+
+def _whole_day_matches(entry: Dict[str, Any], filters: schemas.AuditLogQueryParams, alternatives, after: Optional[Position]) -> bool:
+    """Whether every row of a day file matches, so it can be skipped by its row count without reading it."""
+    if alternatives or any(getattr(filters, column) for column in ("user_id", "store_id", "entity_type", "entity_id", "action")):
+        return False
+    first, last = datetime.fromisoformat(entry["first_created_at"]), datetime.fromisoformat(entry["last_created_at"])
+    if filters.start_ts and first < naive_utc(filters.start_ts):
+        return False
+    if filters.end_ts and last > naive_utc(filters.end_ts):
+        return False
+    return after is None or last < after[0]
+
+
+def _matches(record: Dict[str, Any], created_at: datetime, filters: schemas.AuditLogQueryParams, alternatives) -> bool:
+    if filters.start_ts and created_at < naive_utc(filters.start_ts):
+        return False
+    if filters.end_ts and created_at > naive_utc(filters.end_ts):
+        return False
+    for column in ("user_id", "store_id"):
+        value = getattr(filters, column)
+        if value and record.get(column) != str(value):
+            return False
+    for column in ("entity_type", "entity_id", "action"):
+        value = getattr(filters, column)
+        if value and record.get(column) != value:
+            return False
+    if alternatives:
+        document = _document(record)
+        return any(
+            all(term in document for term in required) and not any(term in document for term in excluded)
+            for required, excluded in alternatives
+        )
+    return True
+
+
+def search(
+    manifest: ArchiveManifest,
+    filters: schemas.AuditLogQueryParams,
+    limit: int,
+    skip: int = 0,
+    after: Optional[Position] = None,
+) -> List[schemas.AuditLogSearchResult]:
+    """
+    Archived logs matching the filters, newest first, skipping the first
+    `skip` matches or those not before the `after` position. Only the day
+    files inside the filtered time range are opened, reading stops once
+    `limit` results are found, and days that match whole are skipped by
+    their manifest row count instead of being read.
+    """
+    first_day = naive_utc(filters.start_ts).date() if filters.start_ts else None
+    last_day = naive_utc(filters.end_ts).date() if filters.end_ts else None
+    if after is not None:
+        after = (naive_utc(after[0]), after[1])
+        last_day = min(last_day, after[0].date()) if last_day else after[0].date()
+    alternatives = _query_alternatives(filters.q) if filters.q else []
+
+    results: List[schemas.AuditLogSearchResult] = []
+    for name in sorted(manifest.days, reverse=True):
+        day = date.fromisoformat(name)
+        if (last_day and day > last_day) or (first_day and day < first_day):
+            continue
+        entry = manifest.days[name]
+        if skip >= entry["rows"] and _whole_day_matches(entry, filters, alternatives, after):
+            skip -= entry["rows"]
+            continue
+        records = read_day(str(manifest.root), entry)
+        for record in records:
+            created_at = datetime.fromisoformat(record["created_at"])
+            if after is not None and (created_at, uuid.UUID(record["id"])) >= after:
+                continue
+            if not _matches(record, created_at, filters, alternatives):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            results.append(schemas.AuditLogSearchResult.model_validate(record))
+            if len(results) == limit:
+                records.close()
+                return results
+    return results
+
@@ -0,0 +1,94 @@
+# /app/audit_log_service/compact.py
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from core.config import settings
+
+# With AUDIT_COMPACT_STORAGE, an update is stored as its `changes` alone.
+# Every AUDIT_CHECKPOINT_EVERY-th update of an entity also stores the full
+# `after` state as a checkpoint, and so does the first update an API
+# process sees for an entity, since it cannot know how long ago the last
+# checkpoint was. States are rebuilt on read from the nearest checkpoint
+# (see services.get_audit_log and history.reconstruct).
+#
+# A checkpoint only counts once its row is written (`checkpoints_written`);
+# until then every update of the entity stores one, so a rolled back or
+# dropped checkpoint never leaves changes-only rows behind it. The first
+# update of an entity in each month is a checkpoint too: retention and
+# archiving move whole monthly partitions, and each month must be
+# rebuildable on its own.
+
+# Entities whose update count is remembered; the least recently updated are forgotten first.
+_MAX_TRACKED_ENTITIES = 50000
+
+
+def _month(at: datetime) -> Tuple[int, int]:
+    return at.year, at.month
+
+
+class CheckpointTracker:
+    """Counts updates per entity since its last written checkpoint, in memory."""
+
+    def __init__(self, every: int, max_entities: int = _MAX_TRACKED_ENTITIES):
+        self.every = every
+        self.max_entities = max_entities
+        # (entity_type, entity_id) -> (month of the written checkpoint, updates since it)
+        self._since_checkpoint: "OrderedDict[Tuple[Optional[str], str], Tuple[Tuple[int, int], int]]" = OrderedDict()
+
+    def due(self, entity_type: Optional[str], entity_id: str, at: Optional[datetime] = None) -> bool:
+        """Whether an update at `at` should store a full checkpoint; counts it otherwise."""
+        key = (entity_type, entity_id)
+        month = _month(at or datetime.utcnow())
+        entry = self._since_checkpoint.pop(key, None)
+        if entry is None or entry[0] != month or entry[1] + 1 >= self.every:
+            # Not counted again until this checkpoint is written
+            return True
+        self._since_checkpoint[key] = (month, entry[1] + 1)
+        self._evict()
+        return False
+
+    def written(self, entity_type: Optional[str], entity_id: str, at: datetime) -> None:
+        """Records that a checkpoint made at `at` is durably stored."""
+        key = (entity_type, entity_id)
+        entry = self._since_checkpoint.get(key)
+        if entry is not None and entry[0] > _month(at):
+            return
+        self._since_checkpoint.pop(key, None)
+        self._since_checkpoint[key] = (_month(at), 0)
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._since_checkpoint) > self.max_entities:
+            self._since_checkpoint.popitem(last=False)
+
+
+_tracker = CheckpointTracker(settings.AUDIT_CHECKPOINT_EVERY)
+
+
+def compact_states(
+    entity_type: Optional[str],
+    entity_id: Optional[str],
+    before: Optional[Dict[str, Any]],
+    after: Optional[Dict[str, Any]],
+    changes: Optional[Dict[str, Any]],
+    tracker: Optional[CheckpointTracker] = None,
+    at: Optional[datetime] = None,
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    The before/after states to store for an event. Events without changes
+    (creations, system events) keep theirs; updates drop `before`, and
+    `after` unless a checkpoint is due.
+    """
+    if not changes or entity_id is None or after is None:
+        return before, after
+    if (tracker or _tracker).due(entity_type, entity_id, at):
+        return None, after
+    return None, None
+
+
+def checkpoints_written(rows: Iterable[Dict[str, Any]], tracker: Optional[CheckpointTracker] = None) -> None:
+    """Confirms the checkpoints among audit rows that have just been committed."""
+    for row in rows:
+        if row.get("changes") and row.get("after") is not None and row.get("entity_id") is not None:
+            (tracker or _tracker).written(row["entity_type"], row["entity_id"], row["created_at"])
@@ -1,12 +1,21 @@
 # /app/audit_log_service/crud.py
 import uuid
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
+from sqlalchemy import Text, and_, cast, func, text, tuple_
+from sqlalchemy.dialects.postgresql import REGCONFIG, insert
+from sqlalchemy.orm import defer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, delete
 
-from . import models, schemas
+from . import archive, export, models, partitions, schemas
+
+# Rows per INSERT; keeps each statement under asyncpg's 32767 bind parameter limit.
+_INSERT_CHUNK_ROWS = 2000
+
+# Up to two short excerpts per search result.
+_HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=20, MinWords=5"
 
 
 async def create_audit_log(db: AsyncSession, log_entry: schemas.AuditLogCreate) -> models.AuditLog:
@@ -17,10 +26,17 @@ async def create_audit_log(db: AsyncSession, log_entry: schemas.AuditLogCreate)
     return db_log
 
 
-async def get_audit_logs(db: AsyncSession, filters: schemas.AuditLogFilterParams) -> List[models.AuditLog]:
-    """Retrieves a paginated and filtered list of audit logs."""
-    statement = select(models.AuditLog)
+async def create_audit_logs(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """Inserts audit rows with multi-row INSERTs, without loading them into the session."""
+    for offset in range(0, len(rows), _INSERT_CHUNK_ROWS):
+        await db.execute(insert(models.AuditLog).values(rows[offset:offset + _INSERT_CHUNK_ROWS]))
+
 
+def _search_query(q: str):
+    return func.websearch_to_tsquery(cast(models.SEARCH_CONFIG, REGCONFIG), q)
+
+
+def _apply_filters(statement, filters: schemas.AuditLogQueryParams):
     if filters.start_ts:
         statement = statement.where(models.AuditLog.created_at >= filters.start_ts)
     if filters.end_ts:
@@ -35,21 +51,265 @@ async def get_audit_logs(db: AsyncSession, filters: schemas.AuditLogFilterParams
         statement = statement.where(models.AuditLog.action == filters.action)
     if filters.store_id:
         statement = statement.where(models.AuditLog.store_id == filters.store_id)
+    if filters.q:
+        statement = statement.where(models.AuditLog.search_vector.op("@@")(_search_query(filters.q)))
+    return statement
+
+
+def _sort_order(filters: schemas.AuditLogFilterParams, rank) -> list:
+    newest_first = [models.AuditLog.created_at.desc(), models.AuditLog.id.desc()]
+    if filters.sort == "relevance":
+        return newest_first if rank is None else [rank.desc(), *newest_first]
+    if filters.sort == "created_at":
+        return newest_first
+    return [getattr(models.AuditLog, filters.sort).desc()]
+
+
+def _page(statement, filters: schemas.AuditLogFilterParams, rank, after: Optional[Tuple[datetime, uuid.UUID]]):
+    statement = statement.order_by(*_sort_order(filters, rank))
+    if after is not None:
+        # Keyset: continue strictly after the last row of the previous page,
+        # an index range scan on (created_at, id) whatever the page number
+        statement = statement.where(tuple_(models.AuditLog.created_at, models.AuditLog.id) < tuple_(*after))
+    else:
+        statement = statement.offset(filters.offset)
+    return statement.limit(filters.limit)
+
+
+async def get_audit_logs(
+    db: AsyncSession,
+    filters: schemas.AuditLogFilterParams,
+    after: Optional[Tuple[datetime, uuid.UUID]] = None,
+) -> List[Tuple[models.AuditLog, Optional[float], Optional[str]]]:
+    """
+    Retrieves a paginated and filtered list of audit logs, each with its
+    search rank and highlighted headline (both None without `q`). With
+    `after` (created_at, id), returns the rows that follow that position
+    in created_at order instead of using the offset.
+
+    `q` matches the GIN-indexed `search_vector`. The page of matching keys
+    is chosen first; the logs are then fetched by primary key and only
+    those rows get a headline, which is the expensive part.
+    """
+    AuditLog = models.AuditLog
+    if not filters.q:
+        statement = _apply_filters(select(AuditLog), filters).options(defer(AuditLog.search_vector))
+        result = await db.execute(_page(statement, filters, None, after))
+        return [(log, None, None) for log in result.scalars().all()]
 
-    statement = statement.order_by(getattr(models.AuditLog, filters.sort).desc())
-    statement = statement.offset(filters.offset).limit(filters.limit)
+    query = _search_query(filters.q)
+    rank = func.ts_rank_cd(AuditLog.search_vector, query)
+    page = _page(
+        _apply_filters(select(AuditLog.id, AuditLog.created_at, rank.label("rank")), filters), filters, rank, after
+    ).subquery()
 
+    document = func.concat_ws(
+        " ", AuditLog.action, AuditLog.entity_type, AuditLog.entity_id,
+        cast(func.coalesce(AuditLog.changes, AuditLog.after, AuditLog.before), Text),
+    )
+    headline = func.ts_headline(cast(models.SEARCH_CONFIG, REGCONFIG), document, query, _HEADLINE_OPTIONS)
+    statement = (
+        select(AuditLog, page.c.rank, headline)
+        .join(page, and_(AuditLog.id == page.c.id, AuditLog.created_at == page.c.created_at))
+        .options(defer(AuditLog.search_vector))
+        .order_by(*_sort_order(filters, page.c.rank))
+    )
     result = await db.execute(statement)
-    return result.scalars().all()
+    return [tuple(row) for row in result.all()]
+
+
+def audit_log_export_statement(filters: schemas.AuditLogQueryParams):
+    """Every matching log's export columns, oldest first, for streaming through a server-side cursor."""
+    columns = [getattr(models.AuditLog, column) for column in export.EXPORT_COLUMNS]
+    statement = _apply_filters(select(*columns), filters)
+    return statement.order_by(models.AuditLog.created_at, models.AuditLog.id)
+
+
+async def count_audit_logs(db: AsyncSession, filters: schemas.AuditLogQueryParams) -> int:
+    """How many logs in the database match the filters."""
+    statement = _apply_filters(select(func.count()).select_from(models.AuditLog), filters)
+    return (await db.execute(statement)).scalar_one()
+
+
+def audit_log_range_statement(start: datetime, end: datetime):
+    """Every column but the search vector of the logs in [start, end), newest first."""
+    columns = [getattr(models.AuditLog, column) for column in archive.ARCHIVE_COLUMNS]
+    return (
+        select(*columns)
+        .where(models.AuditLog.created_at >= start, models.AuditLog.created_at < end)
+        .order_by(models.AuditLog.created_at.desc(), models.AuditLog.id.desc())
+    )
+
+
+def _entity_changes_statement(entity_type: str, entity_id: str):
+    AuditLog = models.AuditLog
+    return (
+        select(AuditLog.id, AuditLog.created_at, AuditLog.action, AuditLog.user_id, AuditLog.changes)
+        .where(AuditLog.entity_type == entity_type, AuditLog.entity_id == entity_id, AuditLog.changes.isnot(None))
+        .order_by(AuditLog.created_at, AuditLog.id)
+    )
+
+
+async def get_entity_changes(
+    db: AsyncSession,
+    entity_type: str,
+    entity_id: str,
+    start_ts: Optional[datetime] = None,
+    end_ts: Optional[datetime] = None,
+    field: Optional[str] = None,
+    limit: Optional[int] = 1000,
+) -> List[Any]:
+    """
+    An entity's change sets, oldest first, through `ix_audit_logs_entity`.
+    Only the columns a timeline needs are read, never the full states.
+    """
+    statement = _entity_changes_statement(entity_type, entity_id)
+    if start_ts:
+        statement = statement.where(models.AuditLog.created_at >= start_ts)
+    if end_ts:
+        statement = statement.where(models.AuditLog.created_at <= end_ts)
+    if field:
+        statement = statement.where(models.AuditLog.changes.has_key(field))
+    result = await db.execute(statement.limit(limit))
+    return result.all()
+
+
+async def get_entity_snapshot_at(db: AsyncSession, entity_type: str, entity_id: str, at: datetime) -> Optional[Any]:
+    """The entity's latest log with a full `after` state at or before `at`: (id, created_at, after)."""
+    AuditLog = models.AuditLog
+    statement = (
+        select(AuditLog.id, AuditLog.created_at, AuditLog.after)
+        .where(
+            AuditLog.entity_type == entity_type,
+            AuditLog.entity_id == entity_id,
+            AuditLog.after.isnot(None),
+            AuditLog.created_at <= at,
+        )
+        .order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+        .limit(1)
+    )
+    return (await db.execute(statement)).first()
+
+
+async def get_entity_changes_since(
+    db: AsyncSession, entity_type: str, entity_id: str, after: Tuple[datetime, uuid.UUID], at: datetime
+) -> List[Any]:
+    """The entity's change sets strictly after the `after` (created_at, id) position and up to `at`, oldest first."""
+    statement = _entity_changes_statement(entity_type, entity_id).where(
+        tuple_(models.AuditLog.created_at, models.AuditLog.id) > tuple_(*after),
+        models.AuditLog.created_at <= at,
+    )
+    return (await db.execute(statement)).all()
+
+
+async def get_entities_changing_field(
+    db: AsyncSession,
+    field: str,
+    entity_type: Optional[str] = None,
+    start_ts: Optional[datetime] = None,
+    end_ts: Optional[datetime] = None,
+    limit: int = 100,
+) -> List[Any]:
+    """
+    Entities whose `changes` include `field`, with how often and when it
+    last changed, most recent first. `changes ? field` is answered by the
+    GIN index on `changes`; the time range prunes monthly partitions.
+    """
+    AuditLog = models.AuditLog
+    last_changed_at = func.max(AuditLog.created_at).label("last_changed_at")
+    statement = select(
+        AuditLog.entity_type, AuditLog.entity_id, func.count().label("change_count"), last_changed_at,
+    ).where(AuditLog.changes.has_key(field), AuditLog.entity_id.isnot(None))
+    if entity_type:
+        statement = statement.where(AuditLog.entity_type == entity_type)
+    if start_ts:
+        statement = statement.where(AuditLog.created_at >= start_ts)
+    if end_ts:
+        statement = statement.where(AuditLog.created_at <= end_ts)
+    statement = statement.group_by(AuditLog.entity_type, AuditLog.entity_id).order_by(last_changed_at.desc()).limit(limit)
+    return (await db.execute(statement)).all()
 
 
 async def get_audit_log_by_id(db: AsyncSession, log_id: uuid.UUID) -> Optional[models.AuditLog]:
-    """Retrieves a single audit log by its ID."""
-    return await db.get(models.AuditLog, log_id)
+    """Retrieves a single audit log by its ID; one primary key probe per monthly partition."""
+    result = await db.execute(select(models.AuditLog).where(models.AuditLog.id == log_id))
+    return result.scalars().first()
 
 
-async def delete_logs_before(db: AsyncSession, cutoff_date: datetime) -> int:
-    """Deletes audit logs older than a specified cutoff date."""
-    statement = delete(models.AuditLog).where(models.AuditLog.created_at < cutoff_date)
-    result = await db.execute(statement)
+# --- Partition maintenance (DDL; names come from `partitions`, never from input) ---
+
+async def get_partition_names(db: AsyncSession) -> List[str]:
+    """Names of every partition attached to `audit_logs`."""
+    statement = text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :parent"
+    )
+    result = await db.execute(statement, {"parent": partitions.PARENT_TABLE})
+    return [name for (name,) in result.all()]
+
+
+async def create_month_partition(db: AsyncSession, month: date) -> None:
+    upper = partitions.add_months(month, 1)
+    await db.execute(text(
+        f'CREATE TABLE IF NOT EXISTS "{partitions.partition_name(month)}" PARTITION OF "{partitions.PARENT_TABLE}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+    ))
+
+
+async def create_default_partition(db: AsyncSession) -> None:
+    await db.execute(text(
+        f'CREATE TABLE IF NOT EXISTS "{partitions.DEFAULT_PARTITION}" PARTITION OF "{partitions.PARENT_TABLE}" DEFAULT'
+    ))
+
+
+# JSONB columns that get the configured TOAST compression, and the
+# pg_attribute.attcompression code of each method
+JSON_COLUMNS = ("before", "after", "changes", "request_metadata", "raw")
+TOAST_COMPRESSION_CODES = {"pglz": "p", "lz4": "l"}
+
+
+async def server_supports_compression(db: AsyncSession, method: str) -> bool:
+    """Whether the server has per-column compression (PostgreSQL 14+) and was built with `method`."""
+    version = int((await db.execute(text("SHOW server_version_num"))).scalar_one())
+    if version < 140000:
+        return False
+    result = await db.execute(
+        text("SELECT CAST(:method AS text) = ANY(enumvals) FROM pg_settings WHERE name = 'default_toast_compression'"),
+        {"method": method},
+    )
+    return bool(result.scalar_one_or_none())
+
+
+async def count_columns_without_compression(db: AsyncSession, method: str) -> int:
+    """JSONB columns of audit_logs and its partitions not set to `method` yet."""
+    result = await db.execute(
+        text(
+            "SELECT count(*) FROM pg_attribute a JOIN pg_class c ON c.oid = a.attrelid "
+            "WHERE (c.relname = :parent OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = CAST(:parent AS regclass))) "
+            "AND a.attname = ANY(:columns) AND a.attcompression IS DISTINCT FROM :code"
+        ),
+        {"parent": partitions.PARENT_TABLE, "columns": list(JSON_COLUMNS), "code": TOAST_COMPRESSION_CODES[method]},
+    )
+    return result.scalar_one()
+
+
+async def set_json_compression(db: AsyncSession, method: str) -> None:
+    """Sets the TOAST compression of the JSONB columns, on every partition. Applies to values written from now on."""
+    clauses = ", ".join(f'ALTER COLUMN "{column}" SET COMPRESSION {method}' for column in JSON_COLUMNS)
+    await db.execute(text(f'ALTER TABLE "{partitions.PARENT_TABLE}" {clauses}'))
+
+
+async def drop_partition(db: AsyncSession, name: str) -> None:
+    """Detaches and drops a whole partition: a catalog change, no row-by-row delete."""
+    await db.execute(text(f'ALTER TABLE "{partitions.PARENT_TABLE}" DETACH PARTITION "{name}"'))
+    await db.execute(text(f'DROP TABLE "{name}"'))
+
+
+async def delete_default_partition_rows_before(db: AsyncSession, cutoff_date: datetime) -> int:
+    """Expires the few rows that landed in the default partition."""
+    result = await db.execute(
+        text(f'DELETE FROM "{partitions.DEFAULT_PARTITION}" WHERE created_at < :cutoff'), {"cutoff": cutoff_date}
+    )
     return result.rowcount
\ No newline at end of file
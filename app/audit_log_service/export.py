@@ -0,0 +1,81 @@
+# /app/audit_log_service/export.py
+import base64
+import binascii
+import csv
+import io
+import json
+import uuid
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Optional, Sequence, Tuple
+
+# Columns written by exports, in order; the search vector is left out.
+EXPORT_COLUMNS = (
+    "id", "created_at", "user_id", "store_id", "action", "entity_type", "entity_id",
+    "before", "after", "changes", "request_metadata",
+)
+_JSON_COLUMNS = {"before", "after", "changes", "request_metadata"}
+
+Position = Tuple[datetime, uuid.UUID]
+
+
+def encode_cursor(created_at: datetime, log_id: uuid.UUID) -> str:
+    """An opaque keyset cursor pointing just after a (created_at, id) position."""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{log_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Position]:
+    """The (created_at, id) position of a cursor, or None if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, log_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(log_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_ndjson(rows: Sequence[Sequence[Any]]) -> bytes:
+    """One JSON object per line, for rows holding EXPORT_COLUMNS in order."""
+    return b"".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=_json_default, separators=(",", ":")).encode() + b"\n"
+        for row in rows
+    )
+
+
+def encode_csv(rows: Sequence[Sequence[Any]], header: bool = False) -> bytes:
+    """CSV lines for rows holding EXPORT_COLUMNS in order; JSON columns are written as JSON text."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([
+            "" if value is None
+            else json.dumps(value, default=_json_default, separators=(",", ":")) if column in _JSON_COLUMNS
+            else value.isoformat() if isinstance(value, datetime)
+            else value
+            for column, value in zip(EXPORT_COLUMNS, row)
+        ])
+    return buffer.getvalue().encode()
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compresses a byte stream into one gzip member as it goes."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def encode_rows(rows: List[Sequence[Any]], fmt: str, first: bool) -> bytes:
+    if fmt == "csv":
+        return encode_csv(rows, header=first)
+    return encode_ndjson(rows)
@@ -0,0 +1,52 @@
+# /app/audit_log_service/history.py
+import copy
+from typing import Any, Dict, Iterable, List, Optional
+
+# `changes` maps a field path (dotted for nested objects, e.g. `role.name`,
+# see snapshot.changed_paths) to {"before": ..., "after": ...}, or to a
+# "<REDACTED:field>" marker for PII fields.
+
+
+def field_changes(changes: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One {"field", "before", "after"} entry per changed path, in path order."""
+    entries = []
+    for path, change in sorted((changes or {}).items()):
+        if isinstance(change, dict) and change.keys() == {"before", "after"}:
+            entries.append({"field": path, "before": change["before"], "after": change["after"]})
+        else:
+            entries.append({"field": path, "before": change, "after": change})
+    return entries
+
+
+def _set_path(state: Dict[str, Any], path: str, value: Any) -> None:
+    *parents, leaf = path.split(".")
+    for key in parents:
+        child = state.get(key)
+        if not isinstance(child, dict):
+            child = state[key] = {}
+        state = child
+    state[leaf] = value
+
+
+def apply_changes(state: Dict[str, Any], changes: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Moves a state forward by one change set, in place. Redacted fields take the marker as their value."""
+    for entry in field_changes(changes):
+        _set_path(state, entry["field"], entry["after"])
+    return state
+
+
+def revert_changes(state: Dict[str, Any], changes: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The state before a change set, from the state after it; returns a copy."""
+    state = copy.deepcopy(state)
+    for entry in field_changes(changes):
+        _set_path(state, entry["field"], entry["before"])
+    return state
+
+
+def reconstruct(snapshot: Dict[str, Any], change_sets: Iterable[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """The state after folding change sets, oldest first, onto a copy of a full snapshot."""
+    state = copy.deepcopy(snapshot)
+    for changes in change_sets:
+        apply_changes(state, changes)
+    return state
+
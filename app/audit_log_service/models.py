@@ -3,22 +3,43 @@ import uuid
 from datetime import datetime
 from typing import Dict, Any, Optional
 
-from sqlalchemy import Column, Index
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, Computed, Index
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlmodel import Field, SQLModel
 
 
+# Text search configuration for audit search: no stemming or stop words, so
+# SKUs, ids and field names match exactly (case-insensitively).
+SEARCH_CONFIG = "simple"
+
+# Action and entity weigh most, then changed fields (names and values), then
+# the full after and before states.
+_SEARCH_VECTOR = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, "
+    "coalesce(action, '') || ' ' || coalesce(entity_type, '') || ' ' || coalesce(entity_id, '')), 'A') || "
+    f"setweight(jsonb_to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(changes, '{{}}'::jsonb), "
+    """'["key", "string", "numeric", "boolean"]'), 'B') || """
+    f"setweight(jsonb_to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(after, '{{}}'::jsonb), "
+    """'["string", "numeric"]'), 'C') || """
+    f"setweight(jsonb_to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(before, '{{}}'::jsonb), "
+    """'["string", "numeric"]'), 'D')"""
+)
+
+
 class AuditLog(SQLModel, table=True):
     """
     Represents an immutable audit log entry.
+
+    The table is range-partitioned by month on `created_at` (see
+    `partitions.py`), so the partition key is part of the primary key.
     """
     __tablename__ = "audit_logs"
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
-    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow, primary_key=True, nullable=False)
 
     user_id: Optional[uuid.UUID] = Field(default=None, foreign_key="user.id", nullable=True, index=True)
-    store_id: Optional[uuid.UUID] = Field(default=None, foreign_key="store.id", nullable=True, index=True)
+    store_id: Optional[uuid.UUID] = Field(default=None, foreign_key="store.id", nullable=True)
 
     action: str = Field(index=True)
     entity_type: Optional[str] = Field(default=None, index=True)
@@ -31,6 +52,16 @@ class AuditLog(SQLModel, table=True):
     request_metadata: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))
     raw: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))
 
+    # Maintained by Postgres on insert; backs the `q` search through a GIN index
+    search_vector: Optional[str] = Field(default=None, sa_column=Column(TSVECTOR, Computed(_SEARCH_VECTOR, persisted=True)))
+
     __table_args__ = (
         Index("ix_audit_logs_entity", "entity_type", "entity_id"),
+        # Keyset pages and exports walk these in (created_at, id) order
+        Index("ix_audit_logs_created_at_id", "created_at", "id"),
+        Index("ix_audit_logs_store_created_at_id", "store_id", "created_at", "id"),
+        Index("ix_audit_logs_search_vector", "search_vector", postgresql_using="gin"),
+        # Key existence (`changes ? 'price'`) for "which entities changed this field" queries
+        Index("ix_audit_logs_changes", "changes", postgresql_using="gin"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
\ No newline at end of file
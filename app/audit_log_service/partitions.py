@@ -0,0 +1,54 @@
+# /app/audit_log_service/partitions.py
+import re
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Tuple
+
+# `audit_logs` is range-partitioned on created_at, one partition per calendar
+# month, plus a default partition that only catches rows outside every month
+# created so far (it should stay empty).
+PARENT_TABLE = "audit_logs"
+DEFAULT_PARTITION = "audit_logs_default"
+_PARTITION_NAME = re.compile(r"^audit_logs_p(\d{4})_(\d{2})$")
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"audit_logs_p{month.year:04d}_{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """The month a partition holds, or None for tables that are not monthly partitions."""
+    match = _PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def months_between(first: date, last: date) -> List[date]:
+    """Every month from `first`'s to `last`'s, inclusive."""
+    months, month = [], month_start(first)
+    while month <= month_start(last):
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partitions_before(partition_names: Iterable[str], cutoff: datetime) -> List[Tuple[str, date]]:
+    """
+    Monthly partitions whose whole month is older than `cutoff`, oldest
+    first. The month containing the cutoff is kept until it ends.
+    """
+    expired = []
+    for name in partition_names:
+        month = partition_month(name)
+        if month is not None and add_months(month, 1) <= cutoff.date():
+            expired.append((name, month))
+    return sorted(expired, key=lambda partition: partition[1])
@@ -27,7 +27,13 @@ class AuditLogOut(AuditLogBase):
     class Config:
         from_attributes = True
 
-class AuditLogFilterParams(BaseModel):
+class AuditLogSearchResult(AuditLogOut):
+    """An audit log with its match quality, when searched with `q`."""
+    rank: Optional[float] = Field(None, description="Relevance of the match for `q`; empty without `q`.")
+    headline: Optional[str] = Field(None, description="Excerpt with the matched words wrapped in <b></b>; empty without `q`.")
+
+class AuditLogQueryParams(BaseModel):
+    """Filters shared by audit search and export."""
     start_ts: Optional[datetime] = None
     end_ts: Optional[datetime] = None
     user_id: Optional[uuid.UUID] = None
@@ -35,7 +41,48 @@ class AuditLogFilterParams(BaseModel):
     entity_id: Optional[str] = None
     action: Optional[str] = None
     store_id: Optional[uuid.UUID] = None
-    q: Optional[str] = None
+    q: Optional[str] = Field(None, description='Full-text search, e.g. `price "SKU-123"` or `store -deleted`.')
+
+class AuditLogFilterParams(AuditLogQueryParams):
     limit: int = Field(100, ge=1, le=1000)
     offset: int = Field(0, ge=0)
-    sort: str = Field("created_at", enum=["created_at", "action", "entity_type"])
\ No newline at end of file
+    sort: str = Field("created_at", enum=["created_at", "action", "entity_type", "relevance"])
+    cursor: Optional[str] = Field(
+        None,
+        description="Value of the previous page's X-Next-Cursor header; continues after it instead of using offset. "
+        "Only with sort=created_at.",
+    )
+
+class AuditLogExportParams(AuditLogQueryParams):
+    format: str = Field("ndjson", pattern="^(ndjson|csv)$", description="`ndjson` (one JSON object per line) or `csv`.")
+
+class FieldChange(BaseModel):
+    """One field changed by one audit event."""
+    log_id: uuid.UUID
+    created_at: datetime
+    action: str
+    user_id: Optional[uuid.UUID] = None
+    field: str = Field(..., description="Changed field; dotted for nested objects, e.g. `role.name`.")
+    before: Any = None
+    after: Any = None
+
+class EntityHistoryOut(BaseModel):
+    entity_type: str
+    entity_id: str
+    changes: List[FieldChange]
+
+class EntityStateOut(BaseModel):
+    """An entity's state at a point in time, rebuilt from the audit log."""
+    entity_type: str
+    entity_id: str
+    at: datetime
+    state: Dict[str, Any]
+    snapshot_log_id: Optional[uuid.UUID] = Field(None, description="The log whose full `after` state the rebuild started from.")
+    snapshot_at: Optional[datetime] = None
+    applied_changes: int = Field(..., description="Change sets folded onto the snapshot.")
+
+class ChangedEntityOut(BaseModel):
+    entity_type: str
+    entity_id: str
+    change_count: int
+    last_changed_at: datetime
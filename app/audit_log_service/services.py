@@ -1,59 +1,61 @@
 # /app/audit_log_service/services.py
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
 import json
 
 from fastapi import Request
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
-from . import crud, schemas
+from core.database import AsyncSessionFactory, run_after_commit
+from core.exceptions import BadRequestException, NotFoundException
+from . import archive, compact, crud, export, history, partitions, schemas, snapshot
+from .sink import AuditLogSink
 from app.user_service.models import User # Import the User model for type hinting
+from app.user_service.principal import Principal
 
 logger = logging.getLogger(__name__)
 
 
-def _mask_sensitive_fields(data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-    """Recursively masks sensitive fields in a dictionary."""
-    if not data:
-        return None
-    
-    clean_data = {}
-    for key, value in data.items():
-        if key in settings.AUDIT_PII_FIELDS:
-            clean_data[key] = f"<REDACTED:{key}>"
-        elif isinstance(value, dict):
-            clean_data[key] = _mask_sensitive_fields(value)
-        elif isinstance(value, list):
-            clean_data[key] = [_mask_sensitive_fields(item) if isinstance(item, dict) else item for item in value]
-        else:
-            clean_data[key] = value
-    return clean_data
+# --- AUDIT SINK ---
+# With AUDIT_SINK_ENABLED, events are handed to a background sink once the
+# business transaction commits, and written in batches. Without a running
+# sink (scripts, tests, or the setting off) they are inserted inside the
+# business transaction, as are events recorded with `transactional=True`.
+_sink: Optional[AuditLogSink] = None
+_partition_maintainer: Optional[asyncio.Task] = None
+_PARTITION_CHECK_SECONDS = 24 * 3600
+# Rows fetched from the server-side cursor per step of an export or an archive run.
+_EXPORT_BATCH_ROWS = 1000
 
-def _calculate_changes(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+def start():
     """
-    Calculates the difference between two dictionaries, representing the state
-    of an object before and after a change.
+    Starts the background audit sink and the daily check that creates
+    future partitions. Called from the app lifespan.
     """
-    changes = {}
-    all_keys = before.keys() | after.keys()
-    
-    for key in all_keys:
-        before_value = before.get(key)
-        after_value = after.get(key)
-        
-        if before_value != after_value:
-            changes[key] = {
-                "before": before_value,
-                "after": after_value
-            }
-            
-    return changes
+    global _sink, _partition_maintainer
+    if settings.AUDIT_SINK_ENABLED:
+        _sink = AuditLogSink()
+        _sink.start()
+    _partition_maintainer = asyncio.get_running_loop().create_task(_maintain_partitions())
+
+async def shutdown():
+    """Writes every buffered audit event. Called from the app lifespan."""
+    global _sink, _partition_maintainer
+    if _partition_maintainer is not None:
+        _partition_maintainer.cancel()
+        _partition_maintainer = None
+    if _sink is not None:
+        sink, _sink = _sink, None
+        await sink.close()
 
 
 class AuditLogger:
-    def __init__(self, db: AsyncSession, current_user: Optional[User] = None, request: Optional[Request] = None):
+    def __init__(self, db: AsyncSession, current_user: Optional[Union[User, Principal]] = None, request: Optional[Request] = None):
         self.db = db
         self.request = request
         self.current_user = current_user
@@ -63,12 +65,23 @@ class AuditLogger:
         action: str,
         entity_type: Optional[str] = None,
         entity_id: Optional[str] = None,
-        before: Optional[Dict[str, Any]] = None,
-        after: Optional[Dict[str, Any]] = None,
+        before: Optional[Union[BaseModel, Dict[str, Any]]] = None,
+        after: Optional[Union[BaseModel, Dict[str, Any]]] = None,
         changes: Optional[Dict[str, Any]] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        transactional: bool = False,
     ):
-        """Creates and stores a detailed audit log event."""
+        """
+        Records a detailed audit log event for the current transaction.
+
+        By default the event is buffered once the transaction commits and
+        written in the background, so it adds no query to the request and is
+        dropped if the transaction rolls back. With `transactional=True` it is
+        inserted inside the transaction and commits atomically with the change.
+
+        Pass `before`/`after` as schemas: each is dumped once and redacted
+        with its schema's precompiled plan. Plain dicts are walked in full.
+        """
         log_metadata = {}
         if self.request:
             log_metadata = {
@@ -83,34 +96,359 @@ class AuditLogger:
         
         user_id = self.current_user.id if self.current_user else None
         store_id = self.current_user.store_id if self.current_user and hasattr(self.current_user, 'store_id') else None
-            
-        if before and after and changes is None:
-            changes = _calculate_changes(before, after)
-
-        log_entry = schemas.AuditLogCreate(
-            user_id=user_id,
-            store_id=store_id,
-            action=action,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            before=_mask_sensitive_fields(before),
-            after=_mask_sensitive_fields(after),
-            changes=_mask_sensitive_fields(changes),
-            metadata=log_metadata,
-        )
-        
+        # Stamped now: buffered events are written later
+        created_at = datetime.utcnow()
+        before, after, changes = snapshot.audit_states(before, after, changes)
+        if settings.AUDIT_COMPACT_STORAGE:
+            before, after = compact.compact_states(entity_type, entity_id, before, after, changes, at=created_at)
+
+        row = {
+            "id": uuid.uuid4(),
+            "created_at": created_at,
+            "user_id": user_id,
+            "store_id": store_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "before": before,
+            "after": after,
+            "changes": changes,
+            "request_metadata": log_metadata,
+            "raw": None,
+        }
+
+        sink = _sink
+        if not transactional and sink is not None and await sink.wait_for_room():
+            run_after_commit(self.db, sink.submit, row)
+            return
+
+        if not transactional and sink is not None:
+            logger.warning("Audit sink is full; writing the event inside the current transaction.")
         try:
-            await crud.create_audit_log(self.db, log_entry)
+            await crud.create_audit_logs(self.db, [row])
+            if settings.AUDIT_COMPACT_STORAGE:
+                run_after_commit(self.db, compact.checkpoints_written, [row])
         except Exception as e:
             logger.error(f"Failed to write audit log: {e}", exc_info=True)
+            if transactional:
+                raise
+
+
+
+async def _load_archive_manifest() -> archive.ArchiveManifest:
+    """The archive manifest, read off the event loop."""
+    return await asyncio.to_thread(archive.ArchiveManifest.load, settings.AUDIT_ARCHIVE_DIR)
+
+
+async def search_audit_logs(
+    db: AsyncSession, filters: schemas.AuditLogFilterParams
+) -> Tuple[List[schemas.AuditLogSearchResult], Optional[str]]:
+    """
+    Filtered audit logs; with `q`, full-text matches with their rank and a
+    highlighted excerpt. Also returns the cursor of the next page when
+    sorted by created_at and this page is full.
 
+    Sorted by created_at, pages that run past the oldest log still in the
+    database continue into the archive files.
+    """
+    after = None
+    if filters.cursor:
+        if filters.sort != "created_at":
+            raise BadRequestException(detail="cursor can only be used with sort=created_at.")
+        after = export.decode_cursor(filters.cursor)
+        if after is None:
+            raise BadRequestException(detail="Invalid cursor.")
+
+    # Only created_at order continues cleanly from the database into the
+    # archive, which holds nothing newer than `archived_before`
+    manifest = await _load_archive_manifest() if filters.sort == "created_at" else None
+    archived_before = manifest.archived_before if manifest else None
+    use_archive = (
+        archived_before is not None
+        and (filters.start_ts is None or archive.naive_utc(filters.start_ts) < archived_before)
+    )
+
+    results = []
+    if not (use_archive and after is not None and archive.naive_utc(after[0]) < archived_before):
+        for log, rank, headline in await crud.get_audit_logs(db, filters, after):
+            result = schemas.AuditLogSearchResult.model_validate(log)
+            result.rank = rank
+            result.headline = headline
+            results.append(result)
+
+    if use_archive and len(results) < filters.limit:
+        # The database has no more matches; continue with the archived ones
+        skip = 0
+        if after is None and not results and filters.offset:
+            skip = max(filters.offset - await crud.count_audit_logs(db, filters), 0)
+        results += await asyncio.to_thread(
+            archive.search, manifest, filters, filters.limit - len(results), skip, after,
+        )
+
+    next_cursor = None
+    if filters.sort == "created_at" and len(results) == filters.limit:
+        next_cursor = export.encode_cursor(results[-1].created_at, results[-1].id)
+    return results, next_cursor
+
+
+async def get_audit_log(db: AsyncSession, log_id: uuid.UUID) -> schemas.AuditLogOut:
+    """
+    A single audit log. For updates stored compactly (changes only), the
+    `before` and `after` states are rebuilt from the entity's nearest
+    earlier checkpoint.
+    """
+    log = await crud.get_audit_log_by_id(db, log_id)
+    if not log:
+        raise NotFoundException(resource="Audit log", resource_id=str(log_id))
+    result = schemas.AuditLogOut.model_validate(log)
+    if result.before is not None or not result.changes or result.entity_id is None:
+        return result
+
+    after = result.after
+    if after is None:
+        snapshot_row = await crud.get_entity_snapshot_at(db, result.entity_type, result.entity_id, result.created_at)
+        if snapshot_row is None:
+            # No checkpoint left to rebuild from: the change set is all there is
+            logger.warning(f"No checkpoint to rebuild audit log {log_id} of {result.entity_type} {result.entity_id} from.")
+            return result
+        change_rows = await crud.get_entity_changes_since(
+            db, result.entity_type, result.entity_id, (snapshot_row.created_at, snapshot_row.id), result.created_at
+        )
+        # Logs with the same timestamp but a later id come after this one
+        position = next((i for i, row in enumerate(change_rows) if row.id == log_id), None)
+        if position is None:
+            return result
+        after = history.reconstruct(snapshot_row.after, (row.changes for row in change_rows[:position + 1]))
+    result.after = after
+    result.before = history.revert_changes(after, result.changes)
+    return result
+
+
+async def get_entity_history(
+    db: AsyncSession,
+    entity_type: str,
+    entity_id: str,
+    start_ts: Optional[datetime] = None,
+    end_ts: Optional[datetime] = None,
+    field: Optional[str] = None,
+    limit: int = 1000,
+) -> schemas.EntityHistoryOut:
+    """An entity's field-level change timeline, oldest first, read from `changes` only."""
+    rows = await crud.get_entity_changes(db, entity_type, entity_id, start_ts, end_ts, field, limit)
+    changes = [
+        schemas.FieldChange(log_id=row.id, created_at=row.created_at, action=row.action, user_id=row.user_id, **entry)
+        for row in rows
+        for entry in history.field_changes(row.changes)
+        if field is None or entry["field"] == field
+    ]
+    return schemas.EntityHistoryOut(entity_type=entity_type, entity_id=entity_id, changes=changes)
+
+
+async def get_entity_state_at(db: AsyncSession, entity_type: str, entity_id: str, at: datetime) -> schemas.EntityStateOut:
+    """
+    Rebuilds an entity's state at `at`: the latest full `after` state at or
+    before it, with every later change set up to `at` folded on. Without
+    any full state, the changes are folded onto an empty one.
+    """
+    at = archive.naive_utc(at)
+    snapshot_row = await crud.get_entity_snapshot_at(db, entity_type, entity_id, at)
+    if snapshot_row is not None:
+        change_rows = await crud.get_entity_changes_since(
+            db, entity_type, entity_id, (snapshot_row.created_at, snapshot_row.id), at
+        )
+    else:
+        change_rows = await crud.get_entity_changes(db, entity_type, entity_id, end_ts=at, limit=None)
+        if not change_rows:
+            raise NotFoundException(resource=f"{entity_type} history", resource_id=entity_id)
+
+    state = history.reconstruct(snapshot_row.after if snapshot_row else {}, (row.changes for row in change_rows))
+    return schemas.EntityStateOut(
+        entity_type=entity_type,
+        entity_id=entity_id,
+        at=at,
+        state=state,
+        snapshot_log_id=snapshot_row.id if snapshot_row else None,
+        snapshot_at=snapshot_row.created_at if snapshot_row else None,
+        applied_changes=len(change_rows),
+    )
+
+
+async def get_entities_changing_field(
+    db: AsyncSession,
+    field: str,
+    entity_type: Optional[str] = None,
+    start_ts: Optional[datetime] = None,
+    end_ts: Optional[datetime] = None,
+    limit: int = 100,
+) -> List[schemas.ChangedEntityOut]:
+    """Entities whose `field` changed in the range, most recently changed first."""
+    rows = await crud.get_entities_changing_field(db, field, entity_type, start_ts, end_ts, limit)
+    return [schemas.ChangedEntityOut.model_validate(row._mapping) for row in rows]
+
+
+async def export_audit_logs(filters: schemas.AuditLogExportParams) -> AsyncIterator[bytes]:
+    """
+    Streams every matching audit log, oldest first, as gzipped NDJSON or CSV.
+
+    Rows come from a server-side cursor `_EXPORT_BATCH_ROWS` at a time and
+    are encoded and compressed batch by batch, so memory stays constant
+    however many rows match. Uses its own session: the request's is closed
+    before a streaming response starts sending.
+    """
+    async def encoded() -> AsyncIterator[bytes]:
+        async with AsyncSessionFactory() as session:
+            async with session.begin():
+                statement = crud.audit_log_export_statement(filters).execution_options(yield_per=_EXPORT_BATCH_ROWS)
+                result = await session.stream(statement)
+                first = True
+                async for rows in result.partitions():
+                    yield export.encode_rows(rows, filters.format, first)
+                    first = False
+                if first and filters.format == "csv":
+                    yield export.encode_csv([], header=True)
+
+    async for chunk in export.gzip_stream(encoded()):
+        yield chunk
+
+
+async def ensure_partitions(db: AsyncSession, months_ahead: int = settings.AUDIT_PARTITION_MONTHS_AHEAD) -> List[str]:
+    """
+    Creates the monthly `audit_logs` partitions for this month and the next
+    `months_ahead` months, and the default partition, if they are missing,
+    and sets the JSONB columns' TOAST compression on them. Returns the
+    names of the partitions created.
+    """
+    existing = set(await crud.get_partition_names(db))
+    this_month = partitions.month_start(datetime.utcnow().date())
+    created = []
+    for month in partitions.months_between(this_month, partitions.add_months(this_month, months_ahead)):
+        name = partitions.partition_name(month)
+        if name not in existing:
+            await crud.create_month_partition(db, month)
+            created.append(name)
+    if partitions.DEFAULT_PARTITION not in existing:
+        await crud.create_default_partition(db)
+        created.append(partitions.DEFAULT_PARTITION)
+    if created:
+        logger.info(f"Created audit log partitions: {', '.join(created)}")
+    await _ensure_json_compression(db)
+    return created
+
+
+# Whether the server accepts AUDIT_TOAST_COMPRESSION; checked once per process
+_compression_supported: Optional[bool] = None
+
+
+async def _ensure_json_compression(db: AsyncSession) -> None:
+    """
+    Applies AUDIT_TOAST_COMPRESSION to the JSONB columns of any partition
+    that lacks it. Skipped with a warning on servers without it, and run
+    in a savepoint so a failure never undoes the partitions just created.
+    """
+    global _compression_supported
+    method = settings.AUDIT_TOAST_COMPRESSION
+    if not method or _compression_supported is False:
+        return
+    if method not in crud.TOAST_COMPRESSION_CODES:
+        logger.warning(f"Unknown AUDIT_TOAST_COMPRESSION '{method}'; leaving the server default.")
+        _compression_supported = False
+        return
+    try:
+        async with db.begin_nested():
+            if _compression_supported is None:
+                _compression_supported = await crud.server_supports_compression(db, method)
+                if not _compression_supported:
+                    logger.warning(
+                        f"The database does not support {method} column compression (needs PostgreSQL 14+ built "
+                        f"with it); audit log JSONB columns keep the server default."
+                    )
+                    return
+            if await crud.count_columns_without_compression(db, method):
+                await crud.set_json_compression(db, method)
+                logger.info(f"Audit log JSONB columns now use {method} TOAST compression.")
+    except Exception as e:
+        logger.warning(f"Could not set {method} compression on the audit log JSONB columns: {e}")
 
 
 async def cleanup_old_audit_logs(db: AsyncSession):
-    """Deletes audit logs older than the configured retention period."""
+    """
+    Applies the retention period by detaching and dropping every monthly
+    partition that lies entirely before the cutoff, and deleting archived
+    day files older than it. This only changes the
+    catalog, so it takes milliseconds whatever the partitions hold. Rows
+    are kept until their whole month has expired. Also creates any missing
+    future partitions.
+    """
+    created = await ensure_partitions(db)
     if settings.AUDIT_RETENTION_DAYS > 0:
         cutoff_date = datetime.utcnow() - timedelta(days=settings.AUDIT_RETENTION_DAYS)
-        deleted_count = await crud.delete_logs_before(db, cutoff_date)
-        logger.info(f"Audit log cleanup: Deleted {deleted_count} logs older than {cutoff_date}.")
-        return {"deleted_count": deleted_count}
-    return {"message": "Audit log retention is disabled."}
\ No newline at end of file
+        expired = partitions.partitions_before(await crud.get_partition_names(db), cutoff_date)
+        for name, _ in expired:
+            await crud.drop_partition(db, name)
+        deleted_count = await crud.delete_default_partition_rows_before(db, cutoff_date)
+        manifest = await _load_archive_manifest()
+        expired_days = await asyncio.to_thread(manifest.expire_before, cutoff_date.date())
+        if expired_days:
+            await asyncio.to_thread(manifest.save)
+        dropped = [name for name, _ in expired]
+        logger.info(
+            f"Audit log cleanup: dropped partitions {dropped}, {deleted_count} stray rows and "
+            f"{len(expired_days)} archived days older than {cutoff_date}."
+        )
+        return {
+            "dropped_partitions": dropped,
+            "created_partitions": created,
+            "deleted_count": deleted_count,
+            "expired_archive_days": expired_days,
+        }
+    return {"message": "Audit log retention is disabled.", "created_partitions": created}
+
+
+async def archive_old_audit_logs(db: AsyncSession) -> Dict[str, Any]:
+    """
+    Moves every monthly partition older than AUDIT_ARCHIVE_AFTER_DAYS to
+    gzip JSONL files, one per day, under AUDIT_ARCHIVE_DIR, oldest month
+    first. Rows are streamed out `_EXPORT_BATCH_ROWS` at a time; the
+    partition is dropped only once its files and the manifest are on disk,
+    so an interrupted run just archives that month again.
+    """
+    if settings.AUDIT_ARCHIVE_AFTER_DAYS <= 0:
+        return {"message": "Audit log archiving is disabled."}
+    cutoff = datetime.utcnow() - timedelta(days=settings.AUDIT_ARCHIVE_AFTER_DAYS)
+    manifest = await _load_archive_manifest()
+    archived = []
+    for name, month in partitions.partitions_before(await crud.get_partition_names(db), cutoff):
+        start = datetime.combine(month, datetime.min.time())
+        end = datetime.combine(partitions.add_months(month, 1), datetime.min.time())
+        writer = archive.ArchiveWriter(settings.AUDIT_ARCHIVE_DIR)
+        rows = 0
+        try:
+            async with AsyncSessionFactory() as session:
+                statement = crud.audit_log_range_statement(start, end).execution_options(yield_per=_EXPORT_BATCH_ROWS)
+                result = await session.stream(statement)
+                async for batch in result.mappings().partitions():
+                    await asyncio.to_thread(writer.write, batch)
+                    rows += len(batch)
+            entries = await asyncio.to_thread(writer.finish)
+        except BaseException:
+            writer.abort()
+            raise
+        manifest.add(entries, end)
+        await asyncio.to_thread(manifest.save)
+        await crud.drop_partition(db, name)
+        await db.commit()
+        archived.append({"partition": name, "rows": rows, "files": len(entries)})
+        logger.info(f"Archived {rows} audit logs from {name} to {len(entries)} files.")
+    return {"archived_partitions": archived, "archived_before": manifest.archived_before}
+
+
+async def _maintain_partitions() -> None:
+    """Keeps future partitions ahead of the clock while the app runs."""
+    while True:
+        try:
+            async with AsyncSessionFactory() as session:
+                await ensure_partitions(session)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to create audit log partitions: {e}", exc_info=True)
+        await asyncio.sleep(_PARTITION_CHECK_SECONDS)
@@ -0,0 +1,142 @@
+# /app/audit_log_service/sink.py
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from core.config import settings
+from core.database import AsyncSessionFactory
+from . import compact, crud
+
+logger = logging.getLogger(__name__)
+
+AuditRow = Dict[str, Any]
+
+
+async def write_audit_batch(rows: List[AuditRow]) -> None:
+    """Inserts a batch of audit rows in its own short transaction."""
+    async with AsyncSessionFactory() as session:
+        await crud.create_audit_logs(session, rows)
+        await session.commit()
+    if settings.AUDIT_COMPACT_STORAGE:
+        compact.checkpoints_written(rows)
+
+
+def _is_transient(error: Exception) -> bool:
+    """Connection trouble, worth retrying as is; anything else is a problem with the rows themselves."""
+    return isinstance(error, (OperationalError, InterfaceError, OSError, asyncio.TimeoutError))
+
+
+class AuditLogSink:
+    """
+    Buffers audit rows in memory and writes them in the background with
+    multi-row INSERTs, off the request path.
+
+    A batch is written once `batch_size` rows are waiting or the oldest one
+    has waited `flush_interval` seconds. At most `max_pending` rows are held:
+    `wait_for_room()` lets callers block until there is space, so a slow
+    database slows writers down instead of growing memory without bound.
+    A batch that fails on a connection error is put back and retried after
+    `flush_interval`; once the sink is closing it is logged and dropped
+    instead. A batch the database rejects for any other reason is split in
+    half and retried at once, so the rows that cannot be written are
+    narrowed down and dropped one by one while the rest get through.
+
+    `close()` writes everything still buffered; call it on shutdown.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[List[AuditRow]], Awaitable[None]] = write_audit_batch,
+        batch_size: int = settings.AUDIT_SINK_BATCH_SIZE,
+        flush_interval: float = settings.AUDIT_SINK_FLUSH_INTERVAL_SECONDS,
+        max_pending: int = settings.AUDIT_SINK_MAX_PENDING,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._writer = writer
+        # Smaller than batch_size while a rejected batch is being split
+        self._batch_limit = batch_size
+        self._buffer: List[AuditRow] = []
+        self._oldest_at = 0.0
+        self._wakeup = asyncio.Event()
+        self._room = asyncio.Event()
+        self._room.set()
+        self._closing = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        """Writes every buffered row, then stops the background writer."""
+        self._closing = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def wait_for_room(self, timeout: float = settings.AUDIT_SINK_ENQUEUE_TIMEOUT_SECONDS) -> bool:
+        """Waits until the buffer has space; False if it is still full after `timeout` seconds."""
+        if len(self._buffer) < self.max_pending:
+            return True
+        try:
+            await asyncio.wait_for(self._room.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def submit(self, row: AuditRow) -> None:
+        """Buffers a row without waiting. Safe to call from an after-commit hook."""
+        if not self._buffer:
+            self._oldest_at = asyncio.get_running_loop().time()
+            self._wakeup.set()
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        if len(self._buffer) >= self.max_pending:
+            self._room.clear()
+
+    async def _wait(self, timeout: Optional[float]) -> None:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._buffer or not self._closing:
+            if not self._buffer:
+                await self._wait(None)
+                continue
+            remaining = self._oldest_at + self.flush_interval - loop.time()
+            if len(self._buffer) < self.batch_size and remaining > 0 and not self._closing:
+                await self._wait(remaining)
+                continue
+
+            batch = self._buffer[: self._batch_limit]
+            del self._buffer[: self._batch_limit]
+            try:
+                await self._writer(batch)
+                self._batch_limit = self.batch_size
+            except Exception as e:
+                if not _is_transient(e) and len(batch) > 1:
+                    logger.warning(f"Audit batch of {len(batch)} events rejected, splitting it: {e}")
+                    self._buffer[:0] = batch
+                    self._batch_limit = len(batch) // 2
+                elif not _is_transient(e) or self._closing:
+                    logger.error(f"Dropping {len(batch)} audit events that could not be written: {e}", exc_info=True)
+                    self._batch_limit = self.batch_size
+                else:
+                    logger.error(f"Failed to write {len(batch)} audit events, retrying: {e}", exc_info=True)
+                    self._buffer[:0] = batch
+                    await self._wait(self.flush_interval)
+            if len(self._buffer) < self.max_pending:
+                self._room.set()
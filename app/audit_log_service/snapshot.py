@@ -0,0 +1,182 @@
+# /app/audit_log_service/snapshot.py
+import enum
+import typing
+import uuid
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, EmailStr
+
+from core.config import settings
+
+# Field types that dump to a JSON scalar; they can never hold a PII key.
+_SCALAR_TYPES = (str, int, float, bool, bytes, uuid.UUID, datetime, date, time, timedelta, Decimal, enum.Enum, EmailStr)
+
+# What a redaction plan does with one field
+_MASK, _MODEL, _MODELS, _WALK = range(4)
+
+
+def _pii_fields() -> FrozenSet[str]:
+    return frozenset(settings.AUDIT_PII_FIELDS)
+
+
+def _redacted(key: str) -> str:
+    return f"<REDACTED:{key}>"
+
+
+def mask_value(value: Any, pii: Optional[FrozenSet[str]] = None) -> Any:
+    """
+    Masks PII keys anywhere in a JSON value, returning a copy. For data
+    with no schema to plan from; snapshots of models use `RedactionPlan`.
+    """
+    pii = _pii_fields() if pii is None else pii
+    if isinstance(value, dict):
+        return {
+            key: _redacted(key) if key in pii else mask_value(item, pii)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [mask_value(item, pii) for item in value]
+    return value
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _is_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+class RedactionPlan:
+    """
+    The steps that mask PII in the JSON dump of one schema, worked out once
+    from its field types: mask PII fields, descend into nested models, and
+    fully walk only fields typed as free-form JSON. Scalar fields, usually
+    all of them, are never looked at.
+    """
+
+    __slots__ = ("steps",)
+
+    def __init__(self):
+        self.steps: List[Tuple[str, int, Optional["RedactionPlan"]]] = []
+
+    def apply(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Redacts a dump of the schema in place and returns it."""
+        for key, action, nested in self.steps:
+            if key not in data:
+                continue
+            value = data[key]
+            if action == _MASK:
+                data[key] = _redacted(key)
+            elif value is None:
+                continue
+            elif action == _MODEL:
+                nested.apply(value)
+            elif action == _MODELS:
+                for item in value:
+                    if item is not None:
+                        nested.apply(item)
+            else:
+                data[key] = mask_value(value)
+        return data
+
+
+_plans: Dict[Type[BaseModel], RedactionPlan] = {}
+
+
+def redaction_plan(model: Type[BaseModel]) -> RedactionPlan:
+    """The cached redaction plan for a schema; recursive schemas share their plan."""
+    plan = _plans.get(model)
+    if plan is not None:
+        return plan
+    # Registered before its fields are planned, so a self-referencing field finds it
+    plan = _plans[model] = RedactionPlan()
+    pii = _pii_fields()
+    for name, field in model.model_fields.items():
+        if field.exclude:
+            continue
+        if name in pii:
+            plan.steps.append((name, _MASK, None))
+            continue
+        annotation = _unwrap_optional(field.annotation)
+        origin = typing.get_origin(annotation)
+        args = typing.get_args(annotation)
+        if _is_model(annotation):
+            plan.steps.append((name, _MODEL, redaction_plan(annotation)))
+        elif origin in (list, tuple, set, frozenset) and len(args) == 1 and _is_model(_unwrap_optional(args[0])):
+            plan.steps.append((name, _MODELS, redaction_plan(_unwrap_optional(args[0]))))
+        elif not (isinstance(annotation, type) and issubclass(annotation, _SCALAR_TYPES)):
+            plan.steps.append((name, _WALK, None))
+    return plan
+
+
+def snapshot(model: BaseModel) -> Dict[str, Any]:
+    """A JSON-safe dict of a schema, unredacted; what its JSON would parse back to."""
+    return model.model_dump(mode="json")
+
+
+def changed_paths(before: Dict[str, Any], after: Dict[str, Any], prefix: str = "") -> Dict[str, Dict[str, Any]]:
+    """
+    The fields that differ between two snapshots, as
+    `{path: {"before": ..., "after": ...}}`. Nested objects are compared
+    field by field, with dotted paths (`role.name`); lists are compared
+    whole.
+    """
+    changes = {}
+    for key in before.keys() | after.keys():
+        before_value = before.get(key)
+        after_value = after.get(key)
+        if before_value == after_value:
+            continue
+        path = f"{prefix}{key}"
+        if isinstance(before_value, dict) and isinstance(after_value, dict):
+            changes.update(changed_paths(before_value, after_value, f"{path}."))
+        else:
+            changes[path] = {"before": before_value, "after": after_value}
+    return changes
+
+
+def redact_changes(changes: Dict[str, Any]) -> Dict[str, Any]:
+    """Masks a change set in place: whole entries whose path runs through a PII field, and PII inside values."""
+    pii = _pii_fields()
+    for path, change in changes.items():
+        segment = next((segment for segment in path.split(".") if segment in pii), None)
+        if segment is not None:
+            changes[path] = _redacted(segment)
+        elif isinstance(change, (dict, list)):
+            changes[path] = mask_value(change, pii)
+    return changes
+
+
+def audit_states(
+    before: Optional[Any], after: Optional[Any], changes: Optional[Dict[str, Any]] = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    The redacted before, after and changes of an audit event. `before` and
+    `after` are schemas, dumped once and redacted with their plan, or plain
+    dicts, which are walked in full. The changes are taken from the
+    unredacted states, so a changed PII field still shows up (masked).
+    """
+    before_state = snapshot(before) if isinstance(before, BaseModel) else before
+    after_state = snapshot(after) if isinstance(after, BaseModel) else after
+    if before_state and after_state and changes is None:
+        changes = changed_paths(before_state, after_state)
+    return (
+        _redact_state(before, before_state),
+        _redact_state(after, after_state),
+        redact_changes(dict(changes)) if changes else None,
+    )
+
+
+def _redact_state(source: Optional[Any], state: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not state:
+        return None
+    if isinstance(source, BaseModel):
+        return redaction_plan(type(source)).apply(state)
+    return mask_value(state)
@@ -0,0 +1,157 @@
+# /app/audit_log_service/tests/test_archive.py
+import gzip
+import hashlib
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from app.audit_log_service import archive, crud, export, schemas, services
+from core.config import settings
+
+START = datetime(2026, 1, 30, 22, 0)
+
+
+def _rows(count: int, step: timedelta = timedelta(hours=1)):
+    return [
+        {
+            "id": uuid.UUID(int=i + 1), "created_at": START + step * i, "user_id": None, "store_id": None,
+            "action": "UPDATE_PRODUCT" if i % 2 else "CREATE_PRODUCT", "entity_type": "Product",
+            "entity_id": f"p-{i}", "before": None, "after": {"name": f"Biscuit {i}"},
+            "changes": None, "request_metadata": {"source": "system"}, "raw": None,
+        }
+        for i in range(count)
+    ]
+
+
+def _archive(root, rows) -> archive.ArchiveManifest:
+    # The archive job streams a month newest first
+    writer = archive.ArchiveWriter(str(root))
+    writer.write(rows[::-1])
+    manifest = archive.ArchiveManifest.load(str(root))
+    manifest.add(writer.finish(), datetime(2026, 2, 1))
+    manifest.save()
+    return archive.ArchiveManifest.load(str(root))
+
+
+def test_writer_publishes_day_files_listed_in_the_manifest(tmp_path):
+    manifest = _archive(tmp_path, _rows(6))
+    assert sorted(manifest.days) == ["2026-01-30", "2026-01-31"]
+    assert manifest.archived_before == datetime(2026, 2, 1)
+    entry = manifest.days["2026-01-31"]
+    path = tmp_path / entry["path"]
+    assert path.name == "audit_logs_2026-01-31.jsonl.gz"
+    assert entry["rows"] == 4
+    assert (entry["first_created_at"], entry["last_created_at"]) == ("2026-01-31T00:00:00", "2026-01-31T03:00:00")
+    assert entry["sha256"] == hashlib.sha256(path.read_bytes()).hexdigest()
+    lines = gzip.decompress(path.read_bytes()).splitlines()
+    assert [json.loads(line)["created_at"] for line in lines] == [f"2026-01-31T0{hour}:00:00" for hour in (3, 2, 1, 0)]
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_abort_leaves_nothing_behind(tmp_path):
+    writer = archive.ArchiveWriter(str(tmp_path))
+    writer.write(_rows(3))
+    writer.abort()
+    assert not list(tmp_path.rglob("*.gz*"))
+
+
+def test_search_pages_newest_first_across_days(tmp_path):
+    manifest = _archive(tmp_path, _rows(6))
+    page = archive.search(manifest, schemas.AuditLogQueryParams(), limit=4)
+    assert [log.entity_id for log in page] == ["p-5", "p-4", "p-3", "p-2"]
+    rest = archive.search(manifest, schemas.AuditLogQueryParams(), limit=4, skip=4)
+    assert [log.entity_id for log in rest] == ["p-1", "p-0"]
+    after = archive.search(manifest, schemas.AuditLogQueryParams(), limit=4, after=(page[-1].created_at, page[-1].id))
+    assert [log.entity_id for log in after] == ["p-1", "p-0"]
+
+
+def test_search_stops_reading_once_the_page_is_full(tmp_path, monkeypatch):
+    manifest = _archive(tmp_path, _rows(48))
+    decoded = []
+    loads = json.loads
+
+    def counting_loads(line):
+        decoded.append(line)
+        return loads(line)
+
+    monkeypatch.setattr(archive.json, "loads", counting_loads)
+    page = archive.search(manifest, schemas.AuditLogQueryParams(), limit=3)
+    assert [log.entity_id for log in page] == ["p-47", "p-46", "p-45"]
+    assert len(decoded) == 3
+
+    # 2026-02-01 (p-26..p-47) matches whole and is skipped by its row count;
+    # only p-25, the last skipped match, is read from 2026-01-31
+    decoded.clear()
+    deep = archive.search(manifest, schemas.AuditLogQueryParams(), limit=2, skip=23)
+    assert [log.entity_id for log in deep] == ["p-24", "p-23"]
+    assert len(decoded) == 3
+
+
+def test_oldest_first_day_files_are_still_read_newest_first(tmp_path):
+    manifest = _archive(tmp_path, _rows(6))
+    entry = manifest.days["2026-01-31"]
+    path = tmp_path / entry["path"]
+    lines = gzip.decompress(path.read_bytes()).splitlines()
+    path.write_bytes(gzip.compress(b"\n".join(lines[::-1]) + b"\n"))
+    del entry["newest_first"]
+    assert [record["entity_id"] for record in archive.read_day(str(tmp_path), entry)] == ["p-5", "p-4", "p-3", "p-2"]
+
+
+def test_search_applies_filters_and_query_terms(tmp_path):
+    manifest = _archive(tmp_path, _rows(6))
+    filters = schemas.AuditLogQueryParams(
+        action="UPDATE_PRODUCT", end_ts=datetime(2026, 1, 31, 1, 0, tzinfo=timezone.utc),
+    )
+    assert [log.entity_id for log in archive.search(manifest, filters, limit=10)] == ["p-3", "p-1"]
+    assert [log.entity_id for log in archive.search(manifest, schemas.AuditLogQueryParams(q='"biscuit 4" or p-0'), limit=10)] == ["p-4", "p-0"]
+    assert len(archive.search(manifest, schemas.AuditLogQueryParams(q="biscuit -create_product"), limit=10)) == 3
+
+
+def test_expire_before_deletes_old_day_files(tmp_path):
+    manifest = _archive(tmp_path, _rows(6))
+    assert manifest.expire_before(date(2026, 1, 31)) == ["2026-01-30"]
+    assert not (tmp_path / archive.day_path(date(2026, 1, 30))).exists()
+    assert list(manifest.days) == ["2026-01-31"]
+
+
+@pytest.mark.asyncio
+async def test_search_continues_from_the_database_into_the_archive(tmp_path, monkeypatch):
+    _archive(tmp_path, _rows(6))
+    monkeypatch.setattr(settings, "AUDIT_ARCHIVE_DIR", str(tmp_path))
+
+    async def no_hot_logs(db, filters, after=None):
+        return []
+
+    async def hot_count(db, filters):
+        return 1
+
+    monkeypatch.setattr(crud, "get_audit_logs", no_hot_logs)
+    monkeypatch.setattr(crud, "count_audit_logs", hot_count)
+    results, next_cursor = await services.search_audit_logs(None, schemas.AuditLogFilterParams(limit=2, offset=3))
+    assert [log.entity_id for log in results] == ["p-3", "p-2"]
+    assert export.decode_cursor(next_cursor) == (results[-1].created_at, results[-1].id)
+
+    results, _ = await services.search_audit_logs(None, schemas.AuditLogFilterParams(limit=2, sort="action"))
+    assert results == []
+
+
+@pytest.mark.asyncio
+async def test_search_reads_the_manifest_only_for_created_at_order(monkeypatch):
+    loads = []
+
+    def load(root):
+        loads.append(root)
+        return archive.ArchiveManifest(Path(root))
+
+    async def no_hot_logs(db, filters, after=None):
+        return []
+
+    monkeypatch.setattr(archive.ArchiveManifest, "load", staticmethod(load))
+    monkeypatch.setattr(crud, "get_audit_logs", no_hot_logs)
+    await services.search_audit_logs(None, schemas.AuditLogFilterParams(limit=2, sort="action"))
+    assert loads == []
+    await services.search_audit_logs(None, schemas.AuditLogFilterParams(limit=2))
+    assert loads == [settings.AUDIT_ARCHIVE_DIR]
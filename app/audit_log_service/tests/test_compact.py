@@ -0,0 +1,250 @@
+# /app/audit_log_service/tests/test_compact.py
+import json
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.audit_log_service import compact, crud, history, services, snapshot
+from app.store_product_service.schemas import StoreProductOut
+
+
+def _store_product(**overrides) -> StoreProductOut:
+    fields = dict(
+        id=uuid.UUID(int=1), store_id=uuid.UUID(int=2), product_id=uuid.UUID(int=3), selling_price=49.5,
+        last_purchase_price=40.0, stock=120, reorder_point=10, max_quantity=200, is_active=True,
+        created_at=datetime(2026, 1, 1), updated_at=datetime(2026, 1, 1),
+        product={"name": "Parle-G Biscuit", "sku": "GROC-PGB37-001"},
+    )
+    fields.update(overrides)
+    return StoreProductOut(**fields)
+
+
+def _size(*documents) -> int:
+    return sum(len(json.dumps(document)) for document in documents if document)
+
+
+MAY = datetime(2026, 5, 10)
+
+
+def _updates(tracker, count, confirm=True, at=MAY):
+    """Runs `count` updates of one entity, confirming each checkpoint as written if `confirm`."""
+    due = []
+    for _ in range(count):
+        due.append(tracker.due("Product", "p-1", at))
+        if due[-1] and confirm:
+            tracker.written("Product", "p-1", at)
+    return due
+
+
+def test_tracker_checkpoints_first_and_every_nth_update():
+    tracker = compact.CheckpointTracker(every=3)
+    assert _updates(tracker, 7) == [True, False, False, True, False, False, True]
+
+
+def test_tracker_keeps_checkpointing_until_one_is_written():
+    tracker = compact.CheckpointTracker(every=3)
+    # The first checkpoint was rolled back or dropped: no changes-only rows follow it
+    assert _updates(tracker, 3, confirm=False) == [True, True, True]
+    tracker.written("Product", "p-1", MAY)
+    assert _updates(tracker, 3) == [False, False, True]
+
+
+def test_tracker_checkpoints_first_update_of_each_month():
+    tracker = compact.CheckpointTracker(every=10)
+    assert _updates(tracker, 2) == [True, False]
+    assert _updates(tracker, 2, at=datetime(2026, 6, 1)) == [True, False]
+
+
+def test_tracker_ignores_confirmations_from_an_earlier_month():
+    tracker = compact.CheckpointTracker(every=10)
+    _updates(tracker, 1, at=datetime(2026, 6, 1))
+    tracker.written("Product", "p-1", MAY)
+    assert tracker.due("Product", "p-1", datetime(2026, 6, 2)) is False
+
+
+def test_tracker_forgets_least_recently_updated_entities():
+    tracker = compact.CheckpointTracker(every=10, max_entities=2)
+    for entity_id in ("a", "b", "a", "c"):
+        if tracker.due("Product", entity_id, MAY):
+            tracker.written("Product", entity_id, MAY)
+    assert tracker.due("Product", "a", MAY) is False
+    assert tracker.due("Product", "b", MAY) is True
+
+
+def test_compact_states_keeps_creations_and_checkpoints_only():
+    tracker = compact.CheckpointTracker(every=2)
+    after = {"stock": 1}
+    changes = {"stock": {"before": 2, "after": 1}}
+    assert compact.compact_states("P", "p", None, after, None, tracker, MAY) == (None, after)
+    assert compact.compact_states("P", "p", {"stock": 2}, after, changes, tracker, MAY) == (None, after)
+    compact.checkpoints_written(
+        [{"entity_type": "P", "entity_id": "p", "after": after, "changes": changes, "created_at": MAY}], tracker
+    )
+    assert compact.compact_states("P", "p", {"stock": 2}, after, changes, tracker, MAY) == (None, None)
+
+
+def test_compact_update_stores_at_least_three_times_fewer_bytes():
+    before_state, after_state, changes = snapshot.audit_states(_store_product(), _store_product(stock=95))
+    full = _size(before_state, after_state, changes)
+    every = 20
+    per_update = _size(changes) + _size(after_state) / every
+    assert full / per_update >= 3
+
+
+def test_revert_changes_recovers_the_before_state():
+    before = {"stock": 10, "role": {"name": "employee"}}
+    after = {"stock": 7, "role": {"name": "admin"}}
+    changes = snapshot.changed_paths(before, after)
+    assert history.revert_changes(after, changes) == before
+    assert after == {"stock": 7, "role": {"name": "admin"}}
+
+
+@pytest.mark.asyncio
+async def test_get_audit_log_rebuilds_compact_states(monkeypatch):
+    created_at = datetime(2026, 5, 1, 12, 2)
+    log = SimpleNamespace(
+        id=uuid.UUID(int=2), created_at=created_at, user_id=None, store_id=None, action="UPDATE_STORE_PRODUCT_LINK",
+        entity_type="StoreProduct", entity_id="sp-1", before=None, after=None,
+        changes={"stock": {"before": 8, "after": 5}}, request_metadata=None, raw=None,
+    )
+    checkpoint = SimpleNamespace(id=uuid.UUID(int=9), created_at=datetime(2026, 5, 1, 12, 0), after={"stock": 10, "selling_price": 5.0})
+    rows = [
+        SimpleNamespace(id=uuid.UUID(int=1), changes={"stock": {"before": 10, "after": 8}}),
+        SimpleNamespace(id=log.id, changes=log.changes),
+        SimpleNamespace(id=uuid.UUID(int=3), changes={"stock": {"before": 5, "after": 0}}),
+    ]
+
+    async def by_id(db, log_id):
+        return log
+
+    async def snapshot_at(db, entity_type, entity_id, at):
+        return checkpoint
+
+    async def changes_since(db, entity_type, entity_id, after, at):
+        return rows
+
+    monkeypatch.setattr(crud, "get_audit_log_by_id", by_id)
+    monkeypatch.setattr(crud, "get_entity_snapshot_at", snapshot_at)
+    monkeypatch.setattr(crud, "get_entity_changes_since", changes_since)
+    result = await services.get_audit_log(None, log.id)
+    assert result.before == {"stock": 8, "selling_price": 5.0}
+    assert result.after == {"stock": 5, "selling_price": 5.0}
+
+
+@pytest.mark.asyncio
+async def test_get_audit_log_without_a_checkpoint_keeps_the_changes(monkeypatch):
+    log = SimpleNamespace(
+        id=uuid.UUID(int=2), created_at=datetime(2026, 5, 1, 12, 2), user_id=None, store_id=None,
+        action="UPDATE_STORE_PRODUCT_LINK", entity_type="StoreProduct", entity_id="sp-1", before=None, after=None,
+        changes={"stock": {"before": 8, "after": 5}}, request_metadata=None, raw=None,
+    )
+
+    async def by_id(db, log_id):
+        return log
+
+    async def snapshot_at(db, entity_type, entity_id, at):
+        return None
+
+    async def changes_since(db, entity_type, entity_id, after, at):
+        raise AssertionError("nothing to replay without a checkpoint")
+
+    monkeypatch.setattr(crud, "get_audit_log_by_id", by_id)
+    monkeypatch.setattr(crud, "get_entity_snapshot_at", snapshot_at)
+    monkeypatch.setattr(crud, "get_entity_changes_since", changes_since)
+    result = await services.get_audit_log(None, log.id)
+    assert result.before is None and result.after is None
+    assert result.changes == {"stock": {"before": 8, "after": 5}}
+
+
+class _Savepoint:
+    def __init__(self, session):
+        self.session = session
+
+    async def __aenter__(self):
+        self.session.savepoints += 1
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.session.rolled_back_to_savepoint = True
+        return False
+
+
+class _CompressionSession:
+    def __init__(self):
+        self.savepoints = 0
+        self.rolled_back_to_savepoint = False
+
+    def begin_nested(self):
+        return _Savepoint(self)
+
+
+@pytest.mark.asyncio
+async def test_compression_is_skipped_once_on_servers_without_it(monkeypatch):
+    checks = []
+
+    async def supports(db, method):
+        checks.append(method)
+        return False
+
+    async def must_not_run(*args):
+        raise AssertionError("compression set on an unsupported server")
+
+    monkeypatch.setattr(services, "_compression_supported", None)
+    monkeypatch.setattr(services.settings, "AUDIT_TOAST_COMPRESSION", "lz4")
+    monkeypatch.setattr(crud, "server_supports_compression", supports)
+    monkeypatch.setattr(crud, "count_columns_without_compression", must_not_run)
+    monkeypatch.setattr(crud, "set_json_compression", must_not_run)
+    await services._ensure_json_compression(_CompressionSession())
+    await services._ensure_json_compression(_CompressionSession())
+    assert checks == ["lz4"]
+
+
+@pytest.mark.asyncio
+async def test_compression_failure_only_rolls_back_its_savepoint(monkeypatch):
+    async def supports(db, method):
+        return True
+
+    async def missing(db, method):
+        return 5
+
+    async def fails(db, method):
+        raise RuntimeError("compression method lz4 not supported")
+
+    monkeypatch.setattr(services, "_compression_supported", None)
+    monkeypatch.setattr(services.settings, "AUDIT_TOAST_COMPRESSION", "lz4")
+    monkeypatch.setattr(crud, "server_supports_compression", supports)
+    monkeypatch.setattr(crud, "count_columns_without_compression", missing)
+    monkeypatch.setattr(crud, "set_json_compression", fails)
+    session = _CompressionSession()
+    await services._ensure_json_compression(session)
+    assert session.savepoints == 1 and session.rolled_back_to_savepoint
+
+
+@pytest.mark.asyncio
+async def test_compression_support_needs_postgres_14_and_the_method():
+    class Result:
+        def __init__(self, value):
+            self.value = value
+
+        def scalar_one(self):
+            return self.value
+
+        def scalar_one_or_none(self):
+            return self.value
+
+    class Server:
+        def __init__(self, version, accepts):
+            self.answers = [version, accepts]
+            self.statements = []
+
+        async def execute(self, statement, params=None):
+            self.statements.append(str(statement))
+            return Result(self.answers[len(self.statements) - 1])
+
+    old = Server("130011", True)
+    assert await crud.server_supports_compression(old, "lz4") is False
+    assert old.statements == ["SHOW server_version_num"]
+    assert await crud.server_supports_compression(Server("160002", None), "lz4") is False
+    assert await crud.server_supports_compression(Server("160002", True), "lz4") is True
@@ -0,0 +1,106 @@
+# /app/audit_log_service/tests/test_export.py
+import csv
+import gzip
+import io
+import json
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+# Every mapped model, so the ORM can configure AuditLog's neighbours
+from app.user_service import models as user_models  # noqa: F401
+from app.store_service import models as store_models  # noqa: F401
+from app.category_service import models as category_models  # noqa: F401
+from app.product_service import models as product_models  # noqa: F401
+from app.transaction_service import models as transaction_models  # noqa: F401
+from app.store_product_service import models as store_product_models  # noqa: F401
+from app.audit_log_service import crud, export, schemas, services
+from core.exceptions import BadRequestException
+
+CREATED_AT = datetime(2026, 3, 14, 9, 26, 53, 589793, tzinfo=timezone.utc)
+LOG_ID = uuid.UUID("12345678-1234-5678-1234-567812345678")
+ROW = (
+    LOG_ID, CREATED_AT, None, None, "product.updated", "product", "p-1",
+    {"price": 1}, {"price": 2}, {"price": {"old": 1, "new": 2}}, {"ip": "10.0.0.1"},
+)
+
+
+class CapturingSession:
+    """Records the statement instead of running it."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        raise LookupError("stop")
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def test_cursor_round_trip():
+    cursor = export.encode_cursor(CREATED_AT, LOG_ID)
+    assert "=" not in cursor
+    assert export.decode_cursor(cursor) == (CREATED_AT, LOG_ID)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "bm9waXBl", export.encode_cursor(CREATED_AT, LOG_ID)[:-4]])
+def test_malformed_cursor_decodes_to_none(cursor):
+    assert export.decode_cursor(cursor) is None
+
+
+def test_ndjson_has_one_object_per_row():
+    lines = export.encode_ndjson([ROW, ROW]).decode().splitlines()
+    assert len(lines) == 2
+    record = json.loads(lines[0])
+    assert record["id"] == str(LOG_ID)
+    assert record["created_at"] == CREATED_AT.isoformat()
+    assert record["changes"] == {"price": {"old": 1, "new": 2}}
+    assert record["user_id"] is None
+
+
+def test_csv_writes_header_once_and_json_columns_as_text():
+    text = export.encode_rows([ROW], "csv", first=True) + export.encode_rows([ROW], "csv", first=False)
+    rows = list(csv.reader(io.StringIO(text.decode())))
+    assert rows[0] == list(export.EXPORT_COLUMNS)
+    assert len(rows) == 3
+    assert json.loads(rows[1][export.EXPORT_COLUMNS.index("after")]) == {"price": 2}
+    assert rows[1][export.EXPORT_COLUMNS.index("user_id")] == ""
+
+
+@pytest.mark.asyncio
+async def test_gzip_stream_is_one_valid_member():
+    compressed = b"".join([chunk async for chunk in export.gzip_stream(_chunks(b"a" * 10000, b"", b"b\n"))])
+    assert gzip.decompress(compressed) == b"a" * 10000 + b"b\n"
+
+
+@pytest.mark.asyncio
+async def test_cursor_page_uses_keyset_instead_of_offset():
+    session = CapturingSession()
+    with pytest.raises(LookupError):
+        await crud.get_audit_logs(session, schemas.AuditLogFilterParams(offset=500), after=(CREATED_AT, LOG_ID))
+    sql = session.statements[0]
+    assert "(audit_logs.created_at, audit_logs.id) < (" in sql
+    assert "ORDER BY audit_logs.created_at DESC, audit_logs.id DESC" in sql
+    assert "OFFSET" not in sql
+
+
+@pytest.mark.asyncio
+async def test_cursor_requires_created_at_sort():
+    cursor = export.encode_cursor(CREATED_AT, LOG_ID)
+    with pytest.raises(BadRequestException):
+        await services.search_audit_logs(CapturingSession(), schemas.AuditLogFilterParams(cursor=cursor, sort="action"))
+    with pytest.raises(BadRequestException):
+        await services.search_audit_logs(CapturingSession(), schemas.AuditLogFilterParams(cursor="garbage"))
+
+
+def test_export_statement_walks_oldest_first():
+    statement = crud.audit_log_export_statement(schemas.AuditLogExportParams(action="product.updated"))
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "search_vector" not in sql
+    assert "ORDER BY audit_logs.created_at, audit_logs.id" in sql
@@ -0,0 +1,117 @@
+# /app/audit_log_service/tests/test_history.py
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+# Every mapped model, so the ORM can configure AuditLog's neighbours
+from app.user_service import models as user_models  # noqa: F401
+from app.store_service import models as store_models  # noqa: F401
+from app.category_service import models as category_models  # noqa: F401
+from app.product_service import models as product_models  # noqa: F401
+from app.transaction_service import models as transaction_models  # noqa: F401
+from app.store_product_service import models as store_product_models  # noqa: F401
+from app.audit_log_service import crud, history, services
+from app.audit_log_service.models import AuditLog
+from core.exceptions import NotFoundException
+
+
+class CapturingSession:
+    """Records the statement instead of running it."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        raise LookupError("stop")
+
+
+def _log(minute: int, changes=None, after=None):
+    return SimpleNamespace(
+        id=uuid.UUID(int=minute), created_at=datetime(2026, 5, 1, 12, minute), action="UPDATE_STORE_PRODUCT_LINK",
+        user_id=None, changes=changes, after=after,
+    )
+
+
+def test_field_changes_flattens_change_sets_and_redactions():
+    entries = history.field_changes({"stock": {"before": 5, "after": 3}, "email": "<REDACTED:email>"})
+    assert entries == [
+        {"field": "email", "before": "<REDACTED:email>", "after": "<REDACTED:email>"},
+        {"field": "stock", "before": 5, "after": 3},
+    ]
+
+
+def test_reconstruct_folds_changes_onto_a_copy():
+    snapshot = {"stock": 10, "role": {"name": "employee"}}
+    state = history.reconstruct(snapshot, [
+        {"stock": {"before": 10, "after": 8}},
+        None,
+        {"role.name": {"before": "employee", "after": "admin"}, "store.id": {"before": None, "after": "s-1"}},
+    ])
+    assert state == {"stock": 8, "role": {"name": "admin"}, "store": {"id": "s-1"}}
+    assert snapshot == {"stock": 10, "role": {"name": "employee"}}
+
+
+def test_changes_has_a_gin_index():
+    index = next(index for index in AuditLog.__table__.indexes if index.name == "ix_audit_logs_changes")
+    ddl = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+    assert "USING gin (changes)" in ddl
+
+
+@pytest.mark.asyncio
+async def test_changed_field_query_uses_key_existence():
+    session = CapturingSession()
+    with pytest.raises(LookupError):
+        await crud.get_entities_changing_field(session, "selling_price", "StoreProduct", datetime(2026, 1, 1))
+    sql = session.statements[0]
+    assert "audit_logs.changes ? %(changes_1)s" in sql
+    assert "GROUP BY audit_logs.entity_type, audit_logs.entity_id" in sql
+
+
+@pytest.mark.asyncio
+async def test_history_reads_changes_but_not_full_states():
+    session = CapturingSession()
+    with pytest.raises(LookupError):
+        await crud.get_entity_changes(session, "Product", "p-1", field="name")
+    sql = session.statements[0]
+    assert "audit_logs.before" not in sql and "audit_logs.after" not in sql
+    assert "audit_logs.entity_type = %(entity_type_1)s AND audit_logs.entity_id = %(entity_id_1)s" in sql
+
+
+@pytest.mark.asyncio
+async def test_state_at_starts_from_the_nearest_snapshot(monkeypatch):
+    snapshot_log = _log(0, after={"stock": 10, "selling_price": 5.0})
+    requested = {}
+
+    async def snapshot_at(db, entity_type, entity_id, at):
+        return snapshot_log
+
+    async def changes_since(db, entity_type, entity_id, after, at):
+        requested["after"] = after
+        return [_log(1, changes={"stock": {"before": 10, "after": 7}}), _log(2, changes={"selling_price": {"before": 5.0, "after": 6.0}})]
+
+    monkeypatch.setattr(crud, "get_entity_snapshot_at", snapshot_at)
+    monkeypatch.setattr(crud, "get_entity_changes_since", changes_since)
+    result = await services.get_entity_state_at(None, "StoreProduct", "sp-1", datetime(2026, 5, 1, 13))
+    assert result.state == {"stock": 7, "selling_price": 6.0}
+    assert result.snapshot_log_id == snapshot_log.id
+    assert result.applied_changes == 2
+    assert requested["after"] == (snapshot_log.created_at, snapshot_log.id)
+
+
+@pytest.mark.asyncio
+async def test_state_at_without_any_log_is_not_found(monkeypatch):
+    async def no_snapshot(db, entity_type, entity_id, at):
+        return None
+
+    async def no_changes(db, entity_type, entity_id, **filters):
+        return []
+
+    monkeypatch.setattr(crud, "get_entity_snapshot_at", no_snapshot)
+    monkeypatch.setattr(crud, "get_entity_changes", no_changes)
+    with pytest.raises(NotFoundException):
+        await services.get_entity_state_at(None, "Product", "missing", datetime(2026, 5, 1))
@@ -0,0 +1,51 @@
+# /app/audit_log_service/tests/test_partitions.py
+from datetime import date, datetime
+
+from app.audit_log_service.partitions import (
+    DEFAULT_PARTITION, add_months, month_start, months_between, partition_month, partition_name, partitions_before
+)
+
+
+def test_month_arithmetic_crosses_year_boundaries():
+    assert month_start(date(2026, 10, 19)) == date(2026, 10, 1)
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert months_between(date(2026, 11, 30), date(2027, 2, 1)) == [
+        date(2026, 11, 1), date(2026, 12, 1), date(2027, 1, 1), date(2027, 2, 1)
+    ]
+
+
+def test_partition_names_round_trip():
+    assert partition_name(date(2026, 3, 1)) == "audit_logs_p2026_03"
+    assert partition_month("audit_logs_p2026_03") == date(2026, 3, 1)
+    assert partition_month(DEFAULT_PARTITION) is None
+    assert partition_month("audit_logs_p2026_03_old") is None
+
+
+def test_only_partitions_entirely_before_the_cutoff_expire():
+    names = [partition_name(date(2025, month, 1)) for month in (9, 10, 11)] + [DEFAULT_PARTITION]
+
+    expired = partitions_before(reversed(names), datetime(2025, 11, 1))
+    assert expired == [("audit_logs_p2025_09", date(2025, 9, 1)), ("audit_logs_p2025_10", date(2025, 10, 1))]
+
+    # October still holds rows newer than a mid-October cutoff
+    assert [name for name, _ in partitions_before(names, datetime(2025, 10, 15))] == ["audit_logs_p2025_09"]
+
+
+def test_migration_copy_leaves_out_generated_columns():
+    from scripts import audit_partitions
+
+    sql = str(audit_partitions.copy_statement())
+    insert_columns, select_columns = sql.split(" SELECT ")[0], sql.split(" SELECT ")[1].split(" FROM ")[0]
+    assert "search_vector" not in sql
+    for column in ('"id"', '"created_at"', '"changes"', '"raw"'):
+        assert column in insert_columns and column in select_columns
+    assert "WHERE created_at >= :start AND created_at < :end" in sql
+    assert "WHERE created_at >= :start ON" in str(audit_partitions.copy_statement(bounded=False))
+
+
+def test_migration_copy_can_be_rerun_after_an_interruption():
+    from scripts import audit_partitions
+
+    for bounded in (True, False):
+        assert str(audit_partitions.copy_statement(bounded)).endswith("ON CONFLICT (id, created_at) DO NOTHING")
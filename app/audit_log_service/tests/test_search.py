@@ -0,0 +1,62 @@
+# /app/audit_log_service/tests/test_search.py
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+# Every mapped model, so the ORM can configure AuditLog's neighbours
+from app.user_service import models as user_models  # noqa: F401
+from app.store_service import models as store_models  # noqa: F401
+from app.category_service import models as category_models  # noqa: F401
+from app.product_service import models as product_models  # noqa: F401
+from app.transaction_service import models as transaction_models  # noqa: F401
+from app.store_product_service import models as store_product_models  # noqa: F401
+from app.audit_log_service import crud, schemas
+from app.audit_log_service.models import AuditLog
+
+
+class CapturingSession:
+    """Records the statement instead of running it."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        raise LookupError("stop")
+
+
+async def _compiled_search(**filters) -> str:
+    session = CapturingSession()
+    try:
+        await crud.get_audit_logs(session, schemas.AuditLogFilterParams(**filters))
+    except LookupError:
+        pass
+    return session.statements[0]
+
+
+def test_search_vector_is_generated_and_gin_indexed():
+    ddl = str(CreateTable(AuditLog.__table__).compile(dialect=postgresql.dialect()))
+    assert "search_vector TSVECTOR GENERATED ALWAYS AS" in ddl
+    assert "jsonb_to_tsvector('simple'::regconfig, coalesce(changes" in ddl
+
+    [index] = [index for index in AuditLog.__table__.indexes if index.name == "ix_audit_logs_search_vector"]
+    assert "USING gin (search_vector)" in str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_queries_without_q_do_not_touch_the_search_vector():
+    sql = await _compiled_search(entity_type="Product")
+    assert "search_vector" not in sql
+    assert "ORDER BY audit_logs.created_at DESC" in sql
+
+
+@pytest.mark.asyncio
+async def test_q_filters_on_the_index_and_highlights_only_the_page():
+    sql = await _compiled_search(q='price "SKU-1"', sort="relevance", limit=20)
+
+    assert "audit_logs.search_vector @@ websearch_to_tsquery(CAST(" in sql
+    # Headlines are computed in the outer query, after the page was picked
+    inner, outer = sql.split("JOIN (", 1)[1], sql.split("JOIN (", 1)[0]
+    assert "ts_headline" in outer and "ts_headline" not in inner
+    assert "LIMIT" in inner
+    assert "ORDER BY anon_1.rank DESC" in sql
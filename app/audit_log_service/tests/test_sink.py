@@ -0,0 +1,132 @@
+# /app/audit_log_service/tests/test_sink.py
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.audit_log_service.sink import AuditLogSink
+from core.database import run_after_commit
+
+pytestmark = pytest.mark.asyncio
+
+
+class RecordingWriter:
+    def __init__(self, failures: int = 0):
+        self.batches = []
+        self.failures = failures
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, rows):
+        await self.release.wait()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database unavailable")
+        self.batches.append([row["n"] for row in rows])
+
+
+async def test_writes_full_batches_at_once_and_the_rest_on_close():
+    writer = RecordingWriter()
+    sink = AuditLogSink(writer, batch_size=3, flush_interval=60, max_pending=100)
+    sink.start()
+    for n in range(7):
+        sink.submit({"n": n})
+    await asyncio.sleep(0.01)
+    assert writer.batches == [[0, 1, 2], [3, 4, 5]]
+
+    await sink.close()
+    assert writer.batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+async def test_partial_batches_are_written_after_the_flush_interval():
+    writer = RecordingWriter()
+    sink = AuditLogSink(writer, batch_size=100, flush_interval=0.05, max_pending=100)
+    sink.start()
+    sink.submit({"n": 1})
+    sink.submit({"n": 2})
+    await asyncio.sleep(0.01)
+    assert writer.batches == []
+
+    await asyncio.sleep(0.1)
+    assert writer.batches == [[1, 2]]
+    await sink.close()
+
+
+async def test_callers_wait_while_the_buffer_is_full():
+    writer = RecordingWriter()
+    writer.release.clear()
+    sink = AuditLogSink(writer, batch_size=2, flush_interval=60, max_pending=2)
+    sink.start()
+    for n in range(4):
+        sink.submit({"n": n})
+    await asyncio.sleep(0.01)
+
+    # One batch is stuck in the writer and two rows are waiting behind it
+    assert sink.pending == 2
+    assert await sink.wait_for_room(timeout=0.02) is False
+
+    waiter = asyncio.create_task(sink.wait_for_room(timeout=1))
+    writer.release.set()
+    assert await waiter is True
+    await sink.close()
+    assert writer.batches == [[0, 1], [2, 3]]
+
+
+async def test_failed_batches_are_retried_in_order():
+    writer = RecordingWriter(failures=1)
+    sink = AuditLogSink(writer, batch_size=2, flush_interval=0.01, max_pending=100)
+    sink.start()
+    for n in range(3):
+        sink.submit({"n": n})
+    await asyncio.sleep(0.05)
+    await sink.close()
+
+    assert writer.batches == [[0, 1], [2]]
+
+
+async def test_failed_batches_are_dropped_once_closing():
+    writer = RecordingWriter(failures=5)
+    sink = AuditLogSink(writer, batch_size=10, flush_interval=60, max_pending=100)
+    sink.start()
+    sink.submit({"n": 0})
+    await sink.close()
+
+    assert writer.batches == []
+    assert sink.pending == 0
+
+
+async def test_a_row_the_database_rejects_is_dropped_without_blocking_the_rest():
+    batches = []
+
+    async def rejects_row_3(rows):
+        if any(row["n"] == 3 for row in rows):
+            raise ValueError("invalid input syntax for type json")
+        batches.append([row["n"] for row in rows])
+
+    sink = AuditLogSink(rejects_row_3, batch_size=4, flush_interval=60, max_pending=100)
+    sink.start()
+    for n in range(10):
+        sink.submit({"n": n})
+    await asyncio.sleep(0.05)
+
+    # Everything but row 3 is written, in order, and nothing is left waiting behind it
+    assert [n for batch in batches for n in batch] == [0, 1, 2, 4, 5, 6, 7]
+    assert sink.pending == 2
+    await sink.close()
+    assert [n for batch in batches for n in batch] == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+
+
+async def test_plain_after_commit_callbacks_run_only_on_commit():
+    calls = []
+    with Session(create_engine("sqlite://")) as session:
+        session.execute(text("SELECT 1"))
+        run_after_commit(session, calls.append, "committed")
+        session.commit()
+        session.execute(text("SELECT 1"))
+        run_after_commit(session, calls.append, "rolled back")
+        session.rollback()
+        session.execute(text("SELECT 1"))
+        session.commit()
+
+    assert calls == ["committed"]
@@ -0,0 +1,89 @@
+# /app/audit_log_service/tests/test_snapshot.py
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from app.audit_log_service import snapshot
+from app.category_service.schemas import Category
+from app.user_service.schemas import User
+
+
+class Credentials(BaseModel):
+    token: str
+    label: str
+
+
+class Account(BaseModel):
+    id: uuid.UUID
+    email: str
+    credentials: Optional[Credentials] = None
+    keys: List[Credentials] = []
+    extra: Dict[str, Any] = {}
+    updated_at: datetime
+
+
+def _account(**overrides) -> Account:
+    fields = dict(
+        id=uuid.UUID(int=1),
+        email="a@example.com",
+        credentials=Credentials(token="secret", label="main"),
+        keys=[Credentials(token="k1", label="one")],
+        extra={"nested": {"password": "hunter2", "note": "ok"}},
+        updated_at=datetime(2026, 1, 2, 3, 4, 5),
+    )
+    fields.update(overrides)
+    return Account(**fields)
+
+
+def test_snapshot_matches_json_round_trip():
+    account = _account()
+    assert snapshot.snapshot(account) == json.loads(account.model_dump_json())
+
+
+def test_plan_only_visits_pii_nested_and_free_form_fields():
+    steps = {name: action for name, action, _ in snapshot.redaction_plan(Account).steps}
+    assert set(steps) == {"email", "credentials", "keys", "extra"}
+
+
+def test_plan_redacts_like_a_full_walk():
+    dump = snapshot.snapshot(_account())
+    expected = snapshot.mask_value(dump)
+    assert snapshot.redaction_plan(Account).apply(dump) == expected
+    assert expected["email"] == "<REDACTED:email>"
+    assert expected["credentials"] == {"token": "<REDACTED:token>", "label": "main"}
+    assert expected["keys"][0]["token"] == "<REDACTED:token>"
+    assert expected["extra"]["nested"]["password"] == "<REDACTED:password>"
+
+
+def test_recursive_schema_shares_its_plan():
+    plan = snapshot.redaction_plan(Category)
+    assert ("children", snapshot._MODELS, plan) in plan.steps
+
+
+def test_changed_paths_records_only_differences_with_dotted_paths():
+    before = {"name": "a", "role": {"name": "admin", "description": None}, "tags": [1], "same": 1}
+    after = {"name": "b", "role": {"name": "employee", "description": None}, "tags": [1, 2], "same": 1, "new": True}
+    assert snapshot.changed_paths(before, after) == {
+        "name": {"before": "a", "after": "b"},
+        "role.name": {"before": "admin", "after": "employee"},
+        "tags": {"before": [1], "after": [1, 2]},
+        "new": {"before": None, "after": True},
+    }
+
+
+def test_audit_states_masks_changed_pii_but_keeps_the_change():
+    before, after = _account(), _account(email="b@example.com", credentials=Credentials(token="new", label="main"))
+    before_state, after_state, changes = snapshot.audit_states(before, after)
+    assert before_state["email"] == after_state["email"] == "<REDACTED:email>"
+    assert changes == {"email": "<REDACTED:email>", "credentials.token": "<REDACTED:token>"}
+
+
+def test_audit_states_accepts_plain_dicts_and_no_change():
+    user = User(id=uuid.UUID(int=2), user_id="U1", email="u@example.com")
+    before_state, after_state, changes = snapshot.audit_states({"email": "x", "n": 1}, user.model_dump(mode="json"))
+    assert before_state == {"email": "<REDACTED:email>", "n": 1}
+    assert changes["n"] == {"before": 1, "after": None}
+    assert snapshot.audit_states(user, user)[2] is None
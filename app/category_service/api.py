@@ -8,7 +8,7 @@ from core.router import StandardAPIRouter
 from core.database import get_db_session
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.user_service.dependencies import get_current_active_user, require_role
-from app.user_service.models import User
+from app.user_service.principal import Principal
 from . import schemas, services
 
 router = StandardAPIRouter(tags=["Product Categories (Admin)"])
@@ -24,7 +24,7 @@ async def create_category(
     category_in: schemas.CategoryCreate,
     request: Request,
     db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Creates a new GLOBAL category for organizing products.
@@ -70,7 +70,7 @@ async def update_category(
     category_in: schemas.CategoryUpdate,
     request: Request,
     db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Updates the details of a universal product category. This is an admin-only endpoint.
@@ -87,7 +87,7 @@ async def deactivate_category(
     category_id: uuid.UUID,
     request: Request,
     db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Deletes a universal product category. This is an admin-only endpoint.
@@ -1,12 +1,14 @@
 # /app/dashboard_service/api.py
 import uuid
 from datetime import date
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, Query
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from core.database import get_db_session
 from app.user_service.dependencies import require_role
+from core.config import settings
+from core.exceptions import BadRequestException
 from . import schemas, services
 
 router = APIRouter()
@@ -86,3 +88,79 @@ async def get_low_stock_products(
 ):
     """Identifies products that are at or below their reorder point."""
     return await services.get_low_stock_products(db, store_id, page, size)
+
+
+@router.get(
+    "/reorder-recommendations",
+    response_model=schemas.ReorderPlan,
+    summary="Get Suggested Purchase Quantities",
+    dependencies=[Depends(require_role(["admin", "super_admin"]))]
+)
+async def get_reorder_recommendations(
+    store_id: Optional[uuid.UUID] = Query(None, description="Store to plan for. Omit to plan for the whole chain."),
+    lead_time_days: int = Query(settings.REORDER_LEAD_TIME_DAYS, ge=0, le=180, description="Supplier lead time in days"),
+    service_level: float = Query(settings.REORDER_SERVICE_LEVEL, gt=0.5, lt=1.0, description="Target probability of not stocking out during the lead time"),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """
+    Suggests how much of each active product to buy, using current stock,
+    reorder point, max quantity, last purchase price and recent demand.
+    Returns safety stock and EOQ per product and groups the purchase list by category.
+    """
+    return await services.get_reorder_recommendations(db, store_id, lead_time_days, service_level)
+
+
+@router.get(
+    "/stockout-risk",
+    response_model=schemas.StockoutRiskReport,
+    summary="Simulate Stock-out Probability per Product",
+    dependencies=[Depends(require_role(["admin", "super_admin"]))]
+)
+async def get_stockout_risk(
+    store_id: uuid.UUID,
+    horizon_days: int = Query(settings.REORDER_LEAD_TIME_DAYS, ge=1, le=90, description="Days until the next delivery"),
+    simulations: int = Query(settings.SIMULATION_PATHS, ge=100, le=20000, description="Simulated demand paths per product"),
+    seed: Optional[int] = Query(None, description="Random seed, for reproducible results"),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """
+    Runs a Monte Carlo simulation of daily demand, drawn from each product's
+    recent sales history, against current stock. Returns every active
+    product's probability of stocking out within the horizon and its
+    expected days to stock-out, riskiest first.
+    """
+    return await services.get_stockout_risk(db, store_id, horizon_days, simulations, seed)
+
+
+@router.get(
+    "/reorder-backtest",
+    response_model=schemas.BacktestReport,
+    summary="Backtest Reorder Policies Against Past Demand",
+    dependencies=[Depends(require_role(["admin", "super_admin"]))]
+)
+async def backtest_reorder_policies(
+    store_id: uuid.UUID,
+    days: int = Query(365, ge=7, le=730, description="Days of history to replay, ending yesterday"),
+    lead_time_days: int = Query(settings.REORDER_LEAD_TIME_DAYS, ge=1, le=180, description="Days from placing an order to selling from it"),
+    review_period_days: int = Query(1, ge=1, le=90, description="Days between stock reviews; 1 is a continuous (s, S) policy, more is a periodic min/max review"),
+    reorder_point_multipliers: List[float] = Query([1.0], description="Factors applied to each product's current reorder_point"),
+    max_quantity_multipliers: List[float] = Query([1.0], description="Factors applied to each product's current max_quantity"),
+    include_products: bool = Query(False, description="Include per-product results for every variant"),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """
+    Replays historical daily demand for every active product in the store
+    against each combination of the given reorder point and max quantity
+    multipliers (1.0 is the current setting). Reports fill rate, stock-out
+    days and average inventory value per variant, so bulk changes can be
+    evaluated before they are made. Unmet demand is treated as lost.
+    """
+    combos = len(reorder_point_multipliers) * len(max_quantity_multipliers)
+    if combos > 50:
+        raise BadRequestException(detail="At most 50 policy variants can be backtested at once.")
+    if any(m < 0 for m in [*reorder_point_multipliers, *max_quantity_multipliers]):
+        raise BadRequestException(detail="Multipliers cannot be negative.")
+    return await services.backtest_reorder_policies(
+        db, store_id, days, lead_time_days, review_period_days,
+        reorder_point_multipliers, max_quantity_multipliers, include_products
+    )
@@ -0,0 +1,94 @@
+# /app/dashboard_service/backtest.py
+from typing import Dict
+
+import numpy as np
+
+
+def backtest_order_up_to(
+    demand: np.ndarray,
+    reorder_point: np.ndarray,
+    max_quantity: np.ndarray,
+    unit_cost: np.ndarray,
+    lead_time_days: int,
+    review_period_days: int = 1,
+) -> Dict[str, np.ndarray]:
+    """
+    Replays historical daily demand against (s, S) reorder policies for many
+    SKUs and policy variants at once.
+
+    `demand` is SKUs x days of units demanded. `reorder_point` (s) and
+    `max_quantity` (S) are variants x SKUs. `unit_cost` is per SKU. Each
+    simulated day:
+
+    1. Orders due that day arrive.
+    2. Demand is served from stock on hand. Unmet demand is lost, not
+       backordered.
+    3. Every `review_period_days` days, SKUs whose inventory position (on
+       hand plus on order) is at or below s order up to S. Daily review is
+       the classic (s, S) policy. Longer periods give a periodic min/max
+       review.
+    4. An order placed on day t can be sold from day t + `lead_time_days`.
+
+    Every SKU starts the period with S on hand and nothing on order. The
+    day loop is the only Python loop; each step updates a variants x SKUs
+    array, so a store-year sweep costs 365 sets of vector operations.
+
+    Returns variants x SKUs arrays: units demanded and sold, fill rate,
+    stock-out days (days ending with nothing on hand), average units and
+    value on hand at the end of each day, and orders placed.
+    """
+    demand = np.asarray(demand, dtype=np.float64)
+    reorder_point = np.asarray(reorder_point, dtype=np.float64)
+    max_quantity = np.maximum(np.asarray(max_quantity, dtype=np.float64), reorder_point)
+    unit_cost = np.nan_to_num(np.asarray(unit_cost, dtype=np.float64), nan=0.0)
+    if lead_time_days < 1:
+        raise ValueError("lead_time_days must be at least 1")
+    if review_period_days < 1:
+        raise ValueError("review_period_days must be at least 1")
+
+    n_days = demand.shape[1]
+    shape = reorder_point.shape
+    on_hand = max_quantity.copy()
+    on_order = np.zeros(shape)
+    # Ring buffer of arrivals; slot (t % size) holds what arrives on day t
+    pipeline = np.zeros((lead_time_days + 1, *shape))
+
+    sold_total = np.zeros(shape)
+    stockout_days = np.zeros(shape, dtype=np.int64)
+    on_hand_total = np.zeros(shape)
+    orders = np.zeros(shape, dtype=np.int64)
+    sold = np.empty(shape)
+
+    for day in range(n_days):
+        slot = day % (lead_time_days + 1)
+        arriving = pipeline[slot]
+        on_hand += arriving
+        on_order -= arriving
+        arriving[:] = 0.0
+
+        np.minimum(on_hand, demand[:, day], out=sold)
+        on_hand -= sold
+        sold_total += sold
+        stockout_days += on_hand <= 0
+        on_hand_total += on_hand
+
+        if day % review_period_days == 0:
+            position = on_hand + on_order
+            quantity = np.where(position <= reorder_point, max_quantity - position, 0.0)
+            pipeline[(day + lead_time_days) % (lead_time_days + 1)] += quantity
+            on_order += quantity
+            orders += quantity > 0
+
+    demanded = np.broadcast_to(demand.sum(axis=1), shape)
+    fill_rate = np.divide(sold_total, demanded, out=np.ones(shape), where=demanded > 0)
+    average_units = on_hand_total / max(n_days, 1)
+
+    return {
+        "units_demanded": demanded.copy(),
+        "units_sold": sold_total,
+        "fill_rate": fill_rate,
+        "stockout_days": stockout_days,
+        "average_inventory_units": average_units,
+        "average_inventory_value": average_units * unit_cost,
+        "orders_placed": orders,
+    }
@@ -1,13 +1,15 @@
 # /app/dashboard_service/crud.py
 import uuid
-from datetime import date
-from typing import List, Dict, Any
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, func, and_
 
 from app.transaction_service.models import InventoryTransaction, TransactionType
 from app.store_product_service.models import StoreProduct
 from app.product_service.models import Product
+from app.category_service.models import Category
+from app.ml_service.models import StockForecast
 
 async def get_kpi_summary(db: AsyncSession, store_id: uuid.UUID) -> Dict[str, Any]:
     """Performs database aggregations to calculate Key Performance Indicators."""
@@ -122,3 +124,137 @@ async def get_low_stock_products(db: AsyncSession, store_id: uuid.UUID, page: in
     
     result = await db.execute(query)
     return [row._asdict() for row in result.all()]
+
+
+async def get_reorder_inputs(
+    db: AsyncSession, store_id: Optional[uuid.UUID], lookback_days: int, lead_time_days: int
+) -> List[Any]:
+    """
+    Retrieves every active store-product link with its product, category,
+    the sum and sum of squares of its daily unit sales over the lookback
+    window, and the stock depletion its precomputed forecast predicts over
+    the next `lead_time_days` days (units and number of day-to-day steps;
+    NULL without forecast rows). Omitting `store_id` covers the whole chain.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=lookback_days)
+    today = date.today()
+    day = func.date(InventoryTransaction.timestamp).label("day")
+    daily_filters = [
+        InventoryTransaction.transaction_type == TransactionType.SALE,
+        InventoryTransaction.timestamp >= since,
+    ]
+    if store_id:
+        daily_filters.append(InventoryTransaction.store_id == store_id)
+
+    daily = select(
+        InventoryTransaction.store_id,
+        InventoryTransaction.product_id,
+        day,
+        func.sum(func.abs(InventoryTransaction.quantity)).label("units")
+    ).where(*daily_filters).group_by(
+        InventoryTransaction.store_id, InventoryTransaction.product_id, day
+    ).subquery()
+
+    demand = select(
+        daily.c.store_id,
+        daily.c.product_id,
+        func.sum(daily.c.units).label("units"),
+        func.sum(daily.c.units * daily.c.units).label("units_sq")
+    ).group_by(daily.c.store_id, daily.c.product_id).subquery()
+
+    # Day-to-day change of the forecast stock level; only drops count as demand
+    forecast_filters = [
+        StockForecast.forecast_date >= today,
+        StockForecast.forecast_date <= today + timedelta(days=lead_time_days),
+    ]
+    if store_id:
+        forecast_filters.append(StockForecast.store_id == store_id)
+    previous_stock = func.lag(StockForecast.predicted_stock).over(
+        partition_by=(StockForecast.store_id, StockForecast.product_id), order_by=StockForecast.forecast_date
+    )
+    steps = select(
+        StockForecast.store_id,
+        StockForecast.product_id,
+        (previous_stock - StockForecast.predicted_stock).label("step")
+    ).where(*forecast_filters).subquery()
+
+    forecast = select(
+        steps.c.store_id,
+        steps.c.product_id,
+        func.sum(func.greatest(steps.c.step, 0)).label("forecast_units"),
+        func.count(steps.c.step).label("forecast_days")
+    ).group_by(steps.c.store_id, steps.c.product_id).subquery()
+
+    query = select(
+        StoreProduct.store_id,
+        StoreProduct.product_id,
+        Product.name.label("product_name"),
+        Product.sku,
+        Category.id.label("category_id"),
+        Category.name.label("category_name"),
+        StoreProduct.stock,
+        StoreProduct.reorder_point,
+        StoreProduct.max_quantity,
+        StoreProduct.last_purchase_price,
+        demand.c.units,
+        demand.c.units_sq,
+        forecast.c.forecast_units,
+        forecast.c.forecast_days
+    ).join(
+        Product, Product.id == StoreProduct.product_id
+    ).join(
+        Category, Category.id == Product.category_id
+    ).outerjoin(
+        demand, and_(
+            demand.c.store_id == StoreProduct.store_id,
+            demand.c.product_id == StoreProduct.product_id
+        )
+    ).outerjoin(
+        forecast, and_(
+            forecast.c.store_id == StoreProduct.store_id,
+            forecast.c.product_id == StoreProduct.product_id
+        )
+    ).where(StoreProduct.is_active == True)
+
+    if store_id:
+        query = query.where(StoreProduct.store_id == store_id)
+
+    result = await db.execute(query)
+    return result.all()
+
+
+async def get_active_store_products(db: AsyncSession, store_id: uuid.UUID) -> List[Any]:
+    """Every active product in a store with its name, SKU, stock, replenishment settings and unit cost."""
+    query = select(
+        StoreProduct.product_id,
+        Product.name.label("product_name"),
+        Product.sku,
+        StoreProduct.stock,
+        StoreProduct.reorder_point,
+        StoreProduct.max_quantity,
+        StoreProduct.last_purchase_price
+    ).join(
+        Product, Product.id == StoreProduct.product_id
+    ).where(
+        StoreProduct.store_id == store_id,
+        StoreProduct.is_active == True
+    ).order_by(Product.name)
+
+    result = await db.execute(query)
+    return result.all()
+
+async def get_daily_units_sold(db: AsyncSession, store_id: uuid.UUID, since: date) -> List[Any]:
+    """(product_id, day, units) of every product's unit sales per day since `since`."""
+    day = func.date(InventoryTransaction.timestamp).label("day")
+    query = select(
+        InventoryTransaction.product_id,
+        day,
+        func.sum(func.abs(InventoryTransaction.quantity)).label("units")
+    ).where(
+        InventoryTransaction.store_id == store_id,
+        InventoryTransaction.transaction_type == TransactionType.SALE,
+        InventoryTransaction.timestamp >= since
+    ).group_by(InventoryTransaction.product_id, day)
+
+    result = await db.execute(query)
+    return result.all()
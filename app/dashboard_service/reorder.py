@@ -0,0 +1,101 @@
+# /app/dashboard_service/reorder.py
+from statistics import NormalDist
+from typing import Dict
+
+import numpy as np
+
+DAYS_PER_YEAR = 365
+
+
+def compute_reorder_plan(
+    stock: np.ndarray,
+    reorder_point: np.ndarray,
+    max_quantity: np.ndarray,
+    unit_cost: np.ndarray,
+    demand_mean: np.ndarray,
+    demand_std: np.ndarray,
+    lead_time_days: float,
+    service_level: float,
+    ordering_cost: float,
+    holding_cost_rate: float,
+) -> Dict[str, np.ndarray]:
+    """
+    Computes reorder quantities for many SKUs at once.
+
+    All inputs are 1-D arrays aligned by SKU (daily demand mean/std in units,
+    unit cost in currency). Every step is a NumPy array operation, so the cost
+    per SKU is a handful of vector instructions rather than Python calls.
+
+    - Safety stock covers demand variability over the lead time at the
+      requested service level: z * sigma_daily * sqrt(lead time).
+    - The effective reorder point is the larger of the configured
+      `reorder_point` and lead-time demand plus safety stock.
+    - EOQ is the classic sqrt(2 * annual demand * ordering cost / holding
+      cost per unit per year). SKUs without demand history or cost data fall
+      back to a plain min/max top-up.
+    - Suggested quantities are only produced for SKUs at or below their
+      effective reorder point. They are at least enough to get back above it
+      after lead-time demand and never push stock past `max_quantity` (or the
+      reorder point, if that is higher).
+    """
+    stock = np.asarray(stock, dtype=np.float64)
+    reorder_point = np.asarray(reorder_point, dtype=np.float64)
+    max_quantity = np.asarray(max_quantity, dtype=np.float64)
+    unit_cost = np.nan_to_num(np.asarray(unit_cost, dtype=np.float64), nan=0.0)
+    demand_mean = np.nan_to_num(np.asarray(demand_mean, dtype=np.float64), nan=0.0)
+    demand_std = np.nan_to_num(np.asarray(demand_std, dtype=np.float64), nan=0.0)
+
+    z = NormalDist().inv_cdf(service_level)
+    lead_time_demand = demand_mean * lead_time_days
+    safety_stock = np.ceil(z * demand_std * np.sqrt(lead_time_days))
+    effective_reorder_point = np.maximum(reorder_point, np.ceil(lead_time_demand + safety_stock))
+
+    annual_demand = demand_mean * DAYS_PER_YEAR
+    holding_cost = unit_cost * holding_cost_rate
+    has_eoq = (annual_demand > 0) & (holding_cost > 0)
+    ratio = np.divide(2 * annual_demand * ordering_cost, holding_cost, out=np.zeros_like(annual_demand), where=has_eoq)
+    eoq = np.ceil(np.sqrt(ratio))
+
+    target_level = np.maximum(max_quantity, effective_reorder_point)
+    headroom = np.maximum(target_level - stock, 0)
+    minimum = np.minimum(np.maximum(effective_reorder_point - stock, 0) + np.ceil(lead_time_demand), headroom)
+
+    needs_order = stock <= effective_reorder_point
+    quantity = np.where(has_eoq, np.clip(eoq, minimum, headroom), headroom)
+    suggested = np.where(needs_order, quantity, 0).astype(np.int64)
+
+    return {
+        "safety_stock": safety_stock.astype(np.int64),
+        "effective_reorder_point": effective_reorder_point.astype(np.int64),
+        "eoq": eoq.astype(np.int64),
+        "suggested_order_quantity": suggested,
+        "order_value": suggested * unit_cost,
+    }
+
+
+def forecast_demand(history_mean: np.ndarray, forecast_units: np.ndarray, forecast_days: np.ndarray) -> np.ndarray:
+    """
+    Daily demand to plan with: the stock depletion per day the stock
+    forecast predicts (`forecast_units` over `forecast_days` day-to-day
+    steps) where it predicts any, else the historical mean. A flat or
+    rising stock forecast says nothing about demand (it may just expect a
+    delivery), so it never overrides the sales history.
+    """
+    history_mean = np.asarray(history_mean, dtype=np.float64)
+    forecast_units = np.nan_to_num(np.asarray(forecast_units, dtype=np.float64), nan=0.0)
+    forecast_days = np.nan_to_num(np.asarray(forecast_days, dtype=np.float64), nan=0.0)
+    has_forecast = (forecast_days > 0) & (forecast_units > 0)
+    per_day = np.divide(forecast_units, forecast_days, out=np.zeros_like(forecast_units), where=has_forecast)
+    return np.where(has_forecast, per_day, history_mean)
+
+
+def demand_moments(units: np.ndarray, units_sq: np.ndarray, days: int) -> Dict[str, np.ndarray]:
+    """
+    Daily demand mean and standard deviation from per-SKU sums of daily units
+    and squared daily units over `days` days (days without sales count as 0).
+    """
+    units = np.nan_to_num(np.asarray(units, dtype=np.float64), nan=0.0)
+    units_sq = np.nan_to_num(np.asarray(units_sq, dtype=np.float64), nan=0.0)
+    mean = units / days
+    variance = np.maximum(units_sq / days - mean * mean, 0.0)
+    return {"mean": mean, "std": np.sqrt(variance)}
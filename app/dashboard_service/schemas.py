@@ -1,7 +1,7 @@
 # /app/dashboard_service/schemas.py
 from pydantic import BaseModel, Field
 from uuid import UUID
-from datetime import date
+from datetime import date, datetime
 from typing import List, Optional
 
 # --- Schemas for Core Metrics ---
@@ -47,3 +47,101 @@ class LowStockProduct(BaseModel):
     sku: str
     current_stock: int
     reorder_point: int
+
+
+# --- Schemas for Reorder Recommendations ---
+
+class ReorderLine(BaseModel):
+    """A single product to purchase, with the inputs behind the suggestion."""
+    store_id: UUID
+    product_id: UUID
+    product_name: str
+    sku: str
+    current_stock: int
+    reorder_point: int
+    max_quantity: int
+    unit_cost: Optional[float] = Field(None, description="Last purchase price, used as the unit cost.")
+    forecast_daily_demand: float = Field(..., description="Daily depletion predicted by the stock forecast over the lead time, or the trailing mean of daily sales without one.")
+    safety_stock: int
+    effective_reorder_point: int = Field(..., description="The larger of reorder_point and lead-time demand plus safety stock.")
+    eoq: int = Field(..., description="Economic order quantity; 0 when there is no demand or cost data.")
+    suggested_order_quantity: int
+    order_value: float
+
+class ReorderCategory(BaseModel):
+    """Reorder lines for one product category."""
+    category_id: UUID
+    category_name: str
+    total_order_value: float
+    items: List[ReorderLine]
+
+class ReorderPlan(BaseModel):
+    """A purchase list grouped by category."""
+    store_id: Optional[UUID] = Field(None, description="The store the plan is for; empty for the whole chain.")
+    generated_at: datetime
+    lead_time_days: int
+    service_level: float
+    skus_evaluated: int
+    skus_to_order: int
+    total_order_value: float
+    categories: List[ReorderCategory]
+
+
+# --- Schemas for Stock-out Risk ---
+
+class StockoutRisk(BaseModel):
+    """Simulated stock-out risk of one product over the horizon."""
+    product_id: UUID
+    product_name: str
+    sku: str
+    current_stock: int
+    mean_daily_demand: float
+    stockout_probability: float = Field(..., ge=0, le=1)
+    expected_days_to_stockout: Optional[float] = Field(None, description="Mean stock-out day over the simulated paths that stock out; empty if none do.")
+
+class StockoutRiskReport(BaseModel):
+    """Stock-out risk for every active product in a store, riskiest first."""
+    store_id: UUID
+    generated_at: datetime
+    horizon_days: int
+    simulations: int
+    lookback_days: int
+    products: List[StockoutRisk]
+
+
+# --- Schemas for Reorder Policy Backtests ---
+
+class BacktestProductResult(BaseModel):
+    """How one product would have fared under a policy variant."""
+    product_id: UUID
+    product_name: str
+    sku: str
+    reorder_point: int
+    max_quantity: int
+    fill_rate: float
+    stockout_days: int
+    average_inventory_value: float
+    orders_placed: int
+
+class BacktestVariant(BaseModel):
+    """Store-wide results of one policy variant; multipliers scale each product's current settings."""
+    reorder_point_multiplier: float
+    max_quantity_multiplier: float
+    fill_rate: float = Field(..., description="Units sold over units demanded, across all products.")
+    units_lost: float
+    stockout_days: int = Field(..., description="Product-days that ended with nothing on hand.")
+    average_stockout_days_per_product: float
+    average_inventory_value: float = Field(..., description="Average end-of-day value on hand, at last purchase price.")
+    orders_placed: int
+    products: Optional[List[BacktestProductResult]] = None
+
+class BacktestReport(BaseModel):
+    """Results of replaying past demand against reorder policy variants."""
+    store_id: UUID
+    generated_at: datetime
+    start_date: date
+    end_date: date
+    lead_time_days: int
+    review_period_days: int
+    products_evaluated: int
+    variants: List[BacktestVariant]
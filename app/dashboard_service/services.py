@@ -1,10 +1,17 @@
 # /app/dashboard_service/services.py
 import uuid
-from datetime import date
-from typing import List
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
+from core.config import settings
 from . import crud, schemas
+from .reorder import compute_reorder_plan, demand_moments, forecast_demand
+from .backtest import backtest_order_up_to
+from .simulation import build_demand_matrix, simulate_stockouts
 
 async def get_kpi_summary(db: AsyncSession, store_id: uuid.UUID) -> schemas.KPISummary:
     """Service to orchestrate fetching and calculating KPI summary data."""
@@ -57,3 +64,240 @@ async def get_low_stock_products(db: AsyncSession, store_id: uuid.UUID, page: in
     """Service to get a paginated list of low-stock products."""
     products_data = await crud.get_low_stock_products(db, store_id, page, size)
     return [schemas.LowStockProduct(**data) for data in products_data]
+
+
+async def get_reorder_recommendations(
+    db: AsyncSession,
+    store_id: Optional[uuid.UUID],
+    lead_time_days: int,
+    service_level: float
+) -> schemas.ReorderPlan:
+    """
+    Service to build a purchase list for a store (or the whole chain).
+    Inputs are fetched in one query and turned into column arrays; the
+    quantities for every SKU are then computed in a single vectorized pass.
+
+    Daily demand is the depletion the nightly stock forecast predicts over
+    the lead time, falling back to the trailing mean of daily sales for
+    SKUs whose forecast is missing or shows no depletion. Its spread (for safety stock) always comes
+    from the sales history, since the forecast is a point estimate.
+    """
+    lookback_days = settings.REORDER_DEMAND_LOOKBACK_DAYS
+    rows = await crud.get_reorder_inputs(db, store_id, lookback_days, lead_time_days)
+    generated_at = datetime.now(timezone.utc)
+
+    if not rows:
+        return schemas.ReorderPlan(
+            store_id=store_id, generated_at=generated_at, lead_time_days=lead_time_days,
+            service_level=service_level, skus_evaluated=0, skus_to_order=0,
+            total_order_value=0.0, categories=[]
+        )
+
+    (store_ids, product_ids, product_names, skus, category_ids, category_names,
+     stock, reorder_point, max_quantity, unit_cost, units, units_sq,
+     forecast_units, forecast_days) = (np.asarray(column) for column in zip(*rows))
+
+    unit_cost = np.where(unit_cost == None, np.nan, unit_cost).astype(np.float64)
+    demand = demand_moments(
+        np.where(units == None, 0.0, units).astype(np.float64),
+        np.where(units_sq == None, 0.0, units_sq).astype(np.float64),
+        lookback_days
+    )
+    demand["mean"] = forecast_demand(
+        demand["mean"],
+        np.where(forecast_units == None, np.nan, forecast_units).astype(np.float64),
+        np.where(forecast_days == None, 0, forecast_days).astype(np.float64)
+    )
+    plan = compute_reorder_plan(
+        stock=stock,
+        reorder_point=reorder_point,
+        max_quantity=max_quantity,
+        unit_cost=unit_cost,
+        demand_mean=demand["mean"],
+        demand_std=demand["std"],
+        lead_time_days=lead_time_days,
+        service_level=service_level,
+        ordering_cost=settings.REORDER_ORDERING_COST,
+        holding_cost_rate=settings.REORDER_HOLDING_COST_RATE
+    )
+
+    # Keep SKUs that need ordering, sorted by category and then by order value (largest first)
+    selected = np.flatnonzero(plan["suggested_order_quantity"] > 0)
+    order = selected[np.lexsort((-plan["order_value"][selected], category_names[selected].astype(str)))]
+    boundaries = np.flatnonzero(category_ids[order][1:] != category_ids[order][:-1]) + 1
+
+    # Materialise only the selected rows as Python values for the response
+    columns = {
+        "store_id": store_ids[order],
+        "product_id": product_ids[order],
+        "product_name": product_names[order],
+        "sku": skus[order],
+        "current_stock": stock[order].tolist(),
+        "reorder_point": reorder_point[order].tolist(),
+        "max_quantity": max_quantity[order].tolist(),
+        "unit_cost": np.where(np.isnan(unit_cost[order]), None, unit_cost[order]).tolist(),
+        "forecast_daily_demand": demand["mean"][order].tolist(),
+        **{key: plan[key][order].tolist() for key in (
+            "safety_stock", "effective_reorder_point", "eoq", "suggested_order_quantity", "order_value"
+        )},
+    }
+    items = [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    categories = []
+    start = 0
+    for end in [*boundaries.tolist(), order.size] if order.size else []:
+        first = order[start]
+        categories.append(schemas.ReorderCategory(
+            category_id=category_ids[first],
+            category_name=category_names[first],
+            total_order_value=float(plan["order_value"][order[start:end]].sum()),
+            items=items[start:end]
+        ))
+        start = end
+
+    return schemas.ReorderPlan(
+        store_id=store_id,
+        generated_at=generated_at,
+        lead_time_days=lead_time_days,
+        service_level=service_level,
+        skus_evaluated=len(rows),
+        skus_to_order=int(selected.size),
+        total_order_value=float(plan["order_value"][selected].sum()),
+        categories=categories
+    )
+
+
+async def get_stockout_risk(
+    db: AsyncSession,
+    store_id: uuid.UUID,
+    horizon_days: int,
+    simulations: int,
+    seed: Optional[int] = None
+) -> schemas.StockoutRiskReport:
+    """
+    Service to estimate, for every active product in a store, the probability
+    of stocking out within `horizon_days` and when. Daily demand is
+    bootstrapped from each product's recent sales; the simulation runs in a
+    worker thread so the event loop stays responsive.
+    """
+    lookback_days = settings.SIMULATION_DEMAND_LOOKBACK_DAYS
+    since = date.today() - timedelta(days=lookback_days)
+    products = await crud.get_active_store_products(db, store_id)
+    sales = await crud.get_daily_units_sold(db, store_id, since)
+
+    product_ids = [row.product_id for row in products]
+    stock = np.asarray([row.stock for row in products], dtype=np.float32)
+    history = build_demand_matrix(product_ids, sales, since, lookback_days)
+    result = await run_in_threadpool(simulate_stockouts, stock, history, horizon_days, simulations, seed)
+
+    probability = result["stockout_probability"]
+    expected_days = result["expected_days_to_stockout"]
+    mean_demand = history.mean(axis=1, dtype=np.float64) if product_ids else np.zeros(0)
+    # Riskiest first; among equally risky products, the soonest to run out
+    order = np.lexsort((np.nan_to_num(expected_days, nan=np.inf), -probability))
+
+    return schemas.StockoutRiskReport(
+        store_id=store_id,
+        generated_at=datetime.now(timezone.utc),
+        horizon_days=horizon_days,
+        simulations=simulations,
+        lookback_days=lookback_days,
+        products=[
+            {
+                "product_id": products[i].product_id,
+                "product_name": products[i].product_name,
+                "sku": products[i].sku,
+                "current_stock": products[i].stock,
+                "mean_daily_demand": float(mean_demand[i]),
+                "stockout_probability": float(probability[i]),
+                "expected_days_to_stockout": None if np.isnan(expected_days[i]) else float(expected_days[i]),
+            }
+            for i in order.tolist()
+        ]
+    )
+
+
+async def backtest_reorder_policies(
+    db: AsyncSession,
+    store_id: uuid.UUID,
+    days: int,
+    lead_time_days: int,
+    review_period_days: int,
+    reorder_point_multipliers: List[float],
+    max_quantity_multipliers: List[float],
+    include_products: bool
+) -> schemas.BacktestReport:
+    """
+    Service to replay the last `days` days of a store's demand against every
+    combination of reorder point and max quantity multipliers, applied to
+    each product's current settings. All products and variants are
+    simulated together in one vectorized pass, in a worker thread.
+    """
+    end_date = date.today() - timedelta(days=1)
+    start_date = end_date - timedelta(days=days - 1)
+    products = await crud.get_active_store_products(db, store_id)
+    sales = await crud.get_daily_units_sold(db, store_id, start_date)
+
+    product_ids = [row.product_id for row in products]
+    demand = build_demand_matrix(product_ids, sales, start_date, days)
+    reorder_point = np.asarray([row.reorder_point for row in products], dtype=np.float64)
+    max_quantity = np.asarray([row.max_quantity for row in products], dtype=np.float64)
+    unit_cost = np.asarray(
+        [np.nan if row.last_purchase_price is None else row.last_purchase_price for row in products], dtype=np.float64
+    )
+
+    # Variants x products policy parameters, one row per multiplier combination
+    combos = [(rp, mq) for rp in reorder_point_multipliers for mq in max_quantity_multipliers]
+    variant_reorder_point = np.round(np.outer([rp for rp, _ in combos], reorder_point))
+    variant_max_quantity = np.round(np.outer([mq for _, mq in combos], max_quantity))
+
+    result = await run_in_threadpool(
+        backtest_order_up_to, demand, variant_reorder_point, variant_max_quantity, unit_cost,
+        lead_time_days, review_period_days
+    )
+
+    n_products = len(products)
+    variants = []
+    for v, (rp_multiplier, mq_multiplier) in enumerate(combos):
+        demanded = float(result["units_demanded"][v].sum())
+        sold = float(result["units_sold"][v].sum())
+        stockout_days = int(result["stockout_days"][v].sum())
+        variant = schemas.BacktestVariant(
+            reorder_point_multiplier=rp_multiplier,
+            max_quantity_multiplier=mq_multiplier,
+            fill_rate=sold / demanded if demanded else 1.0,
+            units_lost=demanded - sold,
+            stockout_days=stockout_days,
+            average_stockout_days_per_product=stockout_days / n_products if n_products else 0.0,
+            average_inventory_value=float(result["average_inventory_value"][v].sum()),
+            orders_placed=int(result["orders_placed"][v].sum())
+        )
+        if include_products:
+            variant.products = [
+                schemas.BacktestProductResult(
+                    product_id=row.product_id, product_name=row.product_name, sku=row.sku,
+                    reorder_point=rp, max_quantity=mq, fill_rate=fill_rate, stockout_days=out_days,
+                    average_inventory_value=value, orders_placed=orders
+                )
+                for row, rp, mq, fill_rate, out_days, value, orders in zip(
+                    products,
+                    variant_reorder_point[v].astype(np.int64).tolist(),
+                    np.maximum(variant_max_quantity[v], variant_reorder_point[v]).astype(np.int64).tolist(),
+                    result["fill_rate"][v].tolist(),
+                    result["stockout_days"][v].tolist(),
+                    result["average_inventory_value"][v].tolist(),
+                    result["orders_placed"][v].tolist()
+                )
+            ]
+        variants.append(variant)
+
+    return schemas.BacktestReport(
+        store_id=store_id,
+        generated_at=datetime.now(timezone.utc),
+        start_date=start_date,
+        end_date=end_date,
+        lead_time_days=lead_time_days,
+        review_period_days=review_period_days,
+        products_evaluated=n_products,
+        variants=variants
+    )
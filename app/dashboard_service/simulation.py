@@ -0,0 +1,100 @@
+# /app/dashboard_service/simulation.py
+import uuid
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Upper bound on simulated (product, path) cells held in memory at once.
+_CHUNK_CELLS = 2_000_000
+
+
+def build_demand_matrix(
+    product_ids: List[uuid.UUID],
+    rows: Iterable[Tuple[uuid.UUID, date, float]],
+    since: date,
+    days: int,
+) -> np.ndarray:
+    """
+    Lays out (product_id, day, units) rows as a products x days matrix of
+    daily unit sales, aligned with `product_ids`. Days without sales are 0;
+    rows for unknown products or outside the window are ignored.
+    """
+    index = {product_id: i for i, product_id in enumerate(product_ids)}
+    matrix = np.zeros((len(product_ids), days), dtype=np.float32)
+    product_idx, day_idx, units = [], [], []
+    for product_id, day, quantity in rows:
+        i = index.get(product_id)
+        offset = (day - since).days
+        if i is None or not 0 <= offset < days:
+            continue
+        product_idx.append(i)
+        day_idx.append(offset)
+        units.append(float(quantity or 0.0))
+    if product_idx:
+        np.add.at(matrix, (np.asarray(product_idx), np.asarray(day_idx)), np.asarray(units, dtype=np.float32))
+    return matrix
+
+
+def simulate_stockouts(
+    stock: np.ndarray,
+    demand_history: np.ndarray,
+    horizon_days: int,
+    n_simulations: int,
+    seed: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Monte Carlo stock-out simulation for many SKUs at once.
+
+    Each simulated demand path draws every future day's demand from the
+    SKU's own history (a bootstrap of `demand_history`, one row per SKU).
+    Paths are consumed day by day against the current `stock`. A SKU stocks
+    out on the first day cumulative demand reaches its stock. SKUs with no
+    stock are already out, on day 0.
+
+    All SKUs and paths advance together as (SKUs x paths) arrays, in chunks
+    of SKUs sized to bound memory. Returns per SKU:
+    - `stockout_probability`: share of paths that stock out within the horizon.
+    - `expected_days_to_stockout`: mean stock-out day over those paths (NaN
+      when no path stocks out).
+    """
+    stock = np.asarray(stock, dtype=np.float32)
+    demand_history = np.asarray(demand_history, dtype=np.float32)
+    n_skus, history_days = demand_history.shape
+    rng = np.random.default_rng(seed)
+
+    probability = np.zeros(n_skus, dtype=np.float64)
+    expected_days = np.full(n_skus, np.nan, dtype=np.float64)
+    if n_skus == 0 or history_days == 0:
+        return {"stockout_probability": probability, "expected_days_to_stockout": expected_days}
+
+    # SKUs already out of stock are out on day 0. SKUs that could not run out
+    # even at their worst historical day, every day, need no simulation.
+    empty = stock <= 0
+    probability[empty] = 1.0
+    expected_days[empty] = 0.0
+    at_risk = np.flatnonzero(~empty & (demand_history.max(axis=1) * horizon_days >= stock))
+
+    chunk = max(1, _CHUNK_CELLS // n_simulations)
+    for start in range(0, at_risk.size, chunk):
+        skus = at_risk[start:start + chunk]
+        # Flattened history so one draw is a single `take` at row offset + day
+        history = demand_history[skus].ravel()
+        offsets = (np.arange(skus.size, dtype=np.int32) * history_days)[:, None]
+        level = np.repeat(stock[skus, None], n_simulations, axis=1)
+        # Day each path stocks out on; 0 means it has not (yet)
+        stockout_day = np.zeros(level.shape, dtype=np.int16)
+
+        for day in range(1, horizon_days + 1):
+            draws = rng.integers(0, history_days, size=level.shape, dtype=np.int32)
+            draws += offsets
+            level -= np.take(history, draws)
+            stockout_day[(level <= 0) & (stockout_day == 0)] = day
+
+        hits = np.count_nonzero(stockout_day, axis=1)
+        probability[skus] = hits / n_simulations
+        expected_days[skus] = np.divide(
+            stockout_day.sum(axis=1, dtype=np.int64), hits, out=np.full(skus.size, np.nan), where=hits > 0
+        )
+
+    return {"stockout_probability": probability, "expected_days_to_stockout": expected_days}
@@ -0,0 +1,60 @@
+# /app/dashboard_service/tests/test_backtest.py
+import numpy as np
+import pytest
+
+from app.dashboard_service.backtest import backtest_order_up_to
+
+
+def _run(demand, reorder_point, max_quantity, **kwargs):
+    return backtest_order_up_to(
+        np.atleast_2d(np.asarray(demand, dtype=float)),
+        np.atleast_2d(np.asarray(reorder_point, dtype=float)),
+        np.atleast_2d(np.asarray(max_quantity, dtype=float)),
+        np.array([2.0]),
+        **kwargs,
+    )
+
+
+def test_replenishment_arrives_after_lead_time():
+    # 6 a day against S=10, s=5, lead time 2:
+    # day 0 sells 6, ends at 4 -> orders 6 for day 2
+    # day 1 sells 4, ends at 0; 6 on order keeps the position above s
+    # day 2 receives 6, sells 6, ends at 0 -> orders 10 for day 4
+    # day 3 sells nothing
+    # day 4 receives 10, sells 6, ends at 4 -> orders 6 for day 6
+    # day 5 sells 4, ends at 0
+    result = _run([[6] * 6], [5], [10], lead_time_days=2)
+    assert result["units_demanded"][0, 0] == 36
+    assert result["units_sold"][0, 0] == 26
+    assert result["fill_rate"][0, 0] == pytest.approx(26 / 36)
+    assert result["stockout_days"][0, 0] == 4
+    assert result["orders_placed"][0, 0] == 3
+
+
+def test_generous_policy_never_stocks_out():
+    result = _run([[5] * 30], [20], [40], lead_time_days=2)
+    assert result["fill_rate"][0, 0] == 1.0
+    assert result["stockout_days"][0, 0] == 0
+    assert result["average_inventory_value"][0, 0] == pytest.approx(result["average_inventory_units"][0, 0] * 2.0)
+
+
+def test_variants_are_evaluated_side_by_side():
+    demand = [[6] * 30]
+    result = _run(demand, [[5], [20]], [[10], [40]], lead_time_days=2)
+    assert result["fill_rate"].shape == (2, 1)
+    assert result["fill_rate"][0, 0] < result["fill_rate"][1, 0] == 1.0
+    assert result["average_inventory_units"][0, 0] < result["average_inventory_units"][1, 0]
+
+
+def test_periodic_review_orders_less_often():
+    demand = [[3] * 28]
+    daily = _run(demand, [10], [30], lead_time_days=1)
+    weekly = _run(demand, [10], [30], lead_time_days=1, review_period_days=7)
+    assert weekly["orders_placed"][0, 0] <= 4
+    assert weekly["orders_placed"][0, 0] < daily["orders_placed"][0, 0]
+
+
+def test_products_without_demand_have_full_fill_rate():
+    result = _run([[0] * 10], [5], [10], lead_time_days=3)
+    assert result["fill_rate"][0, 0] == 1.0
+    assert result["orders_placed"][0, 0] == 0
@@ -0,0 +1,114 @@
+# /app/dashboard_service/tests/test_reorder.py
+import math
+import uuid
+
+import numpy as np
+import pytest
+
+from app.dashboard_service import crud, services
+from app.dashboard_service.reorder import compute_reorder_plan, demand_moments, forecast_demand
+from core.config import settings
+
+
+def _plan(**overrides):
+    inputs = dict(
+        stock=np.array([5, 80, 0, 3]),
+        reorder_point=np.array([10, 10, 10, 10]),
+        max_quantity=np.array([100, 100, 100, 100]),
+        unit_cost=np.array([20.0, 20.0, np.nan, 20.0]),
+        demand_mean=np.array([4.0, 4.0, 0.0, 0.0]),
+        demand_std=np.array([2.0, 2.0, 0.0, 0.0]),
+        lead_time_days=4,
+        service_level=0.95,
+        ordering_cost=500.0,
+        holding_cost_rate=0.25,
+    )
+    inputs.update(overrides)
+    return compute_reorder_plan(**inputs)
+
+
+def test_safety_stock_and_effective_reorder_point():
+    plan = _plan()
+    # z(0.95) * 2 * sqrt(4) = 6.58 -> 7; lead-time demand 16 + 7 = 23 > configured 10
+    assert plan["safety_stock"][0] == 7
+    assert plan["effective_reorder_point"][0] == 23
+    # Without demand the configured reorder point wins
+    assert plan["effective_reorder_point"][2] == 10
+
+
+def test_eoq_is_capped_by_max_quantity():
+    plan = _plan()
+    expected_eoq = math.ceil(math.sqrt(2 * 4 * 365 * 500 / (20 * 0.25)))
+    assert plan["eoq"][0] == expected_eoq
+    # EOQ (541) exceeds the headroom to max_quantity, so the order tops up to 100
+    assert plan["suggested_order_quantity"][0] == 95
+    assert plan["order_value"][0] == pytest.approx(95 * 20.0)
+
+
+def test_stock_above_reorder_point_is_not_ordered():
+    plan = _plan()
+    assert plan["suggested_order_quantity"][1] == 0
+    assert plan["order_value"][1] == 0
+
+
+def test_without_demand_or_cost_falls_back_to_min_max():
+    plan = _plan()
+    assert plan["eoq"][2] == 0
+    assert plan["suggested_order_quantity"][2] == 100
+    assert plan["suggested_order_quantity"][3] == 97
+
+
+def test_eoq_below_headroom_is_used():
+    plan = _plan(max_quantity=np.array([1000, 1000, 1000, 1000]))
+    assert plan["suggested_order_quantity"][0] == plan["eoq"][0]
+
+
+def test_demand_moments_count_days_without_sales():
+    moments = demand_moments(np.array([14.0]), np.array([28.0]), days=14)
+    assert moments["mean"][0] == pytest.approx(1.0)
+    assert moments["std"][0] == pytest.approx(1.0)
+
+
+def test_forecast_demand_uses_depletion_and_falls_back_to_history():
+    history = np.array([4.0, 4.0, 2.0, 5.0])
+    mean = forecast_demand(history, np.array([21.0, np.nan, 0.0, 0.0]), np.array([7, 0, 7, 0]))
+    # 21 units of depletion over 7 steps; no forecast; a flat or rising forecast; no forecast rows
+    assert mean.tolist() == [3.0, 4.0, 2.0, 5.0]
+
+
+@pytest.mark.asyncio
+async def test_reorder_recommendations_plan_from_forecast_demand(monkeypatch):
+    store_id, category_id = uuid.uuid4(), uuid.uuid4()
+
+    def row(sku, history_per_day, forecast_units, forecast_days):
+        # 28 days of steady sales, stock 10, reorder point 5, room up to 100, no cost data (min/max top-up)
+        units = history_per_day * 28
+        return (
+            store_id, uuid.uuid4(), f"Product {sku}", sku, category_id, "Groceries",
+            10, 5, 100, None, units, units * history_per_day, forecast_units, forecast_days,
+        )
+
+    rows = [
+        row("FORECAST-DEPLETES", 1, 20.0, 4),  # forecast 5/day beats a history of 1/day
+        row("FORECAST-FLAT", 5, 0.0, 4),       # flat forecast: keep the history of 5/day
+        row("NO-FORECAST", 5, None, None),     # no forecast rows: history of 5/day
+        row("FORECAST-SLOW", 5, 4.0, 4),       # forecast 1/day beats a history of 5/day
+    ]
+
+    async def get_reorder_inputs(db, store_id, lookback_days, lead_time_days):
+        assert (lookback_days, lead_time_days) == (28, 4)
+        return rows
+
+    monkeypatch.setattr(settings, "REORDER_DEMAND_LOOKBACK_DAYS", 28)
+    monkeypatch.setattr(crud, "get_reorder_inputs", get_reorder_inputs)
+    plan = await services.get_reorder_recommendations(None, store_id, lead_time_days=4, service_level=0.95)
+
+    lines = {line.sku: line for category in plan.categories for line in category.items}
+    # 4 days at 5/day is 20 > stock 10: top up to 100. At 1/day the reorder point stays 5 < 10: no order.
+    assert sorted(lines) == ["FORECAST-DEPLETES", "FORECAST-FLAT", "NO-FORECAST"]
+    for line in lines.values():
+        assert line.forecast_daily_demand == 5.0
+        assert line.effective_reorder_point == 20
+        assert line.suggested_order_quantity == 90
+        assert line.current_stock == 10 and line.max_quantity == 100 and line.unit_cost is None
+    assert plan.skus_evaluated == 4 and plan.skus_to_order == 3
@@ -0,0 +1,47 @@
+# /app/dashboard_service/tests/test_simulation.py
+import uuid
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.dashboard_service.simulation import build_demand_matrix, simulate_stockouts
+
+
+def test_build_demand_matrix_aligns_products_and_days():
+    a, b, unknown = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    since = date(2024, 6, 1)
+    rows = [
+        (a, since, 3),
+        (b, since + timedelta(days=2), 5),
+        (a, since + timedelta(days=2), 1),
+        (unknown, since, 9),                   # not in the store
+        (a, since + timedelta(days=10), 7),    # outside the window
+    ]
+    matrix = build_demand_matrix([a, b], rows, since, days=3)
+    np.testing.assert_array_equal(matrix, [[3, 0, 1], [0, 0, 5]])
+
+
+def test_constant_demand_is_deterministic():
+    # 10 units a day against 25 in stock runs out on day 3 on every path
+    result = simulate_stockouts(np.array([25]), np.full((1, 28), 10.0), horizon_days=7, n_simulations=500, seed=1)
+    assert result["stockout_probability"][0] == 1.0
+    assert result["expected_days_to_stockout"][0] == pytest.approx(3.0)
+
+
+def test_empty_and_safe_skus_skip_simulation():
+    history = np.array([np.zeros(28), np.full(28, 2.0)])
+    result = simulate_stockouts(np.array([0, 100]), history, horizon_days=7, n_simulations=500, seed=1)
+    np.testing.assert_array_equal(result["stockout_probability"], [1.0, 0.0])
+    assert result["expected_days_to_stockout"][0] == 0.0
+    assert np.isnan(result["expected_days_to_stockout"][1])
+
+
+def test_probability_matches_bootstrap_distribution():
+    # Half the history days sell 10 units, half sell nothing: stocking out 10
+    # units within 2 days needs at least one selling day, p = 1 - 0.5^2
+    history = np.tile([10.0, 0.0], 14)[None, :]
+    result = simulate_stockouts(np.array([10]), history, horizon_days=2, n_simulations=20000, seed=7)
+    assert result["stockout_probability"][0] == pytest.approx(0.75, abs=0.02)
+    # Day 1 with p 0.5, day 2 with p 0.25 -> conditional mean (0.5 + 0.5) / 0.75
+    assert result["expected_days_to_stockout"][0] == pytest.approx(4 / 3, abs=0.03)
@@ -21,14 +21,25 @@ from app.transaction_service.api import router as transaction_router
 from app.dashboard_service.api import router as dashboard_router # Import dashboard router
 from app.audit_log_service.api import router as audit_router
 from app.ml_service.api import router as ml_router
+from app.ml_service import services as ml_services
+from app.audit_log_service import services as audit_services
+from app.telemetry_service.api import router as telemetry_router
+from app.telemetry_service import services as telemetry_services
+from core.middleware import AuditLogMiddleware
 # CORRECTED: The inventory_service import has been removed.
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("--- Initializing services... ---")
     setup_logging()
+    audit_services.start()
+    telemetry_services.start()
+    await ml_services.start()
     print("--- Application startup complete. ---")
     yield
+    await ml_services.shutdown()
+    await telemetry_services.shutdown()
+    await audit_services.shutdown()
     print("--- Application shutdown. ---")
 
 app = FastAPI(
@@ -68,6 +79,9 @@ async def generic_exception_handler(request: Request, exc: Exception):
         content=ErrorResponse(errors=[error_detail]).model_dump(),
     )
 
+# Counts every request; writes an audit row only for mutations, errors and sampled reads
+app.add_middleware(AuditLogMiddleware, exclude_paths=settings.TELEMETRY_EXCLUDED_PATHS)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
@@ -89,6 +103,7 @@ api_router.include_router(transaction_router, prefix="/transactions", tags=["Tra
 api_router.include_router(ml_router, prefix="/ml", tags=["Machine Learning"])
 api_router.include_router(dashboard_router, prefix="/dashboard", tags=["Dashboard & Analytics"])
 api_router.include_router(audit_router, prefix="/audit", tags=["Audit"])
+api_router.include_router(telemetry_router, prefix="/telemetry", tags=["Telemetry"])
 # CORRECTED: The inventory_router inclusion has been removed.
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
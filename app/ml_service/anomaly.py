@@ -0,0 +1,86 @@
+# /app/ml_service/anomaly.py
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.transaction_service.models import TransactionType
+from core.config import settings
+from .feature_store import DemandFeatureStore
+
+# Scales the median absolute deviation to a standard deviation for normal data.
+MAD_TO_STD = 1.4826
+
+
+@dataclass
+class AnomalyScore:
+    reason: str
+    observed: float
+    expected: float
+    score: float
+
+
+def robust_zscore(history: np.ndarray, observed: float, min_scale: float) -> Tuple[float, float]:
+    """
+    (z, median) of `observed` against `history` using the median and MAD,
+    which a handful of earlier outliers cannot drag around. The scale is
+    floored at `min_scale` so near-constant histories do not flag tiny changes.
+    """
+    median = float(np.median(history))
+    scale = max(MAD_TO_STD * float(np.median(np.abs(history - median))), min_scale)
+    return (observed - median) / scale, median
+
+
+class AnomalyDetector:
+    """
+    Flags transactions that are far outside a store-product pair's recent
+    daily demand, read from the rolling demand feature store.
+
+    - Sales: the day's total units so far (including this sale) against the
+      previous days in the window. Catches spikes and bulk fraud.
+    - Adjustments: the size of the adjustment against the same daily demand
+      history. Catches large write-offs (theft, data-entry errors).
+    - Purchases are not scored.
+
+    Scoring reads one fixed-size window, so it is constant time per
+    transaction. Pairs with fewer than `min_active_days` days of sales in the
+    window are not scored, so new products are not flagged on their first
+    sales.
+    """
+
+    def __init__(
+        self,
+        feature_store: DemandFeatureStore,
+        threshold: float = settings.ML_ANOMALY_Z_THRESHOLD,
+        min_active_days: int = settings.ML_ANOMALY_MIN_ACTIVE_DAYS,
+        min_scale: float = settings.ML_ANOMALY_MIN_SCALE,
+    ):
+        self.feature_store = feature_store
+        self.threshold = threshold
+        self.min_active_days = min_active_days
+        self.min_scale = min_scale
+
+    def score(self, transaction) -> Optional[AnomalyScore]:
+        """
+        Scores a transaction that has already been recorded in the feature
+        store. Returns the score only when it crosses the threshold.
+        """
+        if transaction.transaction_type == TransactionType.PURCHASE:
+            return None
+
+        demand = self.feature_store.daily_demand(
+            transaction.store_id, transaction.product_id, transaction.timestamp.date()
+        )
+        history = demand[:-1]
+        if np.count_nonzero(history) < self.min_active_days:
+            return None
+
+        if transaction.transaction_type == TransactionType.SALE:
+            reason, observed = "sales_spike", float(demand[-1])
+        else:
+            reason, observed = "large_adjustment", float(abs(transaction.quantity))
+
+        z, median = robust_zscore(history, observed, self.min_scale)
+        if z < self.threshold:
+            return None
+        return AnomalyScore(reason=reason, observed=observed, expected=median, score=z)
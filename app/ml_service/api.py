@@ -1,7 +1,11 @@
 # /app/ml_service/api.py
 from uuid import UUID
-from datetime import date, timedelta
-from fastapi import APIRouter, Query, HTTPException, status
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_db_session
+from app.user_service.dependencies import require_role
 from . import services, schemas
 
 router = APIRouter()
@@ -15,7 +19,8 @@ async def predict_stock_level(
     store_id: UUID,
     product_id: UUID,
     start_date: date = Query(None, description="Start date for the prediction range (YYYY-MM-DD). Defaults to tomorrow."),
-    end_date: date = Query(None, description="End date for the prediction range (YYYY-MM-DD). Defaults to 7 days from start_date.")
+    end_date: date = Query(None, description="End date for the prediction range (YYYY-MM-DD). Defaults to 7 days from start_date."),
+    db: AsyncSession = Depends(get_db_session)
 ):
     """
     Predicts the future stock level for a specific product for each day
@@ -40,4 +45,75 @@ async def predict_stock_level(
             detail="The prediction date range cannot exceed 31 days."
         )
 
-    return await services.predict_stock_for_range(store_id, product_id, start_date, end_date)
+    return await services.predict_stock_for_range(db, store_id, product_id, start_date, end_date)
+
+
+@router.get(
+    "/reconciled-forecast/{store_id}",
+    response_model=schemas.ReconciledForecastReport,
+    summary="Stock forecasts for a store, its categories and products that add up"
+)
+async def get_reconciled_forecast(
+    store_id: UUID,
+    start_date: date = Query(None, description="Start date of the forecast (YYYY-MM-DD). Defaults to tomorrow."),
+    end_date: date = Query(None, description="End date of the forecast (YYYY-MM-DD). Defaults to 7 days from start_date."),
+    method: str = Query("mint", pattern="^(mint|bottom_up)$", description="mint (weighted least squares) or bottom_up."),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """
+    Forecasts stock for the store, every category and every product in it,
+    then reconciles them so each level equals the sum of the level below.
+    Returns the base and reconciled forecast of every series.
+    """
+    if start_date is None:
+        start_date = date.today() + timedelta(days=1)
+    if end_date is None:
+        end_date = start_date + timedelta(days=6)
+
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The start_date cannot be after the end_date."
+        )
+    if (end_date - start_date).days > 30:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The forecast date range cannot exceed 31 days."
+        )
+
+    return await services.get_reconciled_forecast(db, store_id, start_date, end_date, method)
+
+
+@router.get(
+    "/monitoring",
+    response_model=schemas.ModelMonitoringReport,
+    summary="Rolling prediction error of the live model",
+    dependencies=[Depends(require_role(["admin", "super_admin"]))]
+)
+async def get_model_monitoring():
+    """
+    Reports the model's rolling MAE, bias, training rate and last training
+    time overall, per store and per category, worst scopes first.
+    """
+    return await services.get_monitoring_report()
+
+
+@router.get(
+    "/anomalies",
+    response_model=List[schemas.TransactionAnomalyRead],
+    summary="List transactions flagged as anomalous",
+    dependencies=[Depends(require_role(["admin", "super_admin"]))]
+)
+async def list_anomalies(
+    store_id: Optional[UUID] = Query(None, description="Only anomalies in this store."),
+    since: Optional[datetime] = Query(None, description="Only anomalies detected at or after this time."),
+    reason: Optional[str] = Query(None, description="sales_spike or large_adjustment."),
+    skip: int = 0,
+    limit: int = Query(100, le=1000),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """
+    Sales spikes and large adjustments flagged by the streaming anomaly
+    detector, most recently detected first.
+    """
+    return await services.get_anomalies(db, store_id, since, reason, skip, limit)
@@ -0,0 +1,198 @@
+# /app/ml_service/client.py
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from core.config import settings
+from .engine import LocalModelEngine
+from .protocol import encode_frame, read_frame
+from .schemas import PredictionRequest, TransactionEvent
+
+logger = logging.getLogger(__name__)
+
+
+class ModelServerError(Exception):
+    """The model server was unreachable, too slow, or rejected a request."""
+
+
+class ModelServerClient:
+    """
+    Talks to the shared model server from an API worker.
+
+    Calls made in the same event loop tick are merged into one message per
+    operation (up to `batch_max` items), and all messages share a single
+    pipelined connection whose replies are matched by id.
+
+    If the server cannot be reached or does not answer within `timeout`, the
+    batch is handled by a local in-process engine instead, created on first
+    use by `fallback_factory`. The server is retried after `retry_after`
+    seconds.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        fallback_factory: Callable[[], Awaitable[LocalModelEngine]],
+        batch_max: int = settings.ML_SERVER_BATCH_MAX,
+        timeout: float = settings.ML_SERVER_TIMEOUT_SECONDS,
+        retry_after: float = settings.ML_SERVER_RETRY_SECONDS,
+    ):
+        self.socket_path = socket_path
+        self.batch_max = batch_max
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._fallback_factory = fallback_factory
+
+        self._pending: Dict[str, List[Tuple[Any, Optional[asyncio.Future]]]] = {"learn": [], "predict": []}
+        self._flush_scheduled = False
+        self._tasks = set()
+
+        self._ids = itertools.count()
+        self._inflight: Dict[int, asyncio.Future] = {}
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+        self._unavailable_until = 0.0
+
+    # --- Public API ---
+
+    async def learn(self, events: List[TransactionEvent]) -> None:
+        """Queues events for training. Does not wait for the server to apply them."""
+        for event in events:
+            self._pending["learn"].append((event, None))
+        self._schedule_flush()
+
+    async def predict(self, requests: List[PredictionRequest]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        futures = []
+        for request in requests:
+            future = loop.create_future()
+            self._pending["predict"].append((request, future))
+            futures.append(future)
+        self._schedule_flush()
+        return list(await asyncio.gather(*futures))
+
+    async def model_version(self) -> str:
+        """Fingerprint of the snapshot serving predictions, on the server or the local fallback."""
+        try:
+            result = await self._call_server("ping", [])
+            return result["model_version"]
+        except ModelServerError:
+            engine = await self._fallback_factory()
+            return await engine.model_version()
+
+    async def metrics(self) -> Dict[str, Any]:
+        """Prediction error stats from the server, or the local fallback's if it is down."""
+        try:
+            return await self._call_server("metrics", [])
+        except ModelServerError:
+            engine = await self._fallback_factory()
+            return await engine.metrics()
+
+    async def close(self) -> None:
+        """Sends whatever is still queued and closes the connection."""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._disconnect()
+
+    # --- Batching ---
+
+    def _schedule_flush(self) -> None:
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        for op, pending in self._pending.items():
+            while pending:
+                batch = pending[: self.batch_max]
+                del pending[: self.batch_max]
+                task = asyncio.create_task(self._send_batch(op, batch))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _send_batch(self, op: str, batch: List[Tuple[Any, Optional[asyncio.Future]]]) -> None:
+        items = [item for item, _ in batch]
+        try:
+            try:
+                result = await self._call_server(op, [item.model_dump(mode="json") for item in items])
+            except ModelServerError as e:
+                logger.warning(f"Model server unavailable ({e}); handling {len(items)} '{op}' items locally.")
+                engine = await self._fallback_factory()
+                result = await getattr(engine, op)(items)
+        except Exception as e:
+            logger.error(f"Failed to handle '{op}' batch of {len(items)} items: {e}", exc_info=True)
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+
+        if op == "predict":
+            for (_, future), values in zip(batch, result):
+                if not future.done():
+                    future.set_result(values)
+
+    # --- Connection ---
+
+    async def _connect(self) -> None:
+        async with self._connect_lock:
+            if self._writer is not None:
+                return
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_unix_connection(self.socket_path), self.timeout
+            )
+            self._reader_task = asyncio.create_task(self._read_replies(self._reader))
+            logger.info(f"Connected to model server at {self.socket_path}")
+
+    async def _disconnect(self) -> None:
+        writer, self._reader, self._writer = self._writer, None, None
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if writer is not None:
+            writer.close()
+        for future in self._inflight.values():
+            if not future.done():
+                future.set_exception(ConnectionResetError("model server connection closed"))
+        self._inflight.clear()
+
+    async def _read_replies(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                reply = await read_frame(reader)
+                future = self._inflight.pop(reply.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if reply.get("ok"):
+                    future.set_result(reply.get("result"))
+                else:
+                    future.set_exception(ModelServerError(reply.get("error") or "request failed"))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Lost connection to model server: {e}")
+            self._reader_task = None
+            await self._disconnect()
+
+    async def _call_server(self, op: str, items: List[Dict[str, Any]]) -> Any:
+        if time.monotonic() < self._unavailable_until:
+            raise ModelServerError("waiting before retrying the server")
+
+        message_id = next(self._ids)
+        try:
+            await self._connect()
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[message_id] = future
+            self._writer.write(encode_frame({"id": message_id, "op": op, "items": items}))
+            await self._writer.drain()
+            return await asyncio.wait_for(future, self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            self._inflight.pop(message_id, None)
+            self._unavailable_until = time.monotonic() + self.retry_after
+            await self._disconnect()
+            raise ModelServerError(str(e) or type(e).__name__) from e
@@ -0,0 +1,168 @@
+# /app/ml_service/crud.py
+import uuid
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select, func
+
+from app.category_service.models import Category
+from app.product_service.models import Product
+from app.store_product_service.models import StoreProduct
+from app.transaction_service.models import InventoryTransaction, TransactionType
+from .models import StockForecast, TransactionAnomaly
+
+# Rows per INSERT; keeps each statement under asyncpg's 32767 bind parameter limit.
+_UPSERT_CHUNK_ROWS = 5000
+
+
+async def get_daily_sales_since(db: AsyncSession, since: date) -> List[Tuple[uuid.UUID, uuid.UUID, date, float]]:
+    """
+    Aggregates unit sales per store, product and day from `since` onwards
+    in a single GROUP BY query.
+    """
+    day = func.date(InventoryTransaction.timestamp).label("day")
+    statement = (
+        select(
+            InventoryTransaction.store_id,
+            InventoryTransaction.product_id,
+            day,
+            func.sum(func.abs(InventoryTransaction.quantity)).label("units"),
+        )
+        .where(
+            InventoryTransaction.transaction_type == TransactionType.SALE,
+            InventoryTransaction.timestamp >= since,
+        )
+        .group_by(InventoryTransaction.store_id, InventoryTransaction.product_id, day)
+    )
+    result = await db.execute(statement)
+    return [tuple(row) for row in result.all()]
+
+
+async def get_active_store_products(db: AsyncSession) -> List[Tuple[uuid.UUID, uuid.UUID]]:
+    """(store_id, product_id) of every active store-product link."""
+    statement = select(StoreProduct.store_id, StoreProduct.product_id).where(StoreProduct.is_active == True)
+    result = await db.execute(statement)
+    return [tuple(row) for row in result.all()]
+
+
+async def get_store_catalog(
+    db: AsyncSession, store_id: uuid.UUID
+) -> List[Tuple[uuid.UUID, Optional[uuid.UUID], int]]:
+    """(product_id, category_id, stock) of every active product in a store."""
+    statement = (
+        select(StoreProduct.product_id, Product.category_id, StoreProduct.stock)
+        .join(Product, Product.id == StoreProduct.product_id)
+        .where(StoreProduct.store_id == store_id, StoreProduct.is_active == True)
+        .order_by(StoreProduct.product_id)
+    )
+    result = await db.execute(statement)
+    return [tuple(row) for row in result.all()]
+
+
+async def get_net_stock_change_since(db: AsyncSession, store_id: uuid.UUID, since: date) -> Dict[uuid.UUID, float]:
+    """Net units moved in or out of stock per product of a store from `since` onwards."""
+    statement = (
+        select(InventoryTransaction.product_id, func.sum(InventoryTransaction.quantity))
+        .where(InventoryTransaction.store_id == store_id, InventoryTransaction.timestamp >= since)
+        .group_by(InventoryTransaction.product_id)
+    )
+    result = await db.execute(statement)
+    return {product_id: float(units or 0) for product_id, units in result.all()}
+
+
+async def get_forecasts(
+    db: AsyncSession, store_id: uuid.UUID, product_id: uuid.UUID, start_date: date, end_date: date
+) -> List[StockForecast]:
+    """Precomputed forecasts for one pair over a date range; a primary key range scan."""
+    statement = (
+        select(StockForecast)
+        .where(
+            StockForecast.store_id == store_id,
+            StockForecast.product_id == product_id,
+            StockForecast.forecast_date >= start_date,
+            StockForecast.forecast_date <= end_date,
+        )
+        .order_by(StockForecast.forecast_date)
+    )
+    result = await db.execute(statement)
+    return list(result.scalars().all())
+
+
+async def get_store_forecasts(
+    db: AsyncSession, store_id: uuid.UUID, start_date: date, end_date: date
+) -> List[Tuple[uuid.UUID, date, float]]:
+    """(product_id, forecast_date, predicted_stock) of every precomputed forecast in a store over a date range."""
+    statement = select(StockForecast.product_id, StockForecast.forecast_date, StockForecast.predicted_stock).where(
+        StockForecast.store_id == store_id,
+        StockForecast.forecast_date >= start_date,
+        StockForecast.forecast_date <= end_date,
+    )
+    result = await db.execute(statement)
+    return [tuple(row) for row in result.all()]
+
+
+async def upsert_forecasts(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """Writes forecast rows with multi-row INSERTs, replacing existing ones for the same key."""
+    for offset in range(0, len(rows), _UPSERT_CHUNK_ROWS):
+        statement = insert(StockForecast).values(rows[offset:offset + _UPSERT_CHUNK_ROWS])
+        statement = statement.on_conflict_do_update(
+            index_elements=[StockForecast.store_id, StockForecast.product_id, StockForecast.forecast_date],
+            set_={
+                "predicted_stock": statement.excluded.predicted_stock,
+                "model_version": statement.excluded.model_version,
+                "generated_at": statement.excluded.generated_at,
+            },
+        )
+        await db.execute(statement)
+
+
+async def delete_forecasts_before(db: AsyncSession, day: date) -> int:
+    """Removes forecasts for days that have already passed."""
+    result = await db.execute(delete(StockForecast).where(StockForecast.forecast_date < day))
+    return result.rowcount
+
+
+async def get_product_categories(
+    db: AsyncSession, product_ids: Optional[Iterable[uuid.UUID]] = None
+) -> Dict[uuid.UUID, uuid.UUID]:
+    """Maps product id to category id, for the given products or the whole catalog."""
+    statement = select(Product.id, Product.category_id)
+    if product_ids is not None:
+        statement = statement.where(Product.id.in_(list(product_ids)))
+    result = await db.execute(statement)
+    return {product_id: category_id for product_id, category_id in result.all()}
+
+
+async def create_anomalies(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """Writes flagged transactions in one multi-row INSERT."""
+    if rows:
+        await db.execute(insert(TransactionAnomaly).values(rows))
+
+
+async def get_anomalies(
+    db: AsyncSession,
+    store_id: Optional[uuid.UUID],
+    since: Optional[datetime],
+    reason: Optional[str],
+    skip: int,
+    limit: int,
+) -> List[TransactionAnomaly]:
+    statement = select(TransactionAnomaly)
+    if store_id:
+        statement = statement.where(TransactionAnomaly.store_id == store_id)
+    if since:
+        statement = statement.where(TransactionAnomaly.detected_at >= since)
+    if reason:
+        statement = statement.where(TransactionAnomaly.reason == reason)
+    statement = statement.order_by(TransactionAnomaly.detected_at.desc()).offset(skip).limit(limit)
+    result = await db.execute(statement)
+    return list(result.scalars().all())
+
+
+async def get_category_parents(db: AsyncSession) -> Dict[uuid.UUID, Optional[uuid.UUID]]:
+    """Maps every category id to its parent category id (None for top-level categories)."""
+    result = await db.execute(select(Category.id, Category.parent_id))
+    return {category_id: parent_id for category_id, parent_id in result.all()}
@@ -0,0 +1,190 @@
+# /app/ml_service/engine.py
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Set
+from uuid import UUID
+
+from core.database import AsyncSessionFactory
+from . import crud
+from .anomaly import AnomalyDetector
+from .feature_store import DemandFeatureStore
+from .features import get_features, get_prediction_features
+from .monitoring import SCOPE_CATEGORY, SCOPE_GLOBAL, SCOPE_STORE, ErrorMonitor
+from .pipeline import load_model
+from .registry import ModelRegistry
+from .runtime import ModelRuntime
+from .schemas import PredictionRequest, TransactionEvent
+
+logger = logging.getLogger(__name__)
+
+
+def _log_training_result(transaction_id: UUID, done) -> None:
+    error = done.exception()
+    if error is not None:
+        logger.error(f"Failed to train ML model with transaction {transaction_id}: {error}", exc_info=error)
+    else:
+        logger.debug(f"ML model successfully updated with transaction {transaction_id}")
+
+
+class LocalModelEngine:
+    """
+    Trains and serves the model inside the current process.
+
+    Holds the runtime around the hierarchical model registry, the rolling
+    demand feature store, the anomaly detector that reads it and the
+    prediction error monitor. It also keeps a product -> category map (and
+    the category tree), so samples and predictions can be routed to category
+    models and errors grouped by category without a query per transaction.
+    Used directly by an API worker in local mode, and by the model server
+    process on behalf of every worker in server mode.
+    """
+
+    def __init__(self):
+        saved = load_model()
+        registry = ModelRegistry.from_saved(saved) if saved is not None else ModelRegistry()
+        self.monitor = ErrorMonitor()
+        self.runtime = ModelRuntime(registry, monitor=self.monitor)
+        self.demand_features = DemandFeatureStore()
+        self.anomaly_detector = AnomalyDetector(self.demand_features)
+        self._flagged: List[Dict[str, Any]] = []
+        self._anomaly_writer: Optional[asyncio.Task] = None
+        self.product_categories: Dict[UUID, UUID] = {}
+        self._unknown_products: Set[UUID] = set()
+        self._category_lookup: Optional[asyncio.Task] = None
+
+    async def rebuild_feature_store(self) -> None:
+        """Reloads the rolling demand buffers from recent sales with one aggregate query."""
+        since = date.today() - timedelta(days=self.demand_features.window - 1)
+        async with AsyncSessionFactory() as session:
+            rows = await crud.get_daily_sales_since(session, since)
+        self.demand_features.rebuild(rows)
+
+    async def load_catalog(self) -> None:
+        """Loads the product -> category map and the category tree."""
+        async with AsyncSessionFactory() as session:
+            self.product_categories = await crud.get_product_categories(session)
+            category_parents = await crud.get_category_parents(session)
+        await self.runtime.set_category_parents(category_parents)
+
+    async def _resolve_unknown_categories(self) -> None:
+        """Looks up categories of products created since startup, one query per batch."""
+        while self._unknown_products:
+            product_ids, self._unknown_products = self._unknown_products, set()
+            try:
+                async with AsyncSessionFactory() as session:
+                    self.product_categories.update(await crud.get_product_categories(session, product_ids))
+            except Exception as e:
+                logger.warning(f"Could not look up categories for {len(product_ids)} products: {e}")
+        self._category_lookup = None
+
+    def _category_of(self, product_id: UUID) -> Optional[UUID]:
+        category_id = self.product_categories.get(product_id)
+        if category_id is None:
+            # Counted as uncategorised until the background lookup fills it in
+            self._unknown_products.add(product_id)
+            if self._category_lookup is None:
+                self._category_lookup = asyncio.get_running_loop().create_task(self._resolve_unknown_categories())
+        return category_id
+
+    async def _write_anomalies(self) -> None:
+        """Writes flagged transactions in the background, one INSERT per batch."""
+        while self._flagged:
+            rows, self._flagged = self._flagged, []
+            try:
+                async with AsyncSessionFactory() as session:
+                    await crud.create_anomalies(session, rows)
+                    await session.commit()
+                for row in rows:
+                    logger.warning(
+                        f"Anomalous {row['transaction_type'].value} transaction {row['transaction_id']}: "
+                        f"{row['reason']} (observed {row['observed']:g}, expected {row['expected']:g}, z={row['score']:.1f})"
+                    )
+            except Exception as e:
+                logger.error(f"Could not save {len(rows)} flagged transactions: {e}", exc_info=True)
+        self._anomaly_writer = None
+
+    def _check_anomaly(self, event: TransactionEvent) -> None:
+        anomaly = self.anomaly_detector.score(event)
+        if anomaly is None:
+            return
+        self._flagged.append({
+            "transaction_id": event.id,
+            "store_id": event.store_id,
+            "product_id": event.product_id,
+            "transaction_type": event.transaction_type,
+            "quantity": event.quantity,
+            "reason": anomaly.reason,
+            "observed": anomaly.observed,
+            "expected": anomaly.expected,
+            "score": anomaly.score,
+            "transaction_at": event.timestamp,
+        })
+        if self._anomaly_writer is None:
+            self._anomaly_writer = asyncio.get_running_loop().create_task(self._write_anomalies())
+
+    async def start(self) -> None:
+        try:
+            await self.rebuild_feature_store()
+        except Exception as e:
+            logger.error(f"Could not rebuild the demand feature store, starting empty: {e}", exc_info=True)
+        try:
+            await self.load_catalog()
+        except Exception as e:
+            logger.error(f"Could not load product categories, using the global model only: {e}", exc_info=True)
+        self.runtime.start()
+
+    async def shutdown(self) -> None:
+        if self._anomaly_writer is not None:
+            await self._anomaly_writer
+        await self.runtime.shutdown()
+
+    async def learn(self, events: List[TransactionEvent]) -> None:
+        """
+        Updates the rolling demand state, checks each event for anomalies
+        and queues it on the writer thread. Returns without waiting for
+        `learn_one` to finish or flagged events to be saved.
+        """
+        for event in events:
+            self.demand_features.record(event)
+            self._check_anomaly(event)
+            features = get_features(event, self.demand_features)
+            category_id = self._category_of(event.product_id)
+            keys = (
+                (SCOPE_GLOBAL, None),
+                (SCOPE_STORE, event.store_id),
+                (SCOPE_CATEGORY, category_id),
+            )
+            future = self.runtime.submit_learn(features, event.new_stock_level, (event.product_id, category_id), keys)
+            future.add_done_callback(lambda done, transaction_id=event.id: _log_training_result(transaction_id, done))
+
+    async def model_version(self) -> str:
+        """Fingerprint of the snapshot currently serving predictions."""
+        return self.runtime.model_version
+
+    async def metrics(self) -> Dict[str, Any]:
+        """Rolling prediction error stats by scope, plus the serving model's version."""
+        return {
+            "model_version": self.runtime.model_version,
+            "samples_learned": self.runtime.samples_learned,
+            "resident_models": self.runtime.model_counts,
+            "scopes": self.monitor.report(),
+        }
+
+    async def predict(self, requests: List[PredictionRequest]) -> List[List[float]]:
+        """Scores every requested date, for every request, in one hop to the reader pool."""
+        today = date.today()
+        rows, routes = [], []
+        for request in requests:
+            # Future days share the pair's current rolling demand state
+            rolling_features = self.demand_features.features(request.store_id, request.product_id, today)
+            rows.extend(get_prediction_features(rolling_features, day) for day in request.dates)
+            routes.extend([(request.product_id, self._category_of(request.product_id))] * len(request.dates))
+
+        values = await self.runtime.predict_many(rows, routes)
+
+        results, offset = [], 0
+        for request in requests:
+            results.append(values[offset:offset + len(request.dates)])
+            offset += len(request.dates)
+        return results
@@ -0,0 +1,181 @@
+# /app/ml_service/feature_store.py
+import logging
+import uuid
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.transaction_service.models import TransactionType
+
+logger = logging.getLogger(__name__)
+
+WINDOW_DAYS = 28
+VELOCITY_WINDOWS = (7, 14, 28)
+
+# Keys of the features this store contributes, in a stable order.
+FEATURE_NAMES = (
+    *(f"demand_velocity_{w}d" for w in VELOCITY_WINDOWS),
+    *(f"demand_variance_{w}d" for w in VELOCITY_WINDOWS),
+    "days_since_last_sale",
+)
+
+_EMPTY_FEATURES = {name: 0.0 for name in FEATURE_NAMES}
+_EMPTY_FEATURES["days_since_last_sale"] = float(WINDOW_DAYS)
+
+StoreProductKey = Tuple[uuid.UUID, uuid.UUID]
+
+
+class DemandFeatureStore:
+    """
+    In-process rolling demand state for every store-product pair.
+
+    Each pair owns one row of a 2-D NumPy array that acts as a ring buffer of
+    daily unit sales: the cell for a day is `day_ordinal % window`. A row also
+    remembers the most recent day it has written (`head`) so cells belonging
+    to days that have since rolled out of the window can be cleared lazily.
+    Recording a sale touches at most `window` cells, so updates are O(1) in
+    the amount of history; reads copy a single `window`-sized row.
+
+    The store is not thread-safe; it is only mutated and read from the event
+    loop.
+    """
+
+    def __init__(self, window_days: int = WINDOW_DAYS, initial_capacity: int = 1024):
+        if window_days < max(VELOCITY_WINDOWS):
+            raise ValueError(f"window_days must be at least {max(VELOCITY_WINDOWS)}")
+        self.window = window_days
+        self._slots: Dict[StoreProductKey, int] = {}
+        self._demand = np.zeros((initial_capacity, window_days), dtype=np.float64)
+        self._head = np.full(initial_capacity, -1, dtype=np.int64)
+        self._last_sale = np.full(initial_capacity, -1, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    # --- Slot management ---
+
+    def _grow(self, minimum: int) -> None:
+        capacity = self._demand.shape[0]
+        new_capacity = max(capacity * 2, minimum)
+        demand = np.zeros((new_capacity, self.window), dtype=np.float64)
+        demand[:capacity] = self._demand
+        head = np.full(new_capacity, -1, dtype=np.int64)
+        head[:capacity] = self._head
+        last_sale = np.full(new_capacity, -1, dtype=np.int64)
+        last_sale[:capacity] = self._last_sale
+        self._demand, self._head, self._last_sale = demand, head, last_sale
+
+    def _slot_for(self, key: StoreProductKey) -> int:
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = len(self._slots)
+            if slot >= self._demand.shape[0]:
+                self._grow(slot + 1)
+            self._slots[key] = slot
+        return slot
+
+    # --- Writes ---
+
+    def _advance(self, slot: int, day: int) -> None:
+        """Moves a row's head forward to `day`, zeroing the cells that roll over."""
+        head = self._head[slot]
+        if day <= head:
+            return
+        if head < 0 or day - head >= self.window:
+            self._demand[slot] = 0.0
+        else:
+            self._demand[slot, np.arange(head + 1, day + 1) % self.window] = 0.0
+        self._head[slot] = day
+
+    def record_sale(self, store_id: uuid.UUID, product_id: uuid.UUID, day: date, units: float) -> None:
+        """Adds `units` sold on `day` to the pair's ring buffer."""
+        slot = self._slot_for((store_id, product_id))
+        ordinal = day.toordinal()
+        self._advance(slot, ordinal)
+        if ordinal <= self._head[slot] - self.window:
+            return  # Older than anything the window still holds
+        self._demand[slot, ordinal % self.window] += units
+        if ordinal > self._last_sale[slot]:
+            self._last_sale[slot] = ordinal
+
+    def record(self, transaction) -> None:
+        """Records an inventory transaction; only sales count as demand."""
+        if transaction.transaction_type != TransactionType.SALE:
+            return
+        self.record_sale(
+            transaction.store_id,
+            transaction.product_id,
+            transaction.timestamp.date(),
+            abs(transaction.quantity),
+        )
+
+    def rebuild(self, rows: Iterable[Tuple[uuid.UUID, uuid.UUID, date, float]], today: Optional[date] = None) -> None:
+        """
+        Replaces all state from aggregated (store_id, product_id, day, units)
+        rows, e.g. the result of one GROUP BY query over recent sales.
+        """
+        today_ordinal = (today or date.today()).toordinal()
+        self._slots.clear()
+        self._demand[:] = 0.0
+        self._head[:] = -1
+        self._last_sale[:] = -1
+
+        slots, days, units = [], [], []
+        for store_id, product_id, day, quantity in rows:
+            ordinal = day.toordinal()
+            if not today_ordinal - self.window < ordinal <= today_ordinal:
+                continue
+            slots.append(self._slot_for((store_id, product_id)))
+            days.append(ordinal)
+            units.append(float(quantity or 0.0))
+
+        if not slots:
+            return
+        slot_arr = np.asarray(slots, dtype=np.int64)
+        day_arr = np.asarray(days, dtype=np.int64)
+        np.add.at(self._demand, (slot_arr, day_arr % self.window), np.asarray(units))
+        np.maximum.at(self._last_sale, slot_arr, day_arr)
+        self._head[: len(self._slots)] = today_ordinal
+        logger.info(f"Demand feature store rebuilt with {len(self._slots)} store-product pairs.")
+
+    # --- Reads ---
+
+    def daily_demand(self, store_id: uuid.UUID, product_id: uuid.UUID, as_of: date) -> np.ndarray:
+        """The last `window` days of unit sales ending at `as_of`, oldest first."""
+        slot = self._slots.get((store_id, product_id))
+        if slot is None:
+            return np.zeros(self.window)
+        head = int(self._head[slot])
+        # Days older than the head may already have been overwritten, so a
+        # past `as_of` is answered as of the newest day the row holds.
+        today = max(as_of.toordinal(), head)
+        values = self._demand[slot, np.arange(today - self.window + 1, today + 1) % self.window]
+        # Cells after the head have not been cleared yet and hold stale days
+        stale = today - head
+        if stale >= self.window:
+            values[:] = 0.0
+        elif stale > 0:
+            values[-stale:] = 0.0
+        return values
+
+    def features(self, store_id: uuid.UUID, product_id: uuid.UUID, as_of: date) -> Dict[str, float]:
+        """Rolling velocity, variance and recency features for one pair."""
+        slot = self._slots.get((store_id, product_id))
+        if slot is None:
+            return dict(_EMPTY_FEATURES)
+
+        values = self.daily_demand(store_id, product_id, as_of)[::-1]  # newest first
+        sums = np.cumsum(values)
+        squares = np.cumsum(values * values)
+
+        features: Dict[str, float] = {}
+        for w in VELOCITY_WINDOWS:
+            mean = sums[w - 1] / w
+            features[f"demand_velocity_{w}d"] = float(mean)
+            features[f"demand_variance_{w}d"] = float(max(squares[w - 1] / w - mean * mean, 0.0))
+
+        last_sale = int(self._last_sale[slot])
+        since = as_of.toordinal() - last_sale if last_sale >= 0 else self.window
+        features["days_since_last_sale"] = float(min(max(since, 0), self.window))
+        return features
@@ -0,0 +1,47 @@
+# /app/ml_service/features.py
+from datetime import date
+
+from app.transaction_service.models import TransactionType
+from .feature_store import DemandFeatureStore
+
+
+def get_features(transaction, feature_store: DemandFeatureStore) -> dict:
+    """
+    Extracts a feature dictionary from a transaction (an `InventoryTransaction`
+    or a `TransactionEvent`).
+    This version is enhanced to use the more explicit price, cost, and discount fields,
+    plus the rolling demand of the store-product pair from the feature store.
+    """
+    is_sale = 1 if transaction.transaction_type == TransactionType.SALE else 0
+    is_purchase = 1 if transaction.transaction_type == TransactionType.PURCHASE else 0
+
+    return {
+        "quantity": abs(transaction.quantity),
+        "day_of_week": transaction.timestamp.weekday(),
+        "month": transaction.timestamp.month,
+        "year": transaction.timestamp.year,
+        "is_sale": is_sale,
+        "is_purchase": is_purchase,
+        # Use the specific price/cost field depending on the transaction type for better learning
+        "price_or_cost": transaction.unit_price_at_sale if is_sale else transaction.unit_cost or 0.0,
+        "discount": transaction.discount or 0.0,
+        **feature_store.features(transaction.store_id, transaction.product_id, transaction.timestamp.date()),
+    }
+
+
+def get_prediction_features(rolling_features: dict, prediction_date: date) -> dict:
+    """
+    Creates plausible features for a hypothetical sale on `prediction_date`,
+    using the pair's current rolling demand state.
+    """
+    return {
+        "quantity": 5, # An average sale size assumption
+        "day_of_week": prediction_date.weekday(),
+        "month": prediction_date.month,
+        "year": prediction_date.year,
+        "is_sale": 1,
+        "is_purchase": 0,
+        "price_or_cost": 0.0, # Price is unknown for a future sale, model will learn this
+        "discount": 0.0,
+        **rolling_features,
+    }
@@ -0,0 +1,108 @@
+# /app/ml_service/model_server.py
+import asyncio
+import logging
+import os
+import signal
+from typing import Any, Dict, List
+
+from .engine import LocalModelEngine
+from .protocol import encode_frame, read_frame
+from .schemas import PredictionRequest, TransactionEvent
+
+logger = logging.getLogger(__name__)
+
+
+class ModelServer:
+    """
+    Serves one `LocalModelEngine` to every API worker over a Unix socket.
+
+    Requests are `{"id", "op", "items"}` frames where `op` is "learn",
+    "predict", "metrics" or "ping"; replies are `{"id", "ok", "result"}` or
+    `{"id", "ok": false, "error"}`. Each request on a connection is handled
+    as its own task, so a client may pipeline requests and match replies by
+    id.
+    """
+
+    def __init__(self, engine: LocalModelEngine, socket_path: str):
+        self.engine = engine
+        self.socket_path = socket_path
+        self._server = None
+        self._connections = set()
+
+    async def _dispatch(self, op: str, items: List[Dict[str, Any]]) -> Any:
+        if op == "learn":
+            await self.engine.learn([TransactionEvent.model_validate(item) for item in items])
+            return None
+        if op == "predict":
+            return await self.engine.predict([PredictionRequest.model_validate(item) for item in items])
+        if op == "metrics":
+            return await self.engine.metrics()
+        if op == "ping":
+            return {"version": self.engine.runtime.version, "model_version": await self.engine.model_version()}
+        raise ValueError(f"Unknown op '{op}'")
+
+    async def _handle_message(self, message: Dict[str, Any], writer: asyncio.StreamWriter, lock: asyncio.Lock) -> None:
+        try:
+            result = await self._dispatch(message.get("op"), message.get("items") or [])
+            reply = {"id": message.get("id"), "ok": True, "result": result}
+        except Exception as e:
+            logger.error(f"Model server failed to handle '{message.get('op')}': {e}", exc_info=True)
+            reply = {"id": message.get("id"), "ok": False, "error": str(e)}
+        async with lock:
+            writer.write(encode_frame(reply))
+            await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        lock = asyncio.Lock()
+        tasks = set()
+        self._connections.add(writer)
+        try:
+            while True:
+                message = await read_frame(reader)
+                task = asyncio.create_task(self._handle_message(message, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"Dropping model server connection: {e}", exc_info=True)
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self._connections.discard(writer)
+            writer.close()
+
+    async def start(self) -> None:
+        await self.engine.start()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # Stale socket from a previous run
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        logger.info(f"Model server listening on {self.socket_path}")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Connected workers fall back to their local model until the server is back
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        await self.engine.shutdown()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        logger.info("Model server stopped.")
+
+
+async def serve(socket_path: str) -> None:
+    """Runs the model server until SIGINT or SIGTERM."""
+    server = ModelServer(LocalModelEngine(), socket_path)
+    await server.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        await server.stop()
@@ -0,0 +1,51 @@
+# /app/ml_service/models.py
+import uuid
+from datetime import date, datetime, timezone
+
+from sqlmodel import Field, SQLModel
+from sqlalchemy import Column, DateTime, Index
+
+from app.transaction_service.models import TransactionType
+
+
+class StockForecast(SQLModel, table=True):
+    """
+    A precomputed stock level forecast for one store-product pair on one day,
+    written in bulk by the nightly forecast job.
+    """
+    __tablename__ = "stock_forecast"
+
+    store_id: uuid.UUID = Field(foreign_key="store.id", primary_key=True)
+    product_id: uuid.UUID = Field(foreign_key="product.id", primary_key=True)
+    forecast_date: date = Field(primary_key=True)
+
+    predicted_stock: float = Field(ge=0)
+    model_version: str = Field(max_length=32, description="Fingerprint of the model snapshot that produced the forecast.")
+    generated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_column=Column(DateTime(timezone=True), nullable=False))
+
+
+class TransactionAnomaly(SQLModel, table=True):
+    """
+    An inventory transaction flagged by the streaming anomaly detector, with
+    the demand it was compared against.
+    """
+    __tablename__ = "transaction_anomaly"
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    transaction_id: uuid.UUID = Field(foreign_key="inventorytransaction.id", index=True)
+    store_id: uuid.UUID = Field(foreign_key="store.id")
+    product_id: uuid.UUID = Field(foreign_key="product.id", index=True)
+    transaction_type: TransactionType
+    quantity: int
+
+    reason: str = Field(max_length=32, description="sales_spike or large_adjustment")
+    observed: float = Field(description="Units sold that day (sales) or units adjusted.")
+    expected: float = Field(description="Median daily units sold over the rolling window.")
+    score: float = Field(description="Robust z-score of `observed`.")
+
+    transaction_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    detected_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_column=Column(DateTime(timezone=True), nullable=False))
+
+    __table_args__ = (
+        Index("ix_transaction_anomaly_store_detected", "store_id", "detected_at"),
+    )
@@ -0,0 +1,76 @@
+# /app/ml_service/monitoring.py
+import math
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.config import settings
+
+# Scopes errors are tracked under; every sample updates one key of each.
+SCOPE_GLOBAL = "global"
+SCOPE_STORE = "store"
+SCOPE_CATEGORY = "category"
+
+MonitorKey = Tuple[str, Optional[uuid.UUID]]
+
+# Positions in a key's stats list (a plain list keeps updates to a few µs).
+_MAE, _BIAS, _SAMPLES, _RATE, _LAST = range(5)
+
+
+class ErrorMonitor:
+    """
+    Constant-memory rolling prediction error statistics.
+
+    Each key keeps five numbers: exponentially weighted mean absolute error
+    and mean signed error (bias, prediction minus actual), a sample count, a
+    time-decayed sample rate and the time of the last sample. `alpha` sets
+    how quickly old errors are forgotten (roughly the last 1/alpha samples
+    matter); `rate_window` is the time constant of the rate estimate, in
+    seconds.
+
+    Only the ml-writer thread calls `update`; readers take a shallow copy,
+    so a report may mix values from consecutive samples but never blocks
+    training.
+    """
+
+    def __init__(
+        self,
+        alpha: float = settings.ML_MONITOR_ALPHA,
+        rate_window: float = settings.ML_MONITOR_RATE_WINDOW_SECONDS,
+    ):
+        self.alpha = alpha
+        self.rate_window = rate_window
+        self._stats: Dict[MonitorKey, List[float]] = {}
+
+    def update(self, keys: Iterable[MonitorKey], y_true: float, y_pred: float, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        error = y_pred - y_true
+        abs_error = abs(error)
+        alpha = self.alpha
+        for key in keys:
+            stats = self._stats.get(key)
+            if stats is None:
+                self._stats[key] = [abs_error, error, 1, 1.0 / self.rate_window, now]
+                continue
+            stats[_MAE] += alpha * (abs_error - stats[_MAE])
+            stats[_BIAS] += alpha * (error - stats[_BIAS])
+            stats[_SAMPLES] += 1
+            stats[_RATE] = stats[_RATE] * math.exp((stats[_LAST] - now) / self.rate_window) + 1.0 / self.rate_window
+            stats[_LAST] = now
+
+    def report(self, now: Optional[float] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """JSON-friendly stats grouped by scope; ids are strings and times are epoch seconds."""
+        now = time.time() if now is None else now
+        grouped: Dict[str, List[Dict[str, Any]]] = {SCOPE_GLOBAL: [], SCOPE_STORE: [], SCOPE_CATEGORY: []}
+        for (scope, scope_id), stats in dict(self._stats).items():
+            mae, bias, samples, rate, last = stats
+            grouped.setdefault(scope, []).append({
+                "scope_id": str(scope_id) if scope_id is not None else None,
+                "samples": int(samples),
+                "mae": mae,
+                "bias": bias,
+                # Decay the rate to `now` so idle scopes drift towards zero
+                "samples_per_minute": rate * math.exp(min(last - now, 0.0) / self.rate_window) * 60,
+                "last_trained_at": last,
+            })
+        return grouped
@@ -21,12 +21,16 @@ def get_ml_pipeline():
 def save_model(model):
     """
     Saves the trained ML model object to a file using pickle.
+    Returns the pickled bytes, or None if saving failed.
     """
     try:
+        payload = pickle.dumps(model)
         with open(settings.ML_MODEL_PATH, 'wb') as f:
-            pickle.dump(model, f)
+            f.write(payload)
+        return payload
     except Exception as e:
         logger.error(f"Error saving ML model: {e}", exc_info=True)
+        return None
 
 
 def load_model():
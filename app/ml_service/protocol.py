@@ -0,0 +1,23 @@
+# /app/ml_service/protocol.py
+import asyncio
+import json
+import struct
+from typing import Any, Dict
+
+# Every message is a 4-byte big-endian length followed by that many bytes of UTF-8 JSON.
+_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    """Reads one message. Raises `asyncio.IncompleteReadError` when the peer closes."""
+    header = await reader.readexactly(_HEADER.size)
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {length} bytes exceeds the {MAX_FRAME_BYTES} byte limit")
+    return json.loads(await reader.readexactly(length))
+
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    body = json.dumps(message, separators=(",", ":")).encode()
+    return _HEADER.pack(len(body)) + body
@@ -0,0 +1,100 @@
+# /app/ml_service/reconciliation.py
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+METHOD_BOTTOM_UP = "bottom_up"
+METHOD_MINT = "mint"
+METHODS = (METHOD_BOTTOM_UP, METHOD_MINT)
+
+# Guards the parent walk against cycles in bad category data.
+_MAX_CATEGORY_DEPTH = 16
+
+
+def build_aggregation_matrix(
+    product_categories: List[Optional[uuid.UUID]],
+    category_parents: Dict[uuid.UUID, Optional[uuid.UUID]],
+) -> Tuple[List[uuid.UUID], sparse.csr_matrix]:
+    """
+    Sparse matrix summing one store's product series into every level above
+    them. `product_categories` holds each product's category, in product order.
+
+    Row 0 is the store total. The other rows are categories, in the returned
+    order. A product counts towards its own category and every ancestor of
+    it, so a parent category also covers its sub-categories. Uncategorised
+    products only count towards the store total.
+    """
+    categories: List[uuid.UUID] = []
+    row_of: Dict[uuid.UUID, int] = {}
+    rows, cols = [], []
+    for col, category_id in enumerate(product_categories):
+        rows.append(0)
+        cols.append(col)
+        for _ in range(_MAX_CATEGORY_DEPTH):
+            if category_id is None:
+                break
+            row = row_of.get(category_id)
+            if row is None:
+                categories.append(category_id)
+                row = row_of[category_id] = len(categories)
+            rows.append(row)
+            cols.append(col)
+            category_id = category_parents.get(category_id)
+
+    aggregation = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(1 + len(categories), len(product_categories))
+    )
+    return categories, aggregation
+
+
+def reconcile(
+    bottom_base: np.ndarray,
+    aggregate_base: np.ndarray,
+    aggregation: sparse.csr_matrix,
+    method: str = METHOD_MINT,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reconciles base forecasts (series x days) so every aggregate equals the
+    sum of the products under it. Returns (products, aggregates).
+
+    - `bottom_up` keeps the product forecasts and sums them.
+    - `mint` is MinT with structurally scaled weights (WLS): each series'
+      error variance is taken as proportional to the number of products it
+      covers. Product forecasts are shifted by the least-squares correction
+
+          bottom + C' (W_agg + C C')^-1 (aggregate - C bottom)
+
+      so the aggregate forecasts inform the products too. The system is
+      one sparse (aggregates x aggregates) factorisation, solved for every
+      day at once; it never grows with the number of products squared.
+
+    Negative product levels are set to 0 and the aggregates re-summed, so
+    the result stays coherent.
+    """
+    bottom_base = np.asarray(bottom_base, dtype=np.float64)
+    aggregate_base = np.asarray(aggregate_base, dtype=np.float64)
+    if method not in METHODS:
+        raise ValueError(f"Unknown reconciliation method '{method}'")
+
+    bottom = bottom_base
+    if method == METHOD_MINT and bottom_base.size:
+        product_counts = np.asarray(aggregation.sum(axis=1)).ravel()
+        system = sparse.diags(product_counts) + aggregation @ aggregation.T
+        residual = aggregate_base - aggregation @ bottom_base
+        correction = splu(sparse.csc_matrix(system)).solve(residual)
+        bottom = bottom_base + aggregation.T @ correction
+
+    bottom = np.maximum(bottom, 0.0)
+    return bottom, aggregation @ bottom
+
+
+def drift_forecast(level: np.ndarray, daily_change: np.ndarray, horizons: np.ndarray) -> np.ndarray:
+    """
+    Random walk with drift: today's `level` moved by the average
+    `daily_change` per day ahead, floored at 0. Returns series x horizons.
+    """
+    forecast = np.asarray(level, dtype=np.float64)[:, None] + np.outer(daily_change, horizons)
+    return np.maximum(forecast, 0.0)
@@ -0,0 +1,218 @@
+# /app/ml_service/registry.py
+import copy
+import logging
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from core.config import settings
+from .pipeline import get_ml_pipeline
+
+logger = logging.getLogger(__name__)
+
+# (product_id, category_id) of a sample or prediction; either may be unknown.
+Route = Tuple[Optional[uuid.UUID], Optional[uuid.UUID]]
+
+# Guards the parent walk against cycles in bad category data.
+_MAX_CATEGORY_DEPTH = 16
+
+
+def _resolve(global_model, category_models, product_models, category_parents, product_id, category_id):
+    """Most specific model for a route: product, then category and its ancestors, then global."""
+    model = product_models.get(product_id) if product_id is not None else None
+    if model is not None:
+        return model
+    for _ in range(_MAX_CATEGORY_DEPTH):
+        if category_id is None:
+            break
+        model = category_models.get(category_id)
+        if model is not None:
+            return model
+        category_id = category_parents.get(category_id)
+    return global_model
+
+
+class RegistrySnapshot:
+    """
+    A frozen, read-only copy of every model in a registry, as published to
+    the prediction readers and persisted to disk. Models that did not change
+    since the previous snapshot are shared with it, not copied.
+    """
+
+    def __init__(self, global_model, category_models, product_models, category_parents, product_samples):
+        self.global_model = global_model
+        self.category_models: Dict[uuid.UUID, Any] = category_models
+        self.product_models: Dict[uuid.UUID, Any] = product_models
+        self.category_parents: Dict[uuid.UUID, Optional[uuid.UUID]] = category_parents
+        self.product_samples: Dict[uuid.UUID, int] = product_samples
+
+    def resolve(self, route: Route):
+        product_id, category_id = route
+        return _resolve(
+            self.global_model, self.category_models, self.product_models, self.category_parents,
+            product_id, category_id
+        )
+
+    def predict_one(self, features: Dict[str, Any], route: Route) -> float:
+        return self.resolve(route).predict_one(features)
+
+
+class ModelRegistry:
+    """
+    Hierarchy of River models: one global model, one per category and one
+    per product that has earned it.
+
+    - Every sample trains the global model and its product's category model.
+      A category model is created on the category's first sample as a copy of
+      its nearest ancestor's model (or the global model), so it starts from
+      a sensible prior.
+    - Products only count samples until they reach `promote_after`. They are
+      then promoted to a dedicated model, copied from their category model,
+      and trained from then on.
+    - At most `max_product_models` product models stay resident. The least
+      recently trained one is evicted back to its category and must earn
+      promotion again, so the model count follows active demand, not the
+      size of the catalogue.
+    - Predictions use the most specific model available: product, category,
+      ancestor categories, global.
+
+    Not thread-safe: the live registry is only touched by the ml-writer
+    thread. Readers use `snapshot()` copies, which only deep-copy the models
+    trained since the previous snapshot.
+    """
+
+    def __init__(
+        self,
+        global_model=None,
+        model_factory: Callable[[], Any] = get_ml_pipeline,
+        promote_after: int = settings.ML_PRODUCT_MODEL_MIN_SAMPLES,
+        max_product_models: int = settings.ML_MAX_PRODUCT_MODELS,
+    ):
+        self.global_model = global_model if global_model is not None else model_factory()
+        self.promote_after = promote_after
+        self.max_product_models = max_product_models
+        self.category_models: Dict[uuid.UUID, Any] = {}
+        self.product_models: "OrderedDict[uuid.UUID, Any]" = OrderedDict()
+        self.product_samples: Dict[uuid.UUID, int] = {}
+        # Replaced wholesale (never mutated) so snapshots can share it
+        self.category_parents: Dict[uuid.UUID, Optional[uuid.UUID]] = {}
+
+        self._snapshot: Optional[RegistrySnapshot] = None
+        self._dirty_global = True
+        self._dirty_categories: set = set()
+        self._dirty_products: set = set()
+
+    @classmethod
+    def from_saved(cls, saved, **kwargs) -> "ModelRegistry":
+        """
+        Restores a registry from `load_model()`: a `RegistrySnapshot`, or a
+        bare pipeline pickled by older versions, which becomes the global model.
+        """
+        if not isinstance(saved, RegistrySnapshot):
+            return cls(global_model=saved, **kwargs)
+        registry = cls(global_model=saved.global_model, **kwargs)
+        registry.category_models = dict(saved.category_models)
+        registry.product_models = OrderedDict(saved.product_models)
+        registry.product_samples = dict(saved.product_samples)
+        registry.category_parents = dict(saved.category_parents)
+        registry._dirty_categories = set(registry.category_models)
+        registry._dirty_products = set(registry.product_models)
+        while len(registry.product_models) > registry.max_product_models:
+            registry._evict()
+        return registry
+
+    def set_category_parents(self, category_parents: Dict[uuid.UUID, Optional[uuid.UUID]]) -> None:
+        self.category_parents = dict(category_parents)
+
+    @property
+    def model_counts(self) -> Dict[str, int]:
+        return {"global": 1, "category": len(self.category_models), "product": len(self.product_models)}
+
+    # --- Training (ml-writer thread) ---
+
+    def _category_model(self, category_id: uuid.UUID):
+        model = self.category_models.get(category_id)
+        if model is None:
+            prior = _resolve(
+                self.global_model, self.category_models, {}, self.category_parents,
+                None, self.category_parents.get(category_id)
+            )
+            model = self.category_models[category_id] = copy.deepcopy(prior)
+        return model
+
+    def _evict(self) -> None:
+        product_id, _ = self.product_models.popitem(last=False)
+        self._dirty_products.discard(product_id)
+        self.product_samples[product_id] = 0
+
+    def predict_one(self, features: Dict[str, Any], route: Route) -> float:
+        """Scores with the live models; used for prequential monitoring."""
+        product_id, category_id = route
+        return _resolve(
+            self.global_model, self.category_models, self.product_models, self.category_parents,
+            product_id, category_id
+        ).predict_one(features)
+
+    def learn_one(self, features: Dict[str, Any], target: float, route: Route) -> None:
+        product_id, category_id = route
+        # Resolved before the global model learns, so a new category's prior
+        # does not already include this sample
+        category_model = self._category_model(category_id) if category_id is not None else None
+        self.global_model.learn_one(features, target)
+        self._dirty_global = True
+
+        if category_model is not None:
+            category_model.learn_one(features, target)
+            self._dirty_categories.add(category_id)
+
+        if product_id is None:
+            return
+        model = self.product_models.get(product_id)
+        if model is not None:
+            self.product_models.move_to_end(product_id)
+            model.learn_one(features, target)
+            self._dirty_products.add(product_id)
+            return
+
+        samples = self.product_samples.get(product_id, 0) + 1
+        self.product_samples[product_id] = samples
+        if samples >= self.promote_after:
+            # The category model has just learned this sample; start from it
+            prior = self.category_models.get(category_id) if category_id is not None else None
+            self.product_models[product_id] = copy.deepcopy(prior if prior is not None else self.global_model)
+            self._dirty_products.add(product_id)
+            if len(self.product_models) > self.max_product_models:
+                self._evict()
+
+    # --- Publishing ---
+
+    def snapshot(self) -> RegistrySnapshot:
+        """
+        A read-only copy for readers. Only models trained since the previous
+        snapshot are deep-copied; the rest are shared with it.
+        """
+        previous = self._snapshot
+        if previous is None:
+            global_model = copy.deepcopy(self.global_model)
+            category_models = {cid: copy.deepcopy(m) for cid, m in self.category_models.items()}
+            product_models = {pid: copy.deepcopy(m) for pid, m in self.product_models.items()}
+        else:
+            global_model = copy.deepcopy(self.global_model) if self._dirty_global else previous.global_model
+            category_models = dict(previous.category_models)
+            for category_id in self._dirty_categories:
+                category_models[category_id] = copy.deepcopy(self.category_models[category_id])
+            product_models = {
+                product_id: (
+                    copy.deepcopy(model) if product_id in self._dirty_products
+                    else previous.product_models[product_id]
+                )
+                for product_id, model in self.product_models.items()
+            }
+
+        self._dirty_global = False
+        self._dirty_categories.clear()
+        self._dirty_products.clear()
+        self._snapshot = RegistrySnapshot(
+            global_model, category_models, product_models, self.category_parents, dict(self.product_samples)
+        )
+        return self._snapshot
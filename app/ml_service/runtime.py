@@ -0,0 +1,156 @@
+# /app/ml_service/runtime.py
+import asyncio
+import hashlib
+import logging
+import pickle
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.config import settings
+from .monitoring import ErrorMonitor, MonitorKey
+from .pipeline import save_model
+from .registry import ModelRegistry, RegistrySnapshot, Route
+
+logger = logging.getLogger(__name__)
+
+
+_NO_ROUTE: Route = (None, None)
+
+
+def _predict_rows(snapshot: RegistrySnapshot, rows: List[Dict[str, Any]], routes: List[Route]) -> List[float]:
+    """Scores a batch of feature rows against a (read-only) registry snapshot."""
+    return [snapshot.predict_one(features, route) for features, route in zip(rows, routes)]
+
+
+def _fingerprint(payload: bytes) -> str:
+    """A short content hash identifying a pickled model snapshot."""
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+
+class ModelRuntime:
+    """
+    Owns the live model registry and keeps River calls off the event loop.
+
+    - All training goes through a single writer thread, so `learn_one` calls
+      are serialized and never race each other.
+    - Predictions never touch the live model. They run on a separate reader
+      pool against an immutable snapshot that the writer publishes every
+      `publish_every` samples or `publish_interval` seconds, whichever comes
+      first. Publishing is a single reference swap, so readers see either the
+      old or the new models, never a half-updated one.
+    - Each sample and prediction carries a route (product, category) that
+      picks the registry model it trains or is scored by.
+    - With a `monitor`, every sample is scored by the live models just before
+      it is learned (prequential evaluation) and the error is recorded under
+      the sample's monitor keys.
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        publish_every: int = settings.ML_SNAPSHOT_EVERY_N,
+        publish_interval: float = settings.ML_SNAPSHOT_INTERVAL_SECONDS,
+        predict_workers: int = settings.ML_PREDICT_WORKERS,
+        monitor: Optional[ErrorMonitor] = None,
+    ):
+        self.registry = registry
+        self.monitor = monitor
+        self._snapshot = registry.snapshot()
+        self.model_version = _fingerprint(pickle.dumps(self._snapshot))
+        self.publish_every = publish_every
+        self.publish_interval = publish_interval
+        self.version = 0
+        self.samples_learned = 0
+
+        self._pending = 0
+        self._last_publish = time.monotonic()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ml-writer")
+        self._readers = ThreadPoolExecutor(max_workers=predict_workers, thread_name_prefix="ml-reader")
+        self._publisher_task: Optional[asyncio.Task] = None
+
+    # --- Writer side (runs on the ml-writer thread only) ---
+
+    def _learn(
+        self, features: Dict[str, Any], target: float, route: Route = _NO_ROUTE, keys: Iterable[MonitorKey] = ()
+    ) -> None:
+        if self.monitor is not None:
+            self.monitor.update(keys, target, self.registry.predict_one(features, route))
+        self.registry.learn_one(features, target, route)
+        self.samples_learned += 1
+        self._pending += 1
+        if (
+            self._pending >= self.publish_every
+            or time.monotonic() - self._last_publish >= self.publish_interval
+        ):
+            self._publish()
+
+    def _publish(self) -> None:
+        if not self._pending:
+            return
+        snapshot = self.registry.snapshot()
+        self._snapshot = snapshot
+        self.version += self._pending
+        self._pending = 0
+        self._last_publish = time.monotonic()
+        # Persist the frozen snapshot rather than the live models; nothing mutates it.
+        payload = save_model(snapshot)
+        self.model_version = _fingerprint(payload if payload is not None else pickle.dumps(snapshot))
+
+    # --- Public API (called from the event loop) ---
+
+    @property
+    def snapshot(self):
+        """The most recently published, read-only copy of the models."""
+        return self._snapshot
+
+    @property
+    def model_counts(self) -> Dict[str, int]:
+        """Resident models per level in the latest snapshot."""
+        snapshot = self._snapshot
+        return {"global": 1, "category": len(snapshot.category_models), "product": len(snapshot.product_models)}
+
+    def submit_learn(
+        self, features: Dict[str, Any], target: float, route: Route = _NO_ROUTE, keys: Iterable[MonitorKey] = ()
+    ) -> Future:
+        """Queues a training sample on the writer thread without waiting for it."""
+        return self._writer.submit(self._learn, features, target, route, keys)
+
+    async def learn(
+        self, features: Dict[str, Any], target: float, route: Route = _NO_ROUTE, keys: Iterable[MonitorKey] = ()
+    ) -> None:
+        """Trains on one sample and waits until the writer has applied it."""
+        await asyncio.wrap_future(self.submit_learn(features, target, route, keys))
+
+    async def set_category_parents(self, category_parents: Dict) -> None:
+        """Updates the category tree used to route samples, on the writer thread."""
+        await asyncio.wrap_future(self._writer.submit(self.registry.set_category_parents, category_parents))
+
+    async def predict_many(self, rows: List[Dict[str, Any]], routes: Optional[List[Route]] = None) -> List[float]:
+        """Scores a batch of feature rows on the reader pool."""
+        loop = asyncio.get_running_loop()
+        routes = routes if routes is not None else [_NO_ROUTE] * len(rows)
+        return await loop.run_in_executor(self._readers, _predict_rows, self._snapshot, rows, routes)
+
+    async def _publish_periodically(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.publish_interval)
+            try:
+                await loop.run_in_executor(self._writer, self._publish)
+            except Exception as e:
+                logger.error(f"Failed to publish ML model snapshot: {e}", exc_info=True)
+
+    def start(self) -> None:
+        """Starts the background publisher so idle periods still flush pending samples."""
+        if self._publisher_task is None:
+            self._publisher_task = asyncio.get_running_loop().create_task(self._publish_periodically())
+
+    async def shutdown(self) -> None:
+        """Publishes and persists any pending samples, then stops the executors."""
+        if self._publisher_task is not None:
+            self._publisher_task.cancel()
+            self._publisher_task = None
+        await asyncio.wrap_future(self._writer.submit(self._publish))
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
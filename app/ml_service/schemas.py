@@ -1,8 +1,10 @@
 # /app/ml_service/schemas.py
 from pydantic import BaseModel, Field
 from uuid import UUID
-from datetime import date
-from typing import List
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from app.transaction_service.models import TransactionType
 
 class StockPrediction(BaseModel):
     """Represents a stock prediction for a single day."""
@@ -14,3 +16,92 @@ class StockPredictionResponse(BaseModel):
     store_id: UUID
     product_id: UUID
     predictions: List[StockPrediction]
+
+class TransactionEvent(BaseModel):
+    """
+    The parts of an inventory transaction the ML service learns from.
+    Detached from the ORM session so it can be queued or sent to the model server.
+    """
+    id: UUID
+    store_id: UUID
+    product_id: UUID
+    transaction_type: TransactionType
+    quantity: int
+    unit_cost: Optional[float] = None
+    unit_price_at_sale: Optional[float] = None
+    discount: Optional[float] = 0.0
+    timestamp: datetime
+    new_stock_level: int = Field(..., description="Stock level after the transaction; the training target.")
+
+    @classmethod
+    def from_transaction(cls, transaction, new_stock_level: int) -> "TransactionEvent":
+        return cls(
+            id=transaction.id,
+            store_id=transaction.store_id,
+            product_id=transaction.product_id,
+            transaction_type=transaction.transaction_type,
+            quantity=transaction.quantity,
+            unit_cost=transaction.unit_cost,
+            unit_price_at_sale=transaction.unit_price_at_sale,
+            discount=transaction.discount,
+            timestamp=transaction.timestamp,
+            new_stock_level=new_stock_level,
+        )
+
+class PredictionRequest(BaseModel):
+    """A batch item asking for predictions on a set of dates for one store-product pair."""
+    store_id: UUID
+    product_id: UUID
+    dates: List[date]
+
+class ReconciledSeries(BaseModel):
+    """Base and reconciled stock forecasts of one node of the store hierarchy, one value per date."""
+    id: Optional[UUID] = Field(None, description="Category or product id; empty for the store total.")
+    base: List[float] = Field(..., description="Forecast made at this level alone.")
+    reconciled: List[float] = Field(..., description="Forecast consistent with every other level.")
+
+class ReconciledForecastReport(BaseModel):
+    """Stock forecasts for a store, its categories and its products that add up at every level."""
+    store_id: UUID
+    method: str
+    dates: List[date]
+    generated_at: datetime
+    store: ReconciledSeries
+    categories: List[ReconciledSeries]
+    products: List[ReconciledSeries]
+
+class ErrorStats(BaseModel):
+    """Rolling prediction error of the model for one scope (all data, a store or a category)."""
+    scope_id: Optional[UUID] = Field(None, description="Store or category id; empty for the global scope or uncategorised products.")
+    samples: int
+    mae: float = Field(..., description="Exponentially weighted mean absolute error, in units of stock.")
+    bias: float = Field(..., description="Exponentially weighted mean of prediction minus actual; positive means over-prediction.")
+    samples_per_minute: float
+    last_trained_at: datetime
+
+class ModelMonitoringReport(BaseModel):
+    model_version: str
+    samples_learned: int
+    resident_models: Dict[str, int] = Field(default_factory=dict, description="Models in memory per level: global, category and product.")
+    generated_at: datetime
+    overall: Optional[ErrorStats] = None
+    stores: List[ErrorStats]
+    categories: List[ErrorStats]
+
+class TransactionAnomalyRead(BaseModel):
+    """A transaction flagged by the streaming anomaly detector."""
+    id: UUID
+    transaction_id: UUID
+    store_id: UUID
+    product_id: UUID
+    transaction_type: TransactionType
+    quantity: int
+    reason: str
+    observed: float
+    expected: float
+    score: float
+    transaction_at: datetime
+    detected_at: datetime
+
+    class Config:
+        from_attributes = True
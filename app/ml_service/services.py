@@ -1,50 +1,135 @@
 # /app/ml_service/services.py
+import asyncio
 import logging
 from uuid import UUID
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta, timezone, date
+from typing import Dict, List, Optional, Union
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from app.transaction_service import models as transaction_models # Use alias for clarity
-from .pipeline import get_ml_pipeline, save_model, load_model
-from .schemas import StockPrediction, StockPredictionResponse
+from core.config import settings
+from core.database import run_after_commit
+from . import crud
+from .client import ModelServerClient
+from .engine import LocalModelEngine
+from .monitoring import SCOPE_CATEGORY, SCOPE_GLOBAL, SCOPE_STORE
+from .reconciliation import build_aggregation_matrix, drift_forecast, reconcile
+from .schemas import (
+    ErrorStats, ModelMonitoringReport, PredictionRequest, ReconciledForecastReport, ReconciledSeries, StockPrediction,
+    StockPredictionResponse, TransactionEvent, TransactionAnomalyRead
+)
 
 logger = logging.getLogger(__name__)
 
-# --- GLOBAL MODEL OBJECT ---
-ml_model = load_model()
-if ml_model is None:
-    ml_model = get_ml_pipeline()
+# --- MODEL ENGINE ---
+# With ML_SERVER_SOCKET set, every API worker talks to one shared model server
+# and holds no model of its own. Otherwise (or while the server is down) the
+# model lives in-process. Nothing is loaded at import time.
+_local_engine: Optional[LocalModelEngine] = None
+_local_engine_lock = asyncio.Lock()
+_server_client: Optional[ModelServerClient] = None
 
-def get_features(transaction: transaction_models.InventoryTransaction) -> dict:
+async def get_local_engine() -> LocalModelEngine:
+    """Creates and starts the in-process engine on first use."""
+    global _local_engine
+    async with _local_engine_lock:
+        if _local_engine is None:
+            engine = LocalModelEngine()
+            await engine.start()
+            _local_engine = engine
+    return _local_engine
+
+async def get_engine() -> Union[ModelServerClient, LocalModelEngine]:
+    """The model server client in server mode, otherwise the local engine."""
+    if _server_client is not None:
+        return _server_client
+    return await get_local_engine()
+
+async def start():
+    """Connects to the model server or starts the local engine. Called from the app lifespan."""
+    global _server_client
+    if settings.ML_SERVER_SOCKET:
+        _server_client = ModelServerClient(settings.ML_SERVER_SOCKET, fallback_factory=get_local_engine)
+        logger.info(f"ML service using the model server at {settings.ML_SERVER_SOCKET}")
+    else:
+        await get_local_engine()
+
+async def shutdown():
+    """Flushes pending training samples. Called from the app lifespan."""
+    global _local_engine, _server_client
+    if _server_client is not None:
+        await _server_client.close()
+        _server_client = None
+    if _local_engine is not None:
+        await _local_engine.shutdown()
+        _local_engine = None
+
+def train_model_after_commit(db: AsyncSession, transaction: transaction_models.InventoryTransaction, new_stock_level: int):
     """
-    Extracts a feature dictionary from a raw transaction object.
-    This version is enhanced to use the more explicit price, cost, and discount fields.
+    Trains on the transaction once the caller's database transaction has
+    committed, so rolled-back transactions are never learned or scored.
+    The event is detached from the ORM object here, while its attributes are
+    still loaded; the commit itself is not slowed down.
     """
-    is_sale = 1 if transaction.transaction_type == transaction_models.TransactionType.SALE else 0
-    is_purchase = 1 if transaction.transaction_type == transaction_models.TransactionType.PURCHASE else 0
-
-    return {
-        "quantity": abs(transaction.quantity),
-        "day_of_week": transaction.timestamp.weekday(),
-        "month": transaction.timestamp.month,
-        "year": transaction.timestamp.year,
-        "is_sale": is_sale,
-        "is_purchase": is_purchase,
-        # Use the specific price/cost field depending on the transaction type for better learning
-        "price_or_cost": transaction.unit_price_at_sale if is_sale else transaction.unit_cost or 0.0,
-        "discount": transaction.discount or 0.0
-    }
+    event = TransactionEvent.from_transaction(transaction, new_stock_level)
+    run_after_commit(db, train_model, event)
 
-async def train_model(transaction: transaction_models.InventoryTransaction, new_stock_level: int):
-    """Incrementally trains the model with a new transaction."""
+async def train_model(event: TransactionEvent):
+    """
+    Updates the rolling demand state, checks the event for anomalies and
+    queues it for incremental training, without waiting for `learn_one`.
+    """
     try:
-        features = get_features(transaction)
-        target = new_stock_level
-        ml_model.learn_one(features, target)
-        save_model(ml_model)
-        logger.info(f"ML model successfully updated with transaction {transaction.id}")
+        engine = await get_engine()
+        await engine.learn([event])
     except Exception as e:
-        logger.error(f"Failed to train ML model with transaction {transaction.id}: {e}", exc_info=True)
+        logger.error(f"Failed to queue ML training for transaction {event.id}: {e}", exc_info=True)
+
+async def generate_forecasts(db: AsyncSession, horizon_days: int, batch_size: int) -> int:
+    """
+    Scores every active store-product pair for `horizon_days` days starting
+    today and upserts the results into `stock_forecast`. Pairs are scored
+    `batch_size` at a time, each batch in one request to the engine and
+    committed on its own. Returns the number of forecast rows written.
+    """
+    today = date.today()
+    dates = [today + timedelta(days=offset) for offset in range(horizon_days)]
+    pairs = await crud.get_active_store_products(db)
+    engine = await get_engine()
+    model_version = await engine.model_version()
+    generated_at = datetime.now(timezone.utc)
+
+    removed = await crud.delete_forecasts_before(db, today)
+    await db.commit()
+    logger.info(f"Removed {removed} expired forecasts; forecasting {len(pairs)} store-product pairs with model {model_version}.")
+
+    written = 0
+    for offset in range(0, len(pairs), batch_size):
+        batch = pairs[offset:offset + batch_size]
+        requests = [PredictionRequest(store_id=store_id, product_id=product_id, dates=dates) for store_id, product_id in batch]
+        values = await engine.predict(requests)
+        rows = [
+            {
+                "store_id": request.store_id,
+                "product_id": request.product_id,
+                "forecast_date": forecast_date,
+                "predicted_stock": value if value > 0 else 0.0,
+                "model_version": model_version,
+                "generated_at": generated_at,
+            }
+            for request, pair_values in zip(requests, values)
+            for forecast_date, value in zip(dates, pair_values)
+        ]
+        await crud.upsert_forecasts(db, rows)
+        await db.commit()
+        written += len(rows)
+        logger.info(f"Forecast {offset + len(batch)}/{len(pairs)} store-product pairs.")
+
+    return written
 
 async def predict_stock_for_range(
+    db: AsyncSession,
     store_id: UUID,
     product_id: UUID,
     start_date: date,
@@ -52,35 +137,149 @@ async def predict_stock_for_range(
 ) -> StockPredictionResponse:
     """
     Predicts the stock level for each day within a given date range.
+    Days covered by the nightly forecast job are read from `stock_forecast`;
+    only the days it has no row for are scored live.
     """
-    predictions = []
+    forecasts = await crud.get_forecasts(db, store_id, product_id, start_date, end_date)
+    stored: Dict[date, float] = {forecast.forecast_date: forecast.predicted_stock for forecast in forecasts}
+
+    dates = []
     current_date = start_date
-    
     while current_date <= end_date:
-        # Create plausible features for a hypothetical transaction on the current_date.
-        hypothetical_features = {
-            "quantity": 5, # An average sale size assumption
-            "day_of_week": current_date.weekday(),
-            "month": current_date.month,
-            "year": current_date.year,
-            "is_sale": 1,
-            "is_purchase": 0,
-            "price_or_cost": 0.0, # Price is unknown for a future sale, model will learn this
-            "discount": 0.0
-        }
-
-        prediction_value = ml_model.predict_one(hypothetical_features)
-        
-        daily_prediction = StockPrediction(
-            prediction_date=current_date,
-            predicted_stock=prediction_value if prediction_value > 0 else 0.0
-        )
-        predictions.append(daily_prediction)
-        
+        dates.append(current_date)
         current_date += timedelta(days=1)
 
+    missing = [day for day in dates if day not in stored]
+    if missing:
+        # Score the missing days in one request to the engine
+        engine = await get_engine()
+        [values] = await engine.predict([PredictionRequest(store_id=store_id, product_id=product_id, dates=missing)])
+        stored.update((day, value if value > 0 else 0.0) for day, value in zip(missing, values))
+
+    predictions = [
+        StockPrediction(prediction_date=prediction_date, predicted_stock=stored[prediction_date])
+        for prediction_date in dates
+    ]
+
     return StockPredictionResponse(
         store_id=store_id,
         product_id=product_id,
         predictions=predictions
     )
+
+async def get_reconciled_forecast(
+    db: AsyncSession,
+    store_id: UUID,
+    start_date: date,
+    end_date: date,
+    method: str
+) -> ReconciledForecastReport:
+    """
+    Forecasts a store's stock at every level of the store -> category ->
+    product hierarchy and reconciles them so categories add up to their
+    products and the store to everything in it.
+
+    Product forecasts are the model's, read from `stock_forecast` with
+    missing days scored live in one engine request. Store and category
+    forecasts come from their own current stock and average net daily
+    movement over ML_RECONCILIATION_LOOKBACK_DAYS (a random walk with
+    drift). Aggregates are computed from product rows with one sparse
+    matrix, so no per-level queries are needed.
+    """
+    today = date.today()
+    dates = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+    catalog = await crud.get_store_catalog(db, store_id)
+    category_parents = await crud.get_category_parents(db)
+    lookback = settings.ML_RECONCILIATION_LOOKBACK_DAYS
+    net_change = await crud.get_net_stock_change_since(db, store_id, today - timedelta(days=lookback))
+
+    product_ids = [product_id for product_id, _, _ in catalog]
+    date_index = {day: i for i, day in enumerate(dates)}
+    bottom_base = np.full((len(product_ids), len(dates)), np.nan)
+    product_index = {product_id: i for i, product_id in enumerate(product_ids)}
+    for product_id, forecast_date, predicted_stock in await crud.get_store_forecasts(db, store_id, start_date, end_date):
+        i = product_index.get(product_id)
+        if i is not None:
+            bottom_base[i, date_index[forecast_date]] = predicted_stock
+
+    requests = []
+    for i, product_id in enumerate(product_ids):
+        missing = [day for day, value in zip(dates, bottom_base[i]) if np.isnan(value)]
+        if missing:
+            requests.append(PredictionRequest(store_id=store_id, product_id=product_id, dates=missing))
+    if requests:
+        # Score every missing product-day in one request to the engine
+        engine = await get_engine()
+        for request, values in zip(requests, await engine.predict(requests)):
+            row = bottom_base[product_index[request.product_id]]
+            for day, value in zip(request.dates, values):
+                row[date_index[day]] = value if value > 0 else 0.0
+
+    categories, aggregation = build_aggregation_matrix([category_id for _, category_id, _ in catalog], category_parents)
+    stock = np.array([stock for _, _, stock in catalog], dtype=np.float64)
+    daily_change = np.array([net_change.get(product_id, 0.0) for product_id in product_ids]) / lookback
+    horizons = np.array([(day - today).days for day in dates], dtype=np.float64)
+
+    def _reconcile():
+        aggregate_base = drift_forecast(aggregation @ stock, aggregation @ daily_change, horizons)
+        return (aggregate_base, *reconcile(bottom_base, aggregate_base, aggregation, method))
+
+    aggregate_base, bottom, aggregates = await run_in_threadpool(_reconcile)
+
+    def _series(node_id, base, reconciled) -> ReconciledSeries:
+        return ReconciledSeries(id=node_id, base=base.round(3).tolist(), reconciled=reconciled.round(3).tolist())
+
+    return ReconciledForecastReport(
+        store_id=store_id,
+        method=method,
+        dates=dates,
+        generated_at=datetime.now(timezone.utc),
+        store=_series(None, aggregate_base[0], aggregates[0]),
+        categories=[
+            _series(category_id, aggregate_base[row], aggregates[row])
+            for row, category_id in enumerate(categories, start=1)
+        ],
+        products=[_series(product_id, bottom_base[i], bottom[i]) for i, product_id in enumerate(product_ids)],
+    )
+
+async def get_monitoring_report() -> ModelMonitoringReport:
+    """
+    Rolling prediction error of the live model, overall and per store and
+    category. Every training sample is scored just before it is learned, so
+    these are honest out-of-sample errors.
+    """
+    engine = await get_engine()
+    metrics = await engine.metrics()
+    scopes = {
+        scope: sorted(
+            (
+                ErrorStats(**{**stats, "last_trained_at": datetime.fromtimestamp(stats["last_trained_at"], timezone.utc)})
+                for stats in entries
+            ),
+            key=lambda stats: stats.mae,
+            reverse=True,
+        )
+        for scope, entries in metrics["scopes"].items()
+    }
+    overall = scopes.get(SCOPE_GLOBAL) or [None]
+    return ModelMonitoringReport(
+        model_version=metrics["model_version"],
+        samples_learned=metrics["samples_learned"],
+        resident_models=metrics.get("resident_models", {}),
+        generated_at=datetime.now(timezone.utc),
+        overall=overall[0],
+        stores=scopes.get(SCOPE_STORE, []),
+        categories=scopes.get(SCOPE_CATEGORY, []),
+    )
+
+async def get_anomalies(
+    db: AsyncSession,
+    store_id: Optional[UUID],
+    since: Optional[datetime],
+    reason: Optional[str],
+    skip: int,
+    limit: int
+) -> List[TransactionAnomalyRead]:
+    """Flagged transactions, most recently detected first."""
+    anomalies = await crud.get_anomalies(db, store_id, since, reason, skip, limit)
+    return [TransactionAnomalyRead.model_validate(anomaly) for anomaly in anomalies]
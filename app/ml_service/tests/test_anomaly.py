@@ -0,0 +1,81 @@
+# /app/ml_service/tests/test_anomaly.py
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.ml_service.anomaly import AnomalyDetector, robust_zscore
+from app.ml_service.feature_store import DemandFeatureStore
+from app.ml_service.schemas import TransactionEvent
+from app.transaction_service.models import TransactionType
+
+STORE = uuid.uuid4()
+PRODUCT = uuid.uuid4()
+NOW = datetime(2024, 6, 30, 12, tzinfo=timezone.utc)
+
+
+def _event(transaction_type: TransactionType, quantity: int, at: datetime = NOW) -> TransactionEvent:
+    return TransactionEvent(
+        id=uuid.uuid4(),
+        store_id=STORE,
+        product_id=PRODUCT,
+        transaction_type=transaction_type,
+        quantity=quantity,
+        unit_price_at_sale=10.0,
+        timestamp=at,
+        new_stock_level=100,
+    )
+
+
+def _store_with_steady_demand(days: int = 20) -> DemandFeatureStore:
+    store = DemandFeatureStore()
+    # Sells 4, 5 or 6 units a day for the previous `days` days
+    for offset in range(1, days + 1):
+        store.record_sale(STORE, PRODUCT, (NOW - timedelta(days=offset)).date(), 4 + offset % 3)
+    return store
+
+
+def test_robust_zscore_ignores_earlier_outliers():
+    history = np.array([5.0] * 10 + [500.0])
+    z, median = robust_zscore(history, 5.0, min_scale=1.0)
+    assert median == 5.0
+    assert z == pytest.approx(0.0)
+
+
+def test_normal_sale_is_not_flagged():
+    store = _store_with_steady_demand()
+    detector = AnomalyDetector(store, threshold=6.0, min_active_days=5, min_scale=1.0)
+    event = _event(TransactionType.SALE, -5)
+    store.record(event)
+    assert detector.score(event) is None
+
+
+def test_sales_spike_is_flagged():
+    store = _store_with_steady_demand()
+    detector = AnomalyDetector(store, threshold=6.0, min_active_days=5, min_scale=1.0)
+    event = _event(TransactionType.SALE, -60)
+    store.record(event)
+
+    anomaly = detector.score(event)
+    assert anomaly is not None
+    assert anomaly.reason == "sales_spike"
+    assert anomaly.observed == 60.0
+    assert anomaly.expected == 5.0
+
+
+def test_large_adjustment_is_flagged_but_purchase_is_not():
+    store = _store_with_steady_demand()
+    detector = AnomalyDetector(store, threshold=6.0, min_active_days=5, min_scale=1.0)
+
+    anomaly = detector.score(_event(TransactionType.ADJUSTMENT, -40))
+    assert anomaly is not None and anomaly.reason == "large_adjustment"
+    assert detector.score(_event(TransactionType.PURCHASE, 500)) is None
+
+
+def test_pairs_without_enough_history_are_not_scored():
+    store = _store_with_steady_demand(days=3)
+    detector = AnomalyDetector(store, threshold=6.0, min_active_days=5, min_scale=1.0)
+    event = _event(TransactionType.SALE, -60)
+    store.record(event)
+    assert detector.score(event) is None
@@ -0,0 +1,70 @@
+# /app/ml_service/tests/test_feature_store.py
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+from app.ml_service.feature_store import DemandFeatureStore
+
+STORE = uuid.uuid4()
+PRODUCT = uuid.uuid4()
+TODAY = date(2024, 6, 30)
+
+
+def test_unknown_pair_has_empty_features():
+    features = DemandFeatureStore().features(STORE, PRODUCT, TODAY)
+    assert features["demand_velocity_7d"] == 0.0
+    assert features["days_since_last_sale"] == 28.0
+
+
+def test_velocity_and_variance_over_windows():
+    store = DemandFeatureStore()
+    # 2 units a day for the last 7 days, nothing before that
+    for offset in range(7):
+        store.record_sale(STORE, PRODUCT, TODAY - timedelta(days=offset), 2)
+
+    features = store.features(STORE, PRODUCT, TODAY)
+    assert features["demand_velocity_7d"] == pytest.approx(2.0)
+    assert features["demand_variance_7d"] == pytest.approx(0.0)
+    assert features["demand_velocity_14d"] == pytest.approx(1.0)
+    assert features["demand_variance_14d"] == pytest.approx(1.0)
+    assert features["demand_velocity_28d"] == pytest.approx(0.5)
+    assert features["days_since_last_sale"] == 0.0
+
+
+def test_days_roll_out_of_the_window():
+    store = DemandFeatureStore()
+    store.record_sale(STORE, PRODUCT, TODAY - timedelta(days=30), 10)
+    store.record_sale(STORE, PRODUCT, TODAY - timedelta(days=3), 4)
+
+    features = store.features(STORE, PRODUCT, TODAY)
+    assert features["demand_velocity_28d"] == pytest.approx(4 / 28)
+    assert features["days_since_last_sale"] == 3.0
+
+    # Reading later without new sales zeroes the stale cells
+    later = store.features(STORE, PRODUCT, TODAY + timedelta(days=40))
+    assert later["demand_velocity_28d"] == 0.0
+    assert later["days_since_last_sale"] == 28.0
+
+
+def test_rebuild_matches_incremental_updates():
+    rows = [(STORE, PRODUCT, TODAY - timedelta(days=offset), offset + 1) for offset in range(40)]
+
+    incremental = DemandFeatureStore()
+    for store_id, product_id, day, units in sorted(rows, key=lambda row: row[2]):
+        incremental.record_sale(store_id, product_id, day, units)
+
+    rebuilt = DemandFeatureStore()
+    rebuilt.rebuild(rows, today=TODAY)
+
+    assert rebuilt.features(STORE, PRODUCT, TODAY) == pytest.approx(incremental.features(STORE, PRODUCT, TODAY))
+
+
+def test_capacity_grows_with_new_pairs():
+    store = DemandFeatureStore(initial_capacity=2)
+    products = [uuid.uuid4() for _ in range(5)]
+    for units, product_id in enumerate(products, start=1):
+        store.record_sale(STORE, product_id, TODAY, units)
+
+    assert len(store) == 5
+    assert store.features(STORE, products[-1], TODAY)["demand_velocity_7d"] == pytest.approx(5 / 7)
@@ -0,0 +1,121 @@
+# /app/ml_service/tests/test_forecasts.py
+import uuid
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.ml_service import crud, services
+
+pytestmark = pytest.mark.asyncio
+
+STORE = uuid.uuid4()
+PRODUCT = uuid.uuid4()
+START = date(2026, 3, 1)
+
+
+class FakeEngine:
+    """Predicts `base - day offset` for every requested day (negative further out) and records requests."""
+
+    def __init__(self, base: float = 2.0):
+        self.base = base
+        self.requests = []
+
+    async def model_version(self):
+        return "v-test"
+
+    async def predict(self, requests):
+        self.requests.append(requests)
+        return [[self.base - (day - START).days for day in request.dates] for request in requests]
+
+
+class FakeSession:
+    def __init__(self):
+        self.commits = 0
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = FakeEngine()
+
+    async def get_engine():
+        return engine
+
+    monkeypatch.setattr(services, "get_engine", get_engine)
+    return engine
+
+
+async def test_stored_days_are_served_untouched_and_only_missing_days_are_scored(engine, monkeypatch):
+    stored = {START: 42.5, START + timedelta(days=2): 7.25}
+
+    async def get_forecasts(db, store_id, product_id, start_date, end_date):
+        return [SimpleNamespace(forecast_date=day, predicted_stock=value) for day, value in stored.items()]
+
+    monkeypatch.setattr(crud, "get_forecasts", get_forecasts)
+    response = await services.predict_stock_for_range(None, STORE, PRODUCT, START, START + timedelta(days=4))
+
+    assert [p.prediction_date for p in response.predictions] == [START + timedelta(days=i) for i in range(5)]
+    values = [p.predicted_stock for p in response.predictions]
+    # Days 0 and 2 come from stock_forecast; 1, 3 and 4 are scored in one request (1, -1, -2 clamped to 0)
+    assert values == [42.5, 1.0, 7.25, 0.0, 0.0]
+    [[request]] = engine.requests
+    assert request.dates == [START + timedelta(days=1), START + timedelta(days=3), START + timedelta(days=4)]
+
+
+async def test_fully_stored_range_does_not_touch_the_engine(monkeypatch):
+    async def get_engine():
+        raise AssertionError("the engine must not be used when every day is stored")
+
+    async def get_forecasts(db, store_id, product_id, start_date, end_date):
+        return [SimpleNamespace(forecast_date=START + timedelta(days=i), predicted_stock=float(i)) for i in range(3)]
+
+    monkeypatch.setattr(services, "get_engine", get_engine)
+    monkeypatch.setattr(crud, "get_forecasts", get_forecasts)
+    response = await services.predict_stock_for_range(None, STORE, PRODUCT, START, START + timedelta(days=2))
+    assert [p.predicted_stock for p in response.predictions] == [0.0, 1.0, 2.0]
+
+
+async def test_generate_forecasts_batches_pairs_and_upserts_clamped_rows(engine, monkeypatch):
+    pairs = [(STORE, uuid.uuid4()) for _ in range(5)]
+    upserts, deleted_before = [], []
+
+    async def get_active_store_products(db):
+        return pairs
+
+    async def delete_forecasts_before(db, day):
+        deleted_before.append(day)
+        return 3
+
+    async def upsert_forecasts(db, rows):
+        upserts.append(rows)
+
+    class Today(date):
+        @classmethod
+        def today(cls):
+            return START
+
+    monkeypatch.setattr(services, "date", Today)
+    monkeypatch.setattr(crud, "get_active_store_products", get_active_store_products)
+    monkeypatch.setattr(crud, "delete_forecasts_before", delete_forecasts_before)
+    monkeypatch.setattr(crud, "upsert_forecasts", upsert_forecasts)
+    db = FakeSession()
+
+    written = await services.generate_forecasts(db, horizon_days=4, batch_size=2)
+
+    assert written == 5 * 4
+    assert deleted_before == [START]
+    # Pairs are scored 2 at a time; the cleanup and every batch commit on their own
+    assert [len(batch) for batch in engine.requests] == [2, 2, 1]
+    assert [len(rows) for rows in upserts] == [8, 8, 4]
+    assert db.commits == 4
+
+    rows = [row for batch in upserts for row in batch]
+    assert [(row["store_id"], row["product_id"]) for row in rows[::4]] == pairs
+    assert [row["forecast_date"] for row in rows[:4]] == [START + timedelta(days=i) for i in range(4)]
+    # 2, 1, 0, -1 per pair, with the negative one clamped
+    assert [row["predicted_stock"] for row in rows[:4]] == [2.0, 1.0, 0.0, 0.0]
+    assert {row["model_version"] for row in rows} == {"v-test"}
+    assert len({row["generated_at"] for row in rows}) == 1
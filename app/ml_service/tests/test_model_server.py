@@ -0,0 +1,110 @@
+# /app/ml_service/tests/test_model_server.py
+import asyncio
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.ml_service.client import ModelServerClient
+from app.ml_service.model_server import ModelServer
+from app.ml_service.schemas import PredictionRequest, TransactionEvent
+from app.transaction_service.models import TransactionType
+
+pytestmark = pytest.mark.asyncio
+
+STORE = uuid.uuid4()
+PRODUCT = uuid.uuid4()
+
+
+class _Runtime:
+    version = 0
+    model_version = "test"
+
+
+class RecordingEngine:
+    """Stands in for LocalModelEngine: predicts a constant and records calls."""
+
+    def __init__(self, value: float):
+        self.value = value
+        self.runtime = _Runtime()
+        self.learned = []
+        self.predict_calls = 0
+
+    async def start(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def model_version(self):
+        return self.runtime.model_version
+
+    async def learn(self, events):
+        self.learned.extend(events)
+
+    async def predict(self, requests):
+        self.predict_calls += 1
+        return [[self.value] * len(request.dates) for request in requests]
+
+
+def _event(stock: int) -> TransactionEvent:
+    return TransactionEvent(
+        id=uuid.uuid4(),
+        store_id=STORE,
+        product_id=PRODUCT,
+        transaction_type=TransactionType.SALE,
+        quantity=-1,
+        unit_price_at_sale=10.0,
+        timestamp=datetime.now(timezone.utc),
+        new_stock_level=stock,
+    )
+
+
+def _request(days: int) -> PredictionRequest:
+    return PredictionRequest(
+        store_id=STORE, product_id=PRODUCT, dates=[date.today() + timedelta(days=d) for d in range(days)]
+    )
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return str(tmp_path / "ml.sock")
+
+
+async def test_concurrent_predictions_share_one_server_call(socket_path):
+    engine = RecordingEngine(3.0)
+    server = ModelServer(engine, socket_path)
+    await server.start()
+
+    fallback = RecordingEngine(-1.0)
+
+    async def fallback_factory():
+        return fallback
+
+    client = ModelServerClient(socket_path, fallback_factory, timeout=2.0, retry_after=1.0)
+    try:
+        await client.learn([_event(10), _event(9)])
+        results = await asyncio.gather(*(client.predict([_request(3)]) for _ in range(5)))
+    finally:
+        await client.close()
+        await server.stop()
+
+    assert results == [[[3.0, 3.0, 3.0]]] * 5
+    assert engine.predict_calls == 1
+    assert [event.new_stock_level for event in engine.learned] == [10, 9]
+    assert fallback.predict_calls == 0
+
+
+async def test_falls_back_to_local_engine_when_server_is_down(socket_path):
+    fallback = RecordingEngine(-1.0)
+
+    async def fallback_factory():
+        return fallback
+
+    client = ModelServerClient(socket_path, fallback_factory, timeout=0.5, retry_after=60.0)
+    assert await client.predict([_request(2)]) == [[-1.0, -1.0]]
+    await client.learn([_event(5)])
+    await client.close()
+
+    assert fallback.predict_calls == 1
+    assert len(fallback.learned) == 1
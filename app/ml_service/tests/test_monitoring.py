@@ -0,0 +1,61 @@
+# /app/ml_service/tests/test_monitoring.py
+import uuid
+
+import pytest
+
+from app.ml_service.monitoring import SCOPE_GLOBAL, SCOPE_STORE, ErrorMonitor
+
+STORE_A = uuid.uuid4()
+STORE_B = uuid.uuid4()
+
+
+def _by_id(report, scope):
+    return {entry["scope_id"]: entry for entry in report[scope]}
+
+
+def test_first_sample_initialises_stats():
+    monitor = ErrorMonitor(alpha=0.1, rate_window=60.0)
+    monitor.update([(SCOPE_GLOBAL, None)], y_true=10.0, y_pred=13.0, now=100.0)
+
+    [stats] = monitor.report(now=100.0)[SCOPE_GLOBAL]
+    assert stats["scope_id"] is None
+    assert stats["samples"] == 1
+    assert stats["mae"] == pytest.approx(3.0)
+    assert stats["bias"] == pytest.approx(3.0)
+    assert stats["last_trained_at"] == 100.0
+
+
+def test_errors_are_exponentially_weighted_and_signed():
+    monitor = ErrorMonitor(alpha=0.5, rate_window=60.0)
+    keys = [(SCOPE_GLOBAL, None)]
+    monitor.update(keys, y_true=10.0, y_pred=14.0, now=0.0)  # error +4
+    monitor.update(keys, y_true=10.0, y_pred=8.0, now=1.0)   # error -2
+
+    [stats] = monitor.report(now=1.0)[SCOPE_GLOBAL]
+    assert stats["mae"] == pytest.approx(3.0)
+    assert stats["bias"] == pytest.approx(1.0)
+
+
+def test_scopes_are_tracked_independently():
+    monitor = ErrorMonitor(alpha=0.5, rate_window=60.0)
+    monitor.update([(SCOPE_GLOBAL, None), (SCOPE_STORE, STORE_A)], y_true=0.0, y_pred=1.0, now=0.0)
+    monitor.update([(SCOPE_GLOBAL, None), (SCOPE_STORE, STORE_B)], y_true=0.0, y_pred=5.0, now=0.0)
+
+    report = monitor.report(now=0.0)
+    stores = _by_id(report, SCOPE_STORE)
+    assert stores[str(STORE_A)]["mae"] == pytest.approx(1.0)
+    assert stores[str(STORE_B)]["mae"] == pytest.approx(5.0)
+    assert report[SCOPE_GLOBAL][0]["samples"] == 2
+
+
+def test_rate_tracks_recent_throughput_and_decays_when_idle():
+    monitor = ErrorMonitor(alpha=0.1, rate_window=600.0)
+    keys = [(SCOPE_GLOBAL, None)]
+    # One sample a second for long enough to reach the steady state
+    for second in range(6000):
+        monitor.update(keys, y_true=0.0, y_pred=0.0, now=float(second))
+
+    busy = monitor.report(now=5999.0)[SCOPE_GLOBAL][0]["samples_per_minute"]
+    idle = monitor.report(now=5999.0 + 3600)[SCOPE_GLOBAL][0]["samples_per_minute"]
+    assert busy == pytest.approx(60.0, rel=0.01)
+    assert idle < 1.0
@@ -0,0 +1,79 @@
+# /app/ml_service/tests/test_reconciliation.py
+import uuid
+
+import numpy as np
+import pytest
+
+from app.ml_service.reconciliation import (
+    METHOD_BOTTOM_UP, METHOD_MINT, build_aggregation_matrix, drift_forecast, reconcile
+)
+
+PARENT = uuid.uuid4()
+CHILD = uuid.uuid4()
+OTHER = uuid.uuid4()
+PARENTS = {PARENT: None, CHILD: PARENT, OTHER: None}
+
+
+def test_products_count_towards_their_category_ancestors_and_the_store():
+    categories, aggregation = build_aggregation_matrix([CHILD, OTHER, None, PARENT], PARENTS)
+
+    assert categories == [CHILD, PARENT, OTHER]
+    np.testing.assert_array_equal(
+        aggregation.toarray(),
+        [
+            [1, 1, 1, 1],  # store
+            [1, 0, 0, 0],  # child
+            [1, 0, 0, 1],  # parent covers the child's product too
+            [0, 1, 0, 0],  # other
+        ],
+    )
+
+
+def test_bottom_up_sums_the_product_forecasts():
+    _, aggregation = build_aggregation_matrix([CHILD, CHILD, OTHER], PARENTS)
+    bottom_base = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+
+    bottom, aggregates = reconcile(bottom_base, np.zeros((4, 2)), aggregation, METHOD_BOTTOM_UP)
+
+    np.testing.assert_array_equal(bottom, bottom_base)
+    np.testing.assert_array_equal(aggregates, [[9, 12], [4, 6], [4, 6], [5, 6]])
+
+
+def test_mint_matches_the_dense_weighted_least_squares_solution():
+    rng = np.random.default_rng(0)
+    _, aggregation = build_aggregation_matrix([CHILD, CHILD, PARENT, OTHER, None], PARENTS)
+    bottom_base = rng.uniform(20, 40, size=(5, 3))
+    aggregate_base = aggregation @ bottom_base + rng.normal(0, 5, size=(4, 3))
+
+    bottom, aggregates = reconcile(bottom_base, aggregate_base, aggregation, METHOD_MINT)
+
+    # y~ = S (S' W^-1 S)^-1 S' W^-1 y^, with W = diag(products under each series)
+    summing = np.vstack([aggregation.toarray(), np.eye(5)])
+    weights = np.diag(1.0 / summing.sum(axis=1))
+    projection = np.linalg.solve(summing.T @ weights @ summing, summing.T @ weights)
+    expected = summing @ projection @ np.vstack([aggregate_base, bottom_base])
+    np.testing.assert_allclose(bottom, expected[4:])
+    np.testing.assert_allclose(aggregates, expected[:4])
+
+
+def test_reconciled_products_are_never_negative_and_stay_coherent():
+    _, aggregation = build_aggregation_matrix([OTHER, OTHER], PARENTS)
+    bottom, aggregates = reconcile(np.array([[0.0], [10.0]]), np.array([[0.0], [0.0]]), aggregation)
+
+    assert (bottom >= 0).all()
+    np.testing.assert_allclose(aggregates, aggregation @ bottom)
+
+
+def test_empty_store_and_unknown_method():
+    _, aggregation = build_aggregation_matrix([], PARENTS)
+    bottom, aggregates = reconcile(np.zeros((0, 2)), np.ones((1, 2)), aggregation)
+    assert bottom.shape == (0, 2)
+    np.testing.assert_array_equal(aggregates, [[0, 0]])
+
+    with pytest.raises(ValueError):
+        reconcile(np.zeros((0, 2)), np.ones((1, 2)), aggregation, "top_down")
+
+
+def test_drift_forecast_moves_by_the_daily_change_and_floors_at_zero():
+    forecast = drift_forecast(np.array([10.0, 3.0]), np.array([2.0, -1.0]), np.array([1.0, 5.0]))
+    np.testing.assert_array_equal(forecast, [[12, 20], [2, 0]])
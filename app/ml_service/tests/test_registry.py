@@ -0,0 +1,116 @@
+# /app/ml_service/tests/test_registry.py
+import pickle
+import uuid
+
+from app.ml_service.registry import ModelRegistry, RegistrySnapshot
+
+PARENT = uuid.uuid4()
+CATEGORY = uuid.uuid4()
+OTHER_CATEGORY = uuid.uuid4()
+
+
+class MeanModel:
+    """Predicts the mean of the targets it has learned."""
+
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+
+    def learn_one(self, features, target):
+        self.total += target
+        self.count += 1
+
+    def predict_one(self, features):
+        return self.total / self.count if self.count else 0.0
+
+
+def _registry(**kwargs) -> ModelRegistry:
+    registry = ModelRegistry(model_factory=MeanModel, **{"promote_after": 3, "max_product_models": 2, **kwargs})
+    registry.set_category_parents({CATEGORY: PARENT, PARENT: None, OTHER_CATEGORY: None})
+    return registry
+
+
+def test_category_model_starts_from_global_prior():
+    registry = _registry()
+    other = uuid.uuid4()
+    for _ in range(4):
+        registry.learn_one({}, 10.0, (other, OTHER_CATEGORY))
+    registry.learn_one({}, 50.0, (uuid.uuid4(), CATEGORY))
+
+    # The new category copied the global model (4 x 10) before learning 50
+    assert registry.category_models[CATEGORY].count == 5
+    assert registry.category_models[CATEGORY].predict_one({}) == 18.0
+    assert registry.global_model.count == 5
+
+
+def test_products_fall_back_to_category_until_promoted():
+    registry = _registry()
+    product = uuid.uuid4()
+    for _ in range(2):
+        registry.learn_one({}, 5.0, (product, CATEGORY))
+    assert product not in registry.product_models
+    assert registry.predict_one({}, (product, CATEGORY)) == 5.0
+
+    registry.learn_one({}, 5.0, (product, CATEGORY))
+    assert product in registry.product_models
+    # Promoted as a copy of its category model, then trained on its own samples
+    registry.learn_one({}, 9.0, (product, CATEGORY))
+    assert registry.product_models[product].count == 4
+    assert registry.category_models[CATEGORY].count == 4
+
+
+def test_least_recently_trained_product_model_is_evicted():
+    registry = _registry()
+    products = [uuid.uuid4() for _ in range(3)]
+    for product in products:
+        for _ in range(3):
+            registry.learn_one({}, 1.0, (product, CATEGORY))
+
+    assert list(registry.product_models) == products[1:]
+    # The evicted product has to earn promotion again
+    assert registry.product_samples[products[0]] == 0
+    assert registry.model_counts == {"global": 1, "category": 1, "product": 2}
+
+
+def test_unknown_category_falls_back_to_ancestors_then_global():
+    registry = _registry()
+    registry.learn_one({}, 7.0, (None, PARENT))
+    snapshot = registry.snapshot()
+
+    assert snapshot.resolve((None, CATEGORY)) is snapshot.category_models[PARENT]
+    assert snapshot.resolve((uuid.uuid4(), None)) is snapshot.global_model
+
+
+def test_snapshots_only_copy_models_trained_since_the_last_one():
+    registry = _registry()
+    registry.learn_one({}, 1.0, (None, CATEGORY))
+    registry.learn_one({}, 1.0, (None, OTHER_CATEGORY))
+    first = registry.snapshot()
+    assert first.category_models[CATEGORY] is not registry.category_models[CATEGORY]
+
+    registry.learn_one({}, 2.0, (None, CATEGORY))
+    second = registry.snapshot()
+    assert second.category_models[OTHER_CATEGORY] is first.category_models[OTHER_CATEGORY]
+    assert second.category_models[CATEGORY] is not first.category_models[CATEGORY]
+    # Snapshots are frozen: training again does not change published models
+    registry.learn_one({}, 100.0, (None, CATEGORY))
+    assert second.category_models[CATEGORY].count == 2
+
+
+def test_restores_saved_snapshots_and_legacy_single_models():
+    registry = _registry()
+    product = uuid.uuid4()
+    for _ in range(3):
+        registry.learn_one({}, 4.0, (product, CATEGORY))
+    saved = pickle.loads(pickle.dumps(registry.snapshot()))
+    assert isinstance(saved, RegistrySnapshot)
+
+    restored = ModelRegistry.from_saved(saved, model_factory=MeanModel)
+    assert restored.predict_one({}, (product, CATEGORY)) == 4.0
+    assert restored.category_parents[CATEGORY] == PARENT
+
+    legacy = MeanModel()
+    legacy.learn_one({}, 3.0)
+    restored = ModelRegistry.from_saved(legacy, model_factory=MeanModel)
+    assert restored.global_model is legacy
+    assert restored.model_counts == {"global": 1, "category": 0, "product": 0}
@@ -0,0 +1,130 @@
+# /app/ml_service/tests/test_runtime.py
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import Dict
+
+import pytest
+
+from app.ml_service import runtime as runtime_module
+from app.ml_service.runtime import ModelRuntime
+
+pytestmark = pytest.mark.asyncio
+
+
+@dataclass(frozen=True)
+class FrozenSnapshot:
+    """What a published copy looks like to readers: the sample count and a checksum of it."""
+    samples: int
+    checksum: int
+    category_models: Dict = field(default_factory=dict)
+    product_models: Dict = field(default_factory=dict)
+
+    def predict_one(self, features, route):
+        # A torn model (samples and checksum out of step) would show up here
+        return float(self.samples) if self.checksum == self.samples * 2 else -1.0
+
+
+class SlowRegistry:
+    """
+    A live model whose update happens in two steps, with an optional pause
+    in between, so a test can hold the writer mid-update.
+    """
+
+    def __init__(self):
+        self.samples = 0
+        self.checksum = 0
+        self.pause = threading.Event()
+        self.pause.set()
+        self.paused = threading.Event()
+
+    def learn_one(self, features, target, route):
+        self.samples += 1
+        if not self.pause.is_set():
+            self.paused.set()
+            self.pause.wait()
+        self.checksum = self.samples * 2
+
+    def predict_one(self, features, route):
+        return float(self.samples)
+
+    def snapshot(self):
+        return FrozenSnapshot(self.samples, self.checksum)
+
+    def set_category_parents(self, parents):
+        pass
+
+
+@pytest.fixture
+def saved(monkeypatch):
+    snapshots = []
+
+    def save_model(snapshot):
+        snapshots.append(snapshot)
+        return repr(snapshot).encode()
+
+    monkeypatch.setattr(runtime_module, "save_model", save_model)
+    return snapshots
+
+
+async def _predict(runtime: ModelRuntime) -> float:
+    [value] = await runtime.predict_many([{}])
+    return value
+
+
+async def test_predictions_read_the_published_copy_not_the_model_being_trained(saved):
+    registry = SlowRegistry()
+    runtime = ModelRuntime(registry, publish_every=1, publish_interval=3600, predict_workers=1)
+    await runtime.learn({}, 1.0)
+    assert await _predict(runtime) == 1.0
+
+    # Hold the writer half-way through the next update
+    registry.pause.clear()
+    learning = asyncio.ensure_future(runtime.learn({}, 1.0))
+    assert await asyncio.to_thread(registry.paused.wait, 2)
+    assert (registry.samples, registry.checksum) == (2, 2)
+
+    # Readers do not wait for the writer and still see the last complete copy
+    assert await asyncio.wait_for(_predict(runtime), timeout=1) == 1.0
+
+    registry.pause.set()
+    await learning
+    assert await _predict(runtime) == 2.0
+    await runtime.shutdown()
+
+
+async def test_a_copy_is_published_after_n_samples(saved):
+    runtime = ModelRuntime(SlowRegistry(), publish_every=3, publish_interval=3600, predict_workers=1)
+    for _ in range(2):
+        await runtime.learn({}, 1.0)
+    assert await _predict(runtime) == 0.0 and runtime.version == 0
+
+    await runtime.learn({}, 1.0)
+    assert await _predict(runtime) == 3.0
+    assert runtime.version == 3
+    assert saved[-1].samples == 3
+    await runtime.shutdown()
+
+
+async def test_a_copy_is_published_after_t_seconds_even_when_idle(saved):
+    runtime = ModelRuntime(SlowRegistry(), publish_every=1000, publish_interval=0.05, predict_workers=1)
+    runtime.start()
+    await runtime.learn({}, 1.0)
+    assert await _predict(runtime) == 0.0
+
+    # No further samples: the background publisher flushes the pending one
+    await asyncio.sleep(0.15)
+    assert await _predict(runtime) == 1.0
+    await runtime.shutdown()
+
+
+async def test_shutdown_applies_queued_training_before_stopping(saved):
+    runtime = ModelRuntime(SlowRegistry(), publish_every=1000, publish_interval=3600, predict_workers=1)
+    futures = [runtime.submit_learn({}, 1.0) for _ in range(25)]
+
+    await runtime.shutdown()
+
+    assert all(future.done() for future in futures)
+    assert runtime.samples_learned == 25
+    assert runtime.snapshot.samples == 25
+    assert saved[-1].samples == 25
@@ -6,7 +6,7 @@ from fastapi import Depends, status, APIRouter, Request
 from core.database import get_db_session
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.user_service.dependencies import get_current_active_user, require_role
-from app.user_service.models import User
+from app.user_service.principal import Principal
 from . import schemas, services
 
 router = APIRouter()
@@ -22,7 +22,7 @@ async def create_product(
     product_in: schemas.ProductCreate,
     request: Request,
     db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Adds a new product to the system.
@@ -69,7 +69,7 @@ async def update_product(
     product_in: schemas.ProductUpdate,
     request: Request,
     db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Updates the details of an existing product.
@@ -86,7 +86,7 @@ async def delete_product(
     product_id: uuid.UUID,
     request: Request,
     db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Soft-deletes a product from the system. The data is not permanently removed.
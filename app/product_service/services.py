@@ -2,7 +2,6 @@
 
 import uuid
 import logging
-import json
 from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
@@ -12,7 +11,7 @@ from app.product_service import crud, models, schemas
 from app.category_service.crud import get as get_category
 from core.exceptions import ConflictException, NotFoundException, BadRequestException
 from core.utils import generate_acronym
-from app.user_service.models import User
+from app.user_service.principal import Principal
 from app.audit_log_service.services import AuditLogger
 
 logger = logging.getLogger(__name__)
@@ -56,7 +55,7 @@ async def _generate_sku(db: AsyncSession, product_name: str, category_id: uuid.U
 
 # The rest of the service functions remain the same...
 
-async def create_product(db: AsyncSession, product_in: schemas.ProductCreate, current_user: User, request: Request) -> schemas.Product:
+async def create_product(db: AsyncSession, product_in: schemas.ProductCreate, current_user: Principal, request: Request) -> schemas.Product:
     """
     Business logic to create a new product, including SKU generation and audit logging.
     """
@@ -80,7 +79,7 @@ async def create_product(db: AsyncSession, product_in: schemas.ProductCreate, cu
             action="CREATE_PRODUCT",
             entity_type="Product",
             entity_id=str(product_schema.id),
-            after=json.loads(product_schema.model_dump_json())
+            after=product_schema
         )
 
         return product_schema
@@ -100,21 +99,19 @@ async def get_all_products(db: AsyncSession,  skip: int, limit: int) -> List[sch
     products = await crud.get_all(db=db, skip=skip, limit=limit)
     return [schemas.Product.model_validate(p) for p in products]
 
-async def update_product(db: AsyncSession, product_id: uuid.UUID, product_in: schemas.ProductUpdate, current_user: User, request: Request) -> schemas.Product:
+async def update_product(db: AsyncSession, product_id: uuid.UUID, product_in: schemas.ProductUpdate, current_user: Principal, request: Request) -> schemas.Product:
     """Business logic to update a product and log the action."""
     db_product = await crud.get_by_id(db, product_id=product_id)
     if not db_product:
         raise NotFoundException(resource="Product", resource_id=str(product_id))
     
     before_schema = schemas.Product.model_validate(db_product)
-    before_state = json.loads(before_schema.model_dump_json())
     
     try:
         updated_product_model = await crud.update(db=db, db_product=db_product, product_in=product_in, user_id=current_user.id)
         logger.info(f"Product '{product_id}' updated.")
         
         after_schema = schemas.Product.model_validate(updated_product_model)
-        after_state = json.loads(after_schema.model_dump_json())
 
         # --- Audit Log for Product Update ---
         audit_logger = AuditLogger(db, current_user=current_user, request=request)
@@ -122,26 +119,24 @@ async def update_product(db: AsyncSession, product_id: uuid.UUID, product_in: sc
             action="UPDATE_PRODUCT",
             entity_type="Product",
             entity_id=str(product_id),
-            before=before_state,
-            after=after_state
+            before=before_schema,
+            after=after_schema
         )
         return after_schema
     except IntegrityError:
         await db.rollback()
         raise ConflictException(detail="Update failed. A product with the same name and category may already exist.")
 
-async def delete_product(db: AsyncSession, product_id: uuid.UUID, current_user: User, request: Request) -> None:
+async def delete_product(db: AsyncSession, product_id: uuid.UUID, current_user: Principal, request: Request) -> None:
     """Business logic to soft-delete a product and log the action."""
     db_product = await crud.get_by_id(db, product_id=product_id)
     if not db_product:
         raise NotFoundException(resource="Product", resource_id=str(product_id))
 
     before_schema = schemas.Product.model_validate(db_product)
-    before_state = json.loads(before_schema.model_dump_json())
     
     deleted_product_model = await crud.deactivate(db=db, db_product=db_product, user_id=current_user.id)
     after_schema = schemas.Product.model_validate(deleted_product_model)
-    after_state = json.loads(after_schema.model_dump_json())
 
     # --- Audit Log for Product Deactivation ---
     audit_logger = AuditLogger(db, current_user=current_user, request=request)
@@ -149,8 +144,8 @@ async def delete_product(db: AsyncSession, product_id: uuid.UUID, current_user:
         action="DEACTIVATE_PRODUCT",
         entity_type="Product",
         entity_id=str(product_id),
-        before=before_state,
-        after=after_state
+        before=before_schema,
+        after=after_schema
     )
 
     logger.info(f"Product '{product_id}' soft-deleted.")
\ No newline at end of file
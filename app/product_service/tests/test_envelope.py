@@ -0,0 +1,93 @@
+# /app/product_service/tests/test_envelope.py
+import uuid
+from datetime import datetime
+from typing import List
+
+import pytest
+from fastapi import FastAPI, Response, status
+from httpx import ASGITransport, AsyncClient
+
+from app.product_service import schemas
+from core.router import StandardAPIRouter
+from core.schemas import SuccessResponse
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_products(count: int) -> List[schemas.Product]:
+    now = datetime(2026, 1, 1, 12, 0, 0)
+    return [
+        schemas.Product(
+            id=uuid.uuid4(), name=f"Product é {i}", category_id=uuid.uuid4(), description=None,
+            sku=f"SKU-{i:04d}", created_at=now, updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+PRODUCTS = make_products(3)
+
+
+def build_app() -> FastAPI:
+    router = StandardAPIRouter()
+
+    @router.get("/products", response_model=List[schemas.Product])
+    async def list_products():
+        return PRODUCTS
+
+    @router.post("/products", status_code=status.HTTP_201_CREATED, response_model=schemas.Product)
+    async def create_product(response: Response):
+        response.headers["X-Next-Cursor"] = "abc"
+        return PRODUCTS[0]
+
+    @router.get("/wrapped")
+    async def already_wrapped():
+        return {"status": "success", "data": [1, 2]}
+
+    @router.get("/status-later")
+    async def status_not_first():
+        return {"data": 1, "status": "success"}
+
+    @router.get("/nothing")
+    async def nothing():
+        return None
+
+    @router.delete("/products", status_code=status.HTTP_204_NO_CONTENT)
+    async def delete_products():
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+async def get(method: str, path: str):
+    async with AsyncClient(transport=ASGITransport(app=build_app()), base_url="http://test") as client:
+        return await client.request(method, path)
+
+
+async def test_list_is_wrapped_like_success_response():
+    response = await get("GET", "/products")
+    expected = SuccessResponse(data=[product.model_dump(mode="json") for product in PRODUCTS]).model_dump(by_alias=True)
+    assert response.status_code == 200
+    assert response.json() == expected
+    assert response.content.startswith(b'{"status":"success","data":[')
+    assert int(response.headers["content-length"]) == len(response.content)
+
+
+async def test_status_and_headers_are_kept():
+    response = await get("POST", "/products")
+    assert response.status_code == 201
+    assert response.headers["x-next-cursor"] == "abc"
+    assert response.json()["data"]["sku"] == PRODUCTS[0].sku
+
+
+async def test_already_wrapped_bodies_are_not_wrapped_again():
+    assert (await get("GET", "/wrapped")).json() == {"status": "success", "data": [1, 2]}
+    assert (await get("GET", "/status-later")).json() == {"data": 1, "status": "success"}
+
+
+async def test_none_and_no_content():
+    assert (await get("GET", "/nothing")).json() == {"status": "success", "data": None}
+    response = await get("DELETE", "/products")
+    assert response.status_code == 204 and response.content == b""
@@ -3,7 +3,7 @@ import uuid
 from typing import List
 from fastapi import APIRouter, Depends, status, Response, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.user_service.models import User
+from app.user_service.principal import Principal
 from core.database import get_db_session
 from . import schemas, services
 from app.user_service.dependencies import get_current_active_user, require_role
@@ -21,7 +21,7 @@ async def link_product_to_store(
     mapping_in: schemas.StoreProductCreate, 
     request: Request,
     db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Creates a new link between a product and a store, defining its price,
@@ -57,7 +57,7 @@ async def update_linked_product_details(
     update_data: schemas.StoreProductUpdate, 
     request: Request,
     db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Updates a linked product's price, stock, or other store-specific details.
@@ -75,7 +75,7 @@ async def unlink_product_from_store(
     product_id: uuid.UUID, 
     request: Request,
     db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Deactivates the link between a product and a store.
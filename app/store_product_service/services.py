@@ -1,6 +1,5 @@
 # /app/store_product_service/services.py
 import uuid
-import json
 from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
@@ -11,9 +10,9 @@ from app.product_service.crud import get_by_id as get_product_by_id
 from app.store_service.crud import get as get_store
 from core.exceptions import ConflictException, NotFoundException, BadRequestException
 from app.audit_log_service.services import AuditLogger
-from app.user_service.models import User
+from app.user_service.principal import Principal
 
-async def link(db: AsyncSession, mapping_in: schemas.StoreProductCreate, current_user: User, request: Request) -> schemas.StoreProductOut:
+async def link(db: AsyncSession, mapping_in: schemas.StoreProductCreate, current_user: Principal, request: Request) -> schemas.StoreProductOut:
     """
     Links a product to a store and creates an audit log for the action.
     """
@@ -38,7 +37,7 @@ async def link(db: AsyncSession, mapping_in: schemas.StoreProductCreate, current
             action="LINK_PRODUCT_TO_STORE",
             entity_type="StoreProduct",
             entity_id=str(created_schema.id),
-            after=json.loads(created_schema.model_dump_json())
+            after=created_schema
         )
         
         return created_schema
@@ -53,19 +52,17 @@ async def get_products_in_store(db: AsyncSession, store_id: uuid.UUID, skip: int
     return [schemas.StoreProductOut.model_validate(sp) for sp in store_products]
 
 
-async def update_linked_product_details(db: AsyncSession, store_id: uuid.UUID, product_id: uuid.UUID, update_data: schemas.StoreProductUpdate, current_user: User, request: Request) -> schemas.StoreProductOut:
+async def update_linked_product_details(db: AsyncSession, store_id: uuid.UUID, product_id: uuid.UUID, update_data: schemas.StoreProductUpdate, current_user: Principal, request: Request) -> schemas.StoreProductOut:
     """Updates the details of a product within a store and logs the changes."""
     db_mapping = await crud.get_by_composite_key(db, store_id, product_id)
     if not db_mapping:
         raise NotFoundException(resource="Store-Product Link", resource_id=f"store:{store_id}, product:{product_id}")
     
     before_schema = schemas.StoreProductOut.model_validate(db_mapping)
-    before_state = json.loads(before_schema.model_dump_json())
 
     updated_mapping_model = await crud.update(db, db_mapping, update_data)
     
     after_schema = schemas.StoreProductOut.model_validate(updated_mapping_model)
-    after_state = json.loads(after_schema.model_dump_json())
 
     # --- Audit Log for Link Update ---
     audit_logger = AuditLogger(db, current_user=current_user, request=request)
@@ -73,14 +70,14 @@ async def update_linked_product_details(db: AsyncSession, store_id: uuid.UUID, p
         action="UPDATE_STORE_PRODUCT_LINK",
         entity_type="StoreProduct",
         entity_id=str(db_mapping.id),
-        before=before_state,
-        after=after_state
+        before=before_schema,
+        after=after_schema
     )
 
     return after_schema
 
 
-async def unlink(db: AsyncSession, store_id: uuid.UUID, product_id: uuid.UUID, current_user: User, request: Request) -> None:
+async def unlink(db: AsyncSession, store_id: uuid.UUID, product_id: uuid.UUID, current_user: Principal, request: Request) -> None:
     """Deactivates the link between a product and a store and logs the action."""
     db_mapping = await crud.get_by_composite_key(db, store_id, product_id)
     if not db_mapping:
@@ -90,7 +87,6 @@ async def unlink(db: AsyncSession, store_id: uuid.UUID, product_id: uuid.UUID, c
         )
 
     before_schema = schemas.StoreProductOut.model_validate(db_mapping)
-    before_state = json.loads(before_schema.model_dump_json())
 
     if db_mapping.stock > 0:
         raise ConflictException(
@@ -106,7 +102,6 @@ async def unlink(db: AsyncSession, store_id: uuid.UUID, product_id: uuid.UUID, c
     # Re-fetch to get the deactivated state for the audit log
     deactivated_mapping = await crud.get_by_id(db, db_mapping.id) 
     after_schema = schemas.StoreProductOut.model_validate(deactivated_mapping)
-    after_state = json.loads(after_schema.model_dump_json())
 
     # --- Audit Log for Link Deactivation ---
     audit_logger = AuditLogger(db, current_user=current_user, request=request)
@@ -114,6 +109,6 @@ async def unlink(db: AsyncSession, store_id: uuid.UUID, product_id: uuid.UUID, c
         action="DEACTIVATE_STORE_PRODUCT_LINK",
         entity_type="StoreProduct",
         entity_id=str(db_mapping.id),
-        before=before_state,
-        after=after_state
+        before=before_schema,
+        after=after_schema
     )
\ No newline at end of file
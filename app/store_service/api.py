@@ -7,7 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from core.database import get_db_session
 from . import schemas, services
 from app.user_service.dependencies import get_current_active_user, require_role
-from app.user_service.models import User
+from app.user_service.principal import Principal
 
 router = APIRouter()
 
@@ -22,7 +22,7 @@ async def create_store(
     store_in: schemas.StoreCreate,
     request: Request,
     db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """Create a new store. Requires 'admin' or 'super_admin' role."""
     return await services.create_store(db=db, store_in=store_in, current_user=current_user, request=request)
@@ -63,7 +63,7 @@ async def update_store(
     store_in: schemas.StoreUpdate,
     request: Request,
     db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user), # Get the user here
+    current_user: Principal = Depends(get_current_active_user), # Get the user here
 ):
     """Update a specific store by its ID. Requires 'admin' or 'super_admin' role."""
     return await services.update_store(db=db, store_id=store_id, store_in=store_in, current_user=current_user, request=request)
@@ -78,7 +78,7 @@ async def deactivate_store(
     store_id: uuid.UUID,
     request: Request,
     db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     """
     Deactivates a store. This is a soft delete. Requires 'super_admin' role.
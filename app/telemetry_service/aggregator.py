@@ -0,0 +1,155 @@
+# /app/telemetry_service/aggregator.py
+import math
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Latency histogram buckets start at 0.1 ms and grow by 10% each, so any
+# percentile read from them is within 5% of the exact value, and a minute
+# of traffic for one route takes a few dozen integers however busy it is.
+_BUCKET_BASE_MS = 0.1
+_BUCKET_GROWTH = 1.1
+_LOG_GROWTH = math.log(_BUCKET_GROWTH)
+
+PERCENTILES = {"p50_ms": 0.50, "p95_ms": 0.95, "p99_ms": 0.99}
+
+
+def latency_bucket(duration_ms: float) -> int:
+    if duration_ms <= _BUCKET_BASE_MS:
+        return 0
+    return math.ceil(math.log(duration_ms / _BUCKET_BASE_MS) / _LOG_GROWTH)
+
+
+def bucket_upper_ms(bucket: int) -> float:
+    """Upper bound of a bucket; used as the value of every request in it."""
+    return _BUCKET_BASE_MS * _BUCKET_GROWTH ** bucket
+
+
+def histogram_percentile(histogram: Dict[int, int], quantile: float) -> float:
+    total = sum(histogram.values())
+    if not total:
+        return 0.0
+    rank = quantile * total
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= rank:
+            return bucket_upper_ms(bucket)
+    return bucket_upper_ms(max(histogram))
+
+
+def status_class(status_code: int) -> str:
+    return f"{status_code // 100}xx"
+
+
+class RouteStats:
+    """Counters for one route over one minute."""
+
+    __slots__ = ("count", "error_count", "status_counts", "total_ms", "max_ms", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.error_count = 0
+        self.status_counts: Dict[str, int] = {}
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram: Dict[int, int] = {}
+
+    def add(self, status_code: int, duration_ms: float) -> None:
+        self.count += 1
+        if status_code >= 500:
+            self.error_count += 1
+        key = status_class(status_code)
+        self.status_counts[key] = self.status_counts.get(key, 0) + 1
+        self.total_ms += duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+        bucket = latency_bucket(duration_ms)
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def merge_row(self, row: Dict[str, Any]) -> None:
+        """Adds a stored `request_metrics` row (or its dict) into these counters."""
+        self.count += row["count"]
+        self.error_count += row["error_count"]
+        for key, count in row["status_counts"].items():
+            self.status_counts[key] = self.status_counts.get(key, 0) + count
+        self.total_ms += row["total_ms"]
+        self.max_ms = max(self.max_ms, row["max_ms"])
+        for bucket, count in row["latency_histogram"].items():
+            bucket = int(bucket)
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + count
+
+    def to_row(self) -> Dict[str, Any]:
+        row = {
+            "count": self.count,
+            "error_count": self.error_count,
+            "status_counts": dict(self.status_counts),
+            "total_ms": round(self.total_ms, 3),
+            "max_ms": round(self.max_ms, 3),
+            # JSON object keys are strings
+            "latency_histogram": {str(bucket): count for bucket, count in self.histogram.items()},
+        }
+        for name, quantile in PERCENTILES.items():
+            row[name] = round(histogram_percentile(self.histogram, quantile), 3)
+        return row
+
+
+class RequestMetricsAggregator:
+    """
+    Per-minute, per-route request counters, kept in memory by one process.
+
+    `record()` is a few dict updates, so it can run on every request.
+    `drain()` hands back finished minutes as `request_metrics` rows, and
+    forgets them.
+    """
+
+    def __init__(self, instance: str):
+        self.instance = instance
+        self._minutes: Dict[int, Dict[Tuple[str, str], RouteStats]] = {}
+
+    def record(self, method: str, route: str, status_code: int, duration_ms: float, now: float) -> None:
+        """`now` is a Unix timestamp; the request counts towards its minute."""
+        routes = self._minutes.setdefault(int(now // 60), {})
+        stats = routes.get((method, route))
+        if stats is None:
+            stats = routes[(method, route)] = RouteStats()
+        stats.add(status_code, duration_ms)
+
+    def drain(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Rows for every minute that ended before `now`, or for every minute
+        including the current one when `now` is None (on shutdown).
+        """
+        current = int(now // 60) if now is not None else None
+        rows = []
+        for minute in sorted(self._minutes):
+            if current is not None and minute >= current:
+                continue
+            started_at = datetime.fromtimestamp(minute * 60, timezone.utc)
+            for (method, route), stats in self._minutes.pop(minute).items():
+                rows.append({
+                    "minute": started_at,
+                    "instance": self.instance,
+                    "method": method,
+                    "route": route,
+                    **stats.to_row(),
+                })
+        return rows
+
+
+def merge_rows(rows: Iterable[Dict[str, Any]], by_minute: bool = True) -> List[Dict[str, Any]]:
+    """
+    Merges stored rows across processes (and minutes, unless `by_minute`)
+    into one row per (minute, method, route), recomputing the percentiles
+    from the combined histograms.
+    """
+    merged: Dict[Tuple[Optional[datetime], str, str], RouteStats] = {}
+    for row in rows:
+        key = (row["minute"] if by_minute else None, row["method"], row["route"])
+        stats = merged.get(key)
+        if stats is None:
+            stats = merged[key] = RouteStats()
+        stats.merge_row(row)
+    return [
+        {"minute": minute, "method": method, "route": route, **stats.to_row()}
+        for (minute, method, route), stats in merged.items()
+    ]
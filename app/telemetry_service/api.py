@@ -0,0 +1,36 @@
+# /app/telemetry_service/api.py
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.database import get_db_session
+from app.user_service.dependencies import require_role
+from . import schemas, services
+
+router = APIRouter()
+
+
+@router.get(
+    "/requests",
+    response_model=List[schemas.RequestMetricsOut],
+    summary="Per-route request counts and latency percentiles",
+    dependencies=[Depends(require_role(["admin", "super_admin"]))],
+)
+async def get_request_metrics(
+    since: Optional[datetime] = Query(None, description="Start of the range. Defaults to one hour ago."),
+    until: Optional[datetime] = Query(None, description="End of the range (exclusive). Defaults to now."),
+    route: Optional[str] = Query(None, description="Route path template, e.g. /api/v1/products/{product_id}."),
+    method: Optional[str] = Query(None, description="HTTP method."),
+    by_minute: bool = Query(True, description="One entry per route and minute, or one per route for the whole range."),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """
+    Request count, status mix and p50/p95/p99 latency per route, from the
+    per-minute counters every API process writes. The current minute
+    appears once it is over.
+    """
+    if since is None:
+        since = datetime.now(timezone.utc) - timedelta(hours=1)
+    return await services.get_request_metrics(db, since, until, route, method, by_minute)
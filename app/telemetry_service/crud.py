@@ -0,0 +1,43 @@
+# /app/telemetry_service/crud.py
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from .models import RequestMetrics
+
+# Rows per INSERT; keeps each statement under asyncpg's 32767 bind parameter limit.
+_INSERT_CHUNK_ROWS = 2000
+
+
+async def create_request_metrics(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """Writes a flush of per-minute counters with multi-row INSERTs."""
+    for offset in range(0, len(rows), _INSERT_CHUNK_ROWS):
+        await db.execute(insert(RequestMetrics).values(rows[offset:offset + _INSERT_CHUNK_ROWS]))
+
+
+async def get_request_metrics(
+    db: AsyncSession,
+    since: datetime,
+    until: Optional[datetime],
+    route: Optional[str],
+    method: Optional[str],
+) -> List[Dict[str, Any]]:
+    """Stored per-minute rows in a time range, as plain dicts; a primary key range scan."""
+    statement = select(RequestMetrics.__table__).where(RequestMetrics.minute >= since)
+    if until:
+        statement = statement.where(RequestMetrics.minute < until)
+    if route:
+        statement = statement.where(RequestMetrics.route == route)
+    if method:
+        statement = statement.where(RequestMetrics.method == method.upper())
+    result = await db.execute(statement.order_by(RequestMetrics.minute))
+    return [dict(row) for row in result.mappings().all()]
+
+
+async def delete_request_metrics_before(db: AsyncSession, cutoff: datetime) -> int:
+    result = await db.execute(delete(RequestMetrics).where(RequestMetrics.minute < cutoff))
+    return result.rowcount
@@ -0,0 +1,37 @@
+# /app/telemetry_service/models.py
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy import Column, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+
+class RequestMetrics(SQLModel, table=True):
+    """
+    Request counters and latency percentiles for one route, one minute and
+    one API process. Written once per completed minute, not per request.
+    """
+    __tablename__ = "request_metrics"
+
+    minute: datetime = Field(sa_column=Column(DateTime(timezone=True), primary_key=True))
+    instance: str = Field(primary_key=True, max_length=64, description="API process (host:pid:start) that served the requests.")
+    method: str = Field(primary_key=True, max_length=8)
+    route: str = Field(primary_key=True, max_length=255, description="Route path template, e.g. /api/v1/products/{product_id}.")
+
+    count: int
+    error_count: int = Field(description="Responses with a 5xx status.")
+    status_counts: Dict[str, int] = Field(default_factory=dict, sa_column=Column(JSONB, nullable=False))
+    total_ms: float
+    max_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    latency_histogram: Dict[str, int] = Field(
+        default_factory=dict, sa_column=Column(JSONB, nullable=False),
+        description="Request counts per latency bucket, so minutes and processes can be merged exactly."
+    )
+
+    __table_args__ = (
+        Index("ix_request_metrics_route_minute", "route", "minute"),
+    )
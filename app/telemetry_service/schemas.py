@@ -0,0 +1,20 @@
+# /app/telemetry_service/schemas.py
+from datetime import datetime
+from typing import Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+class RequestMetricsOut(BaseModel):
+    """Request counters for one route, per minute or over the whole queried range."""
+    minute: Optional[datetime] = Field(None, description="Start of the minute; empty when totalled over the range.")
+    method: str
+    route: str
+    count: int
+    error_count: int = Field(..., description="Responses with a 5xx status.")
+    status_counts: Dict[str, int] = Field(..., description="Responses per status class, e.g. {\"2xx\": 120, \"4xx\": 3}.")
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
@@ -0,0 +1,126 @@
+# /app/telemetry_service/services.py
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import AsyncSessionFactory
+from . import crud
+from .aggregator import RequestMetricsAggregator, merge_rows
+from .schemas import RequestMetricsOut
+
+logger = logging.getLogger(__name__)
+
+_READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# Requests that matched no route share one counter, so 404 probes cannot add rows
+UNMATCHED_ROUTE = "<unmatched>"
+
+# --- REQUEST COUNTERS ---
+# Every API process aggregates its own requests in memory and writes one row
+# per route and minute. The start time keeps a restarted process (same pid)
+# from colliding with its predecessor's rows.
+_aggregator = RequestMetricsAggregator(f"{socket.gethostname()}:{os.getpid()}:{int(time.time())}"[-64:])
+_flusher: Optional[asyncio.Task] = None
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """The matched route's path template, so /products/1 and /products/2 share a counter."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return UNMATCHED_ROUTE
+    return f"{scope.get('root_path', '')}{path}"
+
+
+def record_request(method: str, route: str, status_code: int, duration_ms: float) -> None:
+    """Counts a finished request. In-memory only; no I/O."""
+    _aggregator.record(method, route, status_code, duration_ms, time.time())
+
+
+def should_audit_request(method: str, status_code: int) -> bool:
+    """
+    Whether a request is also written to the audit log as `api.request`:
+    always for mutations and errors, for a TELEMETRY_READ_SAMPLE_RATE share
+    of successful reads.
+    """
+    if method not in _READ_METHODS or status_code >= 400:
+        return True
+    rate = settings.TELEMETRY_READ_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+async def flush(final: bool = False) -> int:
+    """
+    Writes finished minutes (every minute, when `final`) to
+    `request_metrics`. Returns the number of rows written.
+    """
+    rows = _aggregator.drain(None if final else time.time())
+    if not rows:
+        return 0
+    async with AsyncSessionFactory() as session:
+        await crud.create_request_metrics(session, rows)
+        await session.commit()
+    return len(rows)
+
+
+async def _purge_expired() -> None:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.TELEMETRY_RETENTION_DAYS)
+    async with AsyncSessionFactory() as session:
+        deleted = await crud.delete_request_metrics_before(session, cutoff)
+        await session.commit()
+    if deleted:
+        logger.info(f"Request telemetry cleanup: deleted {deleted} rows older than {cutoff}.")
+
+
+async def _run_flusher() -> None:
+    purged_at = 0.0
+    while True:
+        await asyncio.sleep(settings.TELEMETRY_FLUSH_INTERVAL_SECONDS)
+        try:
+            await flush()
+            if time.monotonic() - purged_at > 3600:
+                await _purge_expired()
+                purged_at = time.monotonic()
+        except Exception as e:
+            logger.error(f"Failed to write request telemetry: {e}", exc_info=True)
+
+
+def start():
+    """Starts the periodic counter flush. Called from the app lifespan."""
+    global _flusher
+    _flusher = asyncio.get_running_loop().create_task(_run_flusher())
+
+
+async def shutdown():
+    """Writes the counters of the current, partial minute too. Called from the app lifespan."""
+    global _flusher
+    if _flusher is not None:
+        _flusher.cancel()
+        _flusher = None
+    try:
+        await flush(final=True)
+    except Exception as e:
+        logger.error(f"Failed to write request telemetry on shutdown: {e}", exc_info=True)
+
+
+async def get_request_metrics(
+    db: AsyncSession,
+    since: datetime,
+    until: Optional[datetime],
+    route: Optional[str],
+    method: Optional[str],
+    by_minute: bool,
+) -> List[RequestMetricsOut]:
+    """Per-route request counters, merged across API processes, busiest first."""
+    rows = merge_rows(await crud.get_request_metrics(db, since, until, route, method), by_minute=by_minute)
+    metrics = [RequestMetricsOut(**row, mean_ms=round(row["total_ms"] / row["count"], 3)) for row in rows]
+    if by_minute:
+        return sorted(metrics, key=lambda m: (m.minute, -m.count))
+    return sorted(metrics, key=lambda m: -m.count)
@@ -0,0 +1,116 @@
+# /app/telemetry_service/tests/test_aggregator.py
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.telemetry_service import services as telemetry
+from app.telemetry_service.aggregator import (
+    RequestMetricsAggregator, bucket_upper_ms, histogram_percentile, latency_bucket, merge_rows
+)
+from core.config import settings
+from core.middleware import AuditLogMiddleware
+
+MINUTE = 1_700_000_040  # a Unix timestamp on a minute boundary
+
+
+def test_latency_buckets_are_within_ten_percent():
+    for duration_ms in (0.05, 0.3, 1.0, 12.5, 250.0, 30_000.0):
+        upper = bucket_upper_ms(latency_bucket(duration_ms))
+        assert duration_ms <= upper + 1e-9
+        assert upper <= max(duration_ms, 0.1) * 1.1 + 1e-9
+
+
+def test_percentiles_come_from_the_histogram():
+    histogram = {}
+    for duration_ms in range(1, 101):
+        bucket = latency_bucket(float(duration_ms))
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+
+    assert histogram_percentile(histogram, 0.50) == pytest.approx(50, rel=0.1)
+    assert histogram_percentile(histogram, 0.99) == pytest.approx(99, rel=0.1)
+    assert histogram_percentile({}, 0.5) == 0.0
+
+
+def test_requests_are_counted_per_route_and_minute_and_drained_when_done():
+    aggregator = RequestMetricsAggregator("host:1:0")
+    aggregator.record("GET", "/items/{id}", 200, 10.0, MINUTE + 1)
+    aggregator.record("GET", "/items/{id}", 404, 20.0, MINUTE + 30)
+    aggregator.record("GET", "/items/{id}", 503, 30.0, MINUTE + 59)
+    aggregator.record("GET", "/items/{id}", 200, 5.0, MINUTE + 61)
+
+    # The current minute stays in memory
+    [row] = aggregator.drain(now=MINUTE + 70)
+    assert row["minute"] == datetime.fromtimestamp(MINUTE, timezone.utc)
+    assert row["instance"] == "host:1:0"
+    assert (row["count"], row["error_count"]) == (3, 1)
+    assert row["status_counts"] == {"2xx": 1, "4xx": 1, "5xx": 1}
+    assert row["total_ms"] == 60.0
+    assert row["max_ms"] == 30.0
+    assert row["p50_ms"] == pytest.approx(20.0, rel=0.1)
+
+    assert aggregator.drain(now=MINUTE + 70) == []
+    [row] = aggregator.drain()
+    assert row["count"] == 1
+
+
+def test_rows_from_several_processes_merge_exactly():
+    rows = []
+    for instance, durations in (("a", [1.0, 2.0]), ("b", [100.0, 200.0])):
+        aggregator = RequestMetricsAggregator(instance)
+        for duration_ms in durations:
+            aggregator.record("POST", "/items", 201, duration_ms, MINUTE)
+        rows.extend(aggregator.drain())
+
+    [merged] = merge_rows(rows, by_minute=False)
+    assert merged["minute"] is None
+    assert merged["count"] == 4
+    assert merged["max_ms"] == 200.0
+    assert merged["p99_ms"] == pytest.approx(200.0, rel=0.1)
+    assert merged["p50_ms"] == pytest.approx(2.0, rel=0.1)
+
+
+def test_mutations_and_errors_are_always_audited_reads_only_when_sampled(monkeypatch):
+    monkeypatch.setattr(settings, "TELEMETRY_READ_SAMPLE_RATE", 0.0)
+    assert telemetry.should_audit_request("POST", 201)
+    assert telemetry.should_audit_request("DELETE", 204)
+    assert telemetry.should_audit_request("GET", 404)
+    assert telemetry.should_audit_request("GET", 500)
+    assert not telemetry.should_audit_request("GET", 200)
+
+    monkeypatch.setattr(settings, "TELEMETRY_READ_SAMPLE_RATE", 1.0)
+    assert telemetry.should_audit_request("GET", 200)
+
+
+def test_middleware_counts_reads_by_route_template_without_auditing_them(monkeypatch):
+    aggregator = RequestMetricsAggregator("test")
+    monkeypatch.setattr(telemetry, "_aggregator", aggregator)
+    monkeypatch.setattr(settings, "TELEMETRY_READ_SAMPLE_RATE", 0.0)
+    audited = []
+
+    async def fake_record(self, request, status_code, process_time):
+        audited.append((request.method, status_code))
+
+    monkeypatch.setattr(AuditLogMiddleware, "_record_request", fake_record)
+
+    app = FastAPI()
+    app.add_middleware(AuditLogMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"id": item_id}
+
+    @app.post("/items")
+    async def create_item():
+        return {"id": 1}
+
+    client = TestClient(app)
+    for item_id in range(3):
+        assert client.get(f"/items/{item_id}").status_code == 200
+    client.post("/items")
+    client.get("/missing")
+
+    assert audited == [("POST", 200), ("GET", 404)]
+    counts = {(row["method"], row["route"]): row["count"] for row in aggregator.drain()}
+    assert counts == {("GET", "/items/{item_id}"): 3, ("POST", "/items"): 1, ("GET", telemetry.UNMATCHED_ROUTE): 1}
@@ -0,0 +1,167 @@
+# /app/telemetry_service/tests/test_middleware.py
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.telemetry_service import services as telemetry
+from core.database import engine, get_db_session, read_engine
+from core.middleware import AuditLogMiddleware
+
+pytestmark = pytest.mark.asyncio
+
+
+async def item(request: Request):
+    return JSONResponse({"id": request.path_params["item_id"], "request_id": request.state.request_id}, status_code=201)
+
+
+async def boom(request: Request):
+    raise RuntimeError("boom")
+
+
+def build_app(stream_gate: asyncio.Event = None):
+    async def stream(request: Request):
+        async def chunks():
+            yield b"first"
+            await stream_gate.wait()
+            yield b"second"
+        return StreamingResponse(chunks())
+
+    # FastAPI routes put themselves in the scope, which the route template is read from
+    app = FastAPI()
+    app.add_api_route("/items/{item_id}", item)
+    app.add_api_route("/stream", stream)
+    app.add_api_route("/boom", boom)
+    app.add_api_route("/healthz", lambda: {"status": "ok"})
+    return AuditLogMiddleware(app, exclude_paths=["/healthz", "/docs/"])
+
+
+async def call(app, path: str, on_message=None, method: str = "GET"):
+    messages = []
+    requested = asyncio.Event()
+
+    async def receive():
+        # The request body once, then nothing: the client stays connected
+        if requested.is_set():
+            await asyncio.Event().wait()
+        requested.set()
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+        if on_message:
+            on_message(message)
+
+    scope = {
+        "type": "http", "method": method, "path": path, "raw_path": path.encode(), "query_string": b"",
+        "headers": [], "root_path": "", "scheme": "http", "server": ("test", 80), "client": ("127.0.0.1", 1),
+        "http_version": "1.1",
+    }
+    await app(scope, receive, send)
+    return messages
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    requests = []
+    monkeypatch.setattr(telemetry, "record_request", lambda *args: requests.append(args))
+    monkeypatch.setattr(telemetry, "should_audit_request", lambda method, status_code: False)
+    return requests
+
+
+async def test_records_status_and_route_template_from_response_start(recorded):
+    messages = await call(build_app(), "/items/7")
+    assert messages[0]["status"] == 201
+    assert b'"request_id":"' in messages[1]["body"]
+    method, route, status_code, duration_ms = recorded[0]
+    assert (method, route, status_code) == ("GET", "/items/{item_id}", 201)
+    assert duration_ms >= 0
+
+
+async def test_excluded_paths_are_not_counted(recorded):
+    await call(build_app(), "/healthz")
+    assert recorded == []
+
+
+async def test_streaming_body_passes_through_unbuffered(recorded):
+    gate = asyncio.Event()
+
+    def open_gate_on_first_chunk(message):
+        if message.get("body") == b"first":
+            gate.set()
+
+    # Would hang if the middleware waited for the whole body before sending any of it
+    messages = await asyncio.wait_for(call(build_app(gate), "/stream", open_gate_on_first_chunk), timeout=2)
+    assert [message.get("body") for message in messages[1:] if message.get("body")] == [b"first", b"second"]
+    assert recorded[0][2] == 200
+
+
+async def test_exceptions_are_counted_as_500_and_reraised(recorded):
+    with pytest.raises(RuntimeError):
+        await call(build_app(), "/boom")
+    assert recorded[0][2] == 500
+
+
+async def test_audits_only_when_telemetry_says_so(recorded, monkeypatch):
+    audited = []
+
+    async def record(self, request, status_code, process_time):
+        audited.append((request.url.path, status_code, request.state.request_id))
+
+    monkeypatch.setattr(telemetry, "should_audit_request", lambda method, status_code: True)
+    monkeypatch.setattr(AuditLogMiddleware, "_record_request", record)
+    await call(build_app(), "/items/1")
+    assert audited[0][:2] == ("/items/1", 201)
+    assert audited[0][2]
+
+
+def build_db_app(sessions: list):
+    # Queries nothing, so no connection is ever taken from the pool
+    async def uses_db(request: Request, db=Depends(get_db_session)):
+        sessions.append(db)
+        return {"in_request_state": getattr(request.state, "db", None) is db}
+
+    app = FastAPI()
+    app.add_api_route("/db", uses_db, methods=["GET", "POST"])
+    app.add_api_route("/healthz", uses_db)
+    return app
+
+
+async def test_audit_write_reuses_the_request_session_which_is_then_closed(recorded, monkeypatch):
+    sessions, audited, closed = [], [], []
+
+    async def record(self, request, status_code, process_time):
+        audited.append(request.state.db)
+
+    monkeypatch.setattr(telemetry, "should_audit_request", lambda method, status_code: True)
+    monkeypatch.setattr(AuditLogMiddleware, "_record_request", record)
+    app = AuditLogMiddleware(build_db_app(sessions))
+    messages = await call(app, "/db", method="POST")
+    assert messages[1]["body"] == b'{"in_request_state":true}'
+    assert audited == sessions and len(sessions) == 1
+
+    async def close(self):
+        closed.append(self)
+
+    monkeypatch.setattr(type(sessions[0]), "close", close)
+    await call(app, "/db", method="POST")
+    assert closed == [sessions[1]]
+
+
+async def test_reads_run_in_autocommit_and_writes_in_a_transaction(recorded):
+    sessions = []
+    app = AuditLogMiddleware(build_db_app(sessions))
+    await call(app, "/db", method="GET")
+    await call(app, "/db", method="POST")
+    assert sessions[0].bind is read_engine
+    assert read_engine.get_execution_options()["isolation_level"] == "AUTOCOMMIT"
+    assert sessions[1].bind is engine
+
+
+async def test_session_is_private_without_the_middleware(recorded):
+    sessions = []
+    app = AuditLogMiddleware(build_db_app(sessions), exclude_paths=["/healthz"])
+    messages = await call(app, "/healthz")
+    assert messages[1]["body"] == b'{"in_request_state":false}'
+    assert len(sessions) == 1
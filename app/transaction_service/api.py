@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_db_session
 from app.user_service.dependencies import get_current_active_user
-from app.user_service.models import User
+from app.user_service.principal import Principal
 from . import schemas, services
 
 router = APIRouter()
@@ -20,7 +20,7 @@ router = APIRouter()
 async def record_transaction(
     transaction_in: schemas.TransactionCreate,
     db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Records a new inventory transaction (SALE, PURCHASE, or ADJUSTMENT).
@@ -20,7 +20,7 @@ async def create_transaction(
     Service layer for recording an inventory transaction.
     - Handles business logic and validation.
     - Calls the CRUD layer to perform database operations.
-    - Triggers the ML model to learn from the new transaction.
+    - Triggers the ML model to learn from the new transaction once it commits.
     """
     try:
         transaction, new_stock_level = await crud.create(
@@ -29,8 +29,8 @@ async def create_transaction(
             user_id=user_id
         )
         
-        # Asynchronously train the ML model without blocking the response
-        await ml_services.train_model(transaction, new_stock_level)
+        # Train (and check for anomalies) in the background after commit
+        ml_services.train_model_after_commit(db, transaction, new_stock_level)
         
         return transaction
     except ValueError as e:
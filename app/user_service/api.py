@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_db_session
 from . import models, schemas, services
-from .dependencies import get_current_active_user
+from .dependencies import get_current_active_db_user
 
 router = APIRouter()
 
@@ -53,7 +53,7 @@ async def refresh_access_token(
     summary="Get current user profile"
 )
 async def get_current_user(
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: models.User = Depends(get_current_active_db_user),
 ):
     """Get the profile of the currently authenticated user."""
     return current_user
@@ -67,7 +67,7 @@ async def update_current_user(
     update_data: schemas.UserUpdate,
     request: Request, 
     db: AsyncSession = Depends(get_db_session),
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: models.User = Depends(get_current_active_db_user),
 ):
     """Update the profile of the currently authenticated user."""
     return await services.update_profile(
@@ -9,27 +9,61 @@ from core.config import settings
 from core.database import get_db_session
 from core.exceptions import InvalidTokenException, UnauthorizedException
 from app.user_service import crud, models
+from app.user_service.principal import Principal, principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/users/token")
 
-async def get_current_user(
-    db: AsyncSession = Depends(get_db_session),
-    token: str = Depends(oauth2_scheme)
-) -> models.User:
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if not email:
-            raise InvalidTokenException()
     except JWTError:
         raise InvalidTokenException()
+    if not payload.get("sub"):
+        raise InvalidTokenException()
+    return payload
+
+async def resolve_principal(db: AsyncSession, token: str) -> Principal:
+    """
+    The principal a bearer token belongs to. A token seen recently is
+    answered from the in-process cache, with no JWT decode and no query.
+    """
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    payload = _decode_token(token)
+    user = await crud.get_by_email(db, email=payload["sub"])
+    if not user:
+        raise InvalidTokenException()
+    principal = Principal.from_user(user)
+    principal_cache.put(token, principal, payload.get("exp"))
+    return principal
 
-    user = await crud.get_by_email(db, email=email)
+async def get_current_principal(
+    db: AsyncSession = Depends(get_db_session),
+    token: str = Depends(oauth2_scheme)
+) -> Principal:
+    return await resolve_principal(db, token)
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_db_session),
+    token: str = Depends(oauth2_scheme)
+) -> models.User:
+    """The full ORM user, for endpoints that read or change the profile itself. Always queries."""
+    payload = _decode_token(token)
+    user = await crud.get_by_email(db, email=payload["sub"])
     if not user:
         raise InvalidTokenException()
     return user
 
 async def get_current_active_user(
+    current_user: Principal = Depends(get_current_principal)
+) -> Principal:
+    if not current_user.is_active:
+        raise UnauthorizedException(detail="Inactive user")
+    return current_user
+
+async def get_current_active_db_user(
     current_user: models.User = Depends(get_current_user)
 ) -> models.User:
     if not current_user.is_active:
@@ -41,10 +75,10 @@ def require_role(required_roles: List[str]):
     Dependency factory to check for the user's role.
     """
     async def role_checker(
-        current_user: models.User = Depends(get_current_active_user)
-    ) -> models.User:
-        if not current_user.role or current_user.role.name not in required_roles:
+        current_user: Principal = Depends(get_current_active_user)
+    ) -> Principal:
+        if not current_user.role_name or current_user.role_name not in required_roles:
             raise UnauthorizedException(detail="You do not have enough permissions.")
         return current_user
 
-    return role_checker
\ No newline at end of file
+    return role_checker
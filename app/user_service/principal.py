@@ -0,0 +1,103 @@
+# /app/user_service/principal.py
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+from core.config import settings
+from . import models
+
+
+@dataclass(frozen=True)
+class PrincipalRole:
+    name: str
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authenticated user, as far as authorization and auditing need it.
+    Exposes `role.name` like the ORM user, so both pass the same checks.
+    """
+    id: uuid.UUID
+    email: str
+    role_name: Optional[str]
+    store_id: Optional[uuid.UUID]
+    is_active: bool
+
+    @property
+    def role(self) -> Optional[PrincipalRole]:
+        return PrincipalRole(self.role_name) if self.role_name else None
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            role_name=user.role.name if user.role else None,
+            store_id=user.store_id,
+            is_active=user.is_active,
+        )
+
+
+class PrincipalCache:
+    """
+    Verified token -> principal, in memory, with a TTL and LRU eviction.
+    An entry never outlives its token's `exp`, and every entry of a user
+    can be dropped at once when the user changes.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self._tokens_by_user: Dict[uuid.UUID, Set[str]] = {}
+
+    def get(self, token: str) -> Optional[Principal]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at <= time.time():
+            self._remove(token)
+            return None
+        self._entries.move_to_end(token)
+        return principal
+
+    def put(self, token: str, principal: Principal, token_expires_at: Optional[float] = None) -> None:
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        self._remove(token)
+        self._entries[token] = (expires_at, principal)
+        self._tokens_by_user.setdefault(principal.id, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: uuid.UUID) -> None:
+        for token in self._tokens_by_user.pop(user_id, set()):
+            self._entries.pop(token, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tokens_by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[1].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[1].id]
+
+
+# One cache per process, shared by the auth dependencies and the audit middleware
+principal_cache = PrincipalCache(settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS, settings.AUTH_PRINCIPAL_CACHE_SIZE)
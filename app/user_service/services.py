@@ -1,7 +1,6 @@
 # /app/user_service/services.py
 import logging
 import uuid
-import json
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Request
@@ -15,9 +14,11 @@ from core.exceptions import (
     NotFoundException,
     UnauthenticatedException,
 )
+from core.database import run_after_commit
 from core.security import create_access_token, create_refresh_token, decode_token
 from app.audit_log_service.services import AuditLogger
 from . import crud, models, schemas
+from .principal import principal_cache
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +39,7 @@ async def register(db: AsyncSession, user_in: schemas.UserCreate, request: Reque
         action="REGISTER_USER",
         entity_type="User",
         entity_id=str(user.id),
-        after=json.loads(user_schema.model_dump_json())
+        after=user_schema
     )
 
     return user
@@ -86,20 +87,23 @@ async def update_profile(db: AsyncSession, user: models.User, update_data: schem
     """Handles updating a user's own profile and creates an audit log."""
     
     before_schema = schemas.User.model_validate(user)
-    before_state = json.loads(before_schema.model_dump_json())
 
     updated_user = await crud.update(db=db, db_user=user, user_in=update_data)
     
     after_schema = schemas.User.model_validate(updated_user)
-    after_state = json.loads(after_schema.model_dump_json())
     
     audit_logger = AuditLogger(db, current_user=user, request=request)
     await audit_logger.record_event(
         action="UPDATE_PROFILE",
         entity_type="User",
         entity_id=str(user.id),
-        before=before_state,
-        after=after_state
+        before=before_schema,
+        after=after_schema
     )
+
+    # Cached principals of this user are stale now, and again once the update commits
+    # (a request still resolving in between could have re-cached the old row)
+    principal_cache.invalidate_user(user.id)
+    run_after_commit(db, principal_cache.invalidate_user, user.id)
     
     return updated_user
\ No newline at end of file
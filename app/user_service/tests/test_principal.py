@@ -0,0 +1,122 @@
+# /app/user_service/tests/test_principal.py
+import time
+import uuid
+
+import pytest
+
+from core.exceptions import InvalidTokenException
+from core.security import create_access_token
+from app.user_service import dependencies
+from app.user_service.principal import Principal, PrincipalCache
+
+
+def make_principal(user_id=None, role_name="admin") -> Principal:
+    return Principal(id=user_id or uuid.uuid4(), email="admin@example.com", role_name=role_name, store_id=None, is_active=True)
+
+
+class NoDatabase:
+    """A session that fails the test if anything touches it."""
+
+    def __getattr__(self, name):
+        raise AssertionError(f"unexpected database access: {name}")
+
+
+def test_principal_exposes_role_name_like_the_orm_user():
+    assert make_principal(role_name="employee").role.name == "employee"
+    assert make_principal(role_name=None).role is None
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = PrincipalCache(ttl_seconds=60, max_entries=10)
+    principal = make_principal()
+    cache.put("token", principal)
+
+    now[0] += 59
+    assert cache.get("token") is principal
+    now[0] += 2
+    assert cache.get("token") is None
+    assert len(cache) == 0
+
+
+def test_entries_never_outlive_the_token(monkeypatch):
+    monkeypatch.setattr(time, "time", lambda: 1000.0)
+    cache = PrincipalCache(ttl_seconds=60, max_entries=10)
+    cache.put("token", make_principal(), token_expires_at=1000.0)
+    assert cache.get("token") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PrincipalCache(ttl_seconds=60, max_entries=2)
+    cache.put("a", make_principal())
+    cache.put("b", make_principal())
+    cache.get("a")
+    cache.put("c", make_principal())
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_invalidate_user_drops_all_their_tokens():
+    cache = PrincipalCache(ttl_seconds=60, max_entries=10)
+    user_id = uuid.uuid4()
+    cache.put("phone", make_principal(user_id))
+    cache.put("laptop", make_principal(user_id))
+    cache.put("other", make_principal())
+    cache.invalidate_user(user_id)
+    assert cache.get("phone") is None and cache.get("laptop") is None
+    assert cache.get("other") is not None
+
+
+def test_zero_ttl_disables_caching():
+    cache = PrincipalCache(ttl_seconds=0, max_entries=10)
+    cache.put("token", make_principal())
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_cached_token_resolves_without_database(monkeypatch):
+    cache = PrincipalCache(ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(dependencies, "principal_cache", cache)
+    principal = make_principal()
+    cache.put("token", principal)
+    assert await dependencies.resolve_principal(NoDatabase(), "token") is principal
+
+
+@pytest.mark.asyncio
+async def test_uncached_token_is_looked_up_once_then_cached(monkeypatch):
+    cache = PrincipalCache(ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(dependencies, "principal_cache", cache)
+    user_id = uuid.uuid4()
+    lookups = []
+
+    class Role:
+        name = "employee"
+
+    class User:
+        id = user_id
+        email = "employee@example.com"
+        role = Role()
+        store_id = None
+        is_active = True
+
+    async def get_by_email(db, email):
+        lookups.append(email)
+        return User()
+
+    monkeypatch.setattr(dependencies.crud, "get_by_email", get_by_email)
+    token = create_access_token(data={"sub": "employee@example.com"})
+
+    first = await dependencies.resolve_principal(object(), token)
+    second = await dependencies.resolve_principal(NoDatabase(), token)
+    assert first == second == Principal(user_id, "employee@example.com", "employee", None, True)
+    assert lookups == ["employee@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_is_rejected_and_not_cached(monkeypatch):
+    cache = PrincipalCache(ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(dependencies, "principal_cache", cache)
+    with pytest.raises(InvalidTokenException):
+        await dependencies.resolve_principal(NoDatabase(), "not-a-jwt")
+    assert len(cache) == 0
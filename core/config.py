@@ -1,6 +1,6 @@
 # /core/config.py
 import os
-from typing import List, Union
+from typing import List, Optional, Union
 
 from pydantic import AnyHttpUrl, validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -22,6 +22,11 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30000
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Seconds a verified token's principal (id, email, role, store, active flag) is reused without a
+    # database lookup. Updates in this process take effect at once; in other workers, within this delay.
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    # Most tokens whose principal is kept in memory per process.
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10000
 
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
@@ -46,9 +51,96 @@ class Settings(BaseSettings):
 
     # ML Settings
     ML_MODEL_PATH: str = "ml_model.pkl"
+    # Publish a fresh read-only model snapshot after this many training samples...
+    ML_SNAPSHOT_EVERY_N: int = 100
+    # ...or after this many seconds, whichever comes first.
+    ML_SNAPSHOT_INTERVAL_SECONDS: float = 5.0
+    # Threads serving predictions from the published snapshot.
+    ML_PREDICT_WORKERS: int = 2
+    # Samples a product needs before it gets a dedicated model; until then it uses its category's.
+    ML_PRODUCT_MODEL_MIN_SAMPLES: int = 200
+    # Most product models kept in memory; the least recently trained is evicted back to its category.
+    ML_MAX_PRODUCT_MODELS: int = 1000
+    # Unix socket of the shared model server (`ml-server`). Unset keeps the model in-process.
+    ML_SERVER_SOCKET: Optional[str] = None
+    # Most learn/predict items sent to the model server in one message.
+    ML_SERVER_BATCH_MAX: int = 256
+    # How long to wait for a model server reply before falling back to the local model.
+    ML_SERVER_TIMEOUT_SECONDS: float = 2.0
+    # After a failure, how long to stay on the local model before trying the server again.
+    ML_SERVER_RETRY_SECONDS: float = 10.0
+    # Weight of the newest sample in the rolling prediction error stats (~ last 1/alpha samples count).
+    ML_MONITOR_ALPHA: float = 0.02
+    # Time constant, in seconds, of the rolling training rate estimate.
+    ML_MONITOR_RATE_WINDOW_SECONDS: float = 900.0
+    # Robust z-score (median/MAD) above which a transaction is flagged as anomalous.
+    ML_ANOMALY_Z_THRESHOLD: float = 6.0
+    # Days with sales a store-product pair needs in the rolling window before it is scored.
+    ML_ANOMALY_MIN_ACTIVE_DAYS: int = 5
+    # Lower bound, in units per day, on the spread used for the z-score.
+    ML_ANOMALY_MIN_SCALE: float = 1.0
+    # Days ahead (including today) the nightly forecast job writes to `stock_forecast`.
+    ML_FORECAST_HORIZON_DAYS: int = 31
+    # Store-product pairs scored and committed per batch by the forecast job.
+    ML_FORECAST_BATCH_SIZE: int = 500
+    # Days of net stock movement used for the store and category level forecasts that get reconciled.
+    ML_RECONCILIATION_LOOKBACK_DAYS: int = 28
+
+    # --- Reorder Recommendation Settings ---
+    # Days of sales history used to estimate daily demand.
+    REORDER_DEMAND_LOOKBACK_DAYS: int = 28
+    # Default supplier lead time and target service level (probability of no stock-out).
+    REORDER_LEAD_TIME_DAYS: int = 7
+    REORDER_SERVICE_LEVEL: float = 0.95
+    # Fixed cost of placing one purchase order, and annual holding cost as a fraction of unit cost.
+    REORDER_ORDERING_COST: float = 500.0
+    REORDER_HOLDING_COST_RATE: float = 0.25
+
+    # --- Stock-out Simulation Settings ---
+    # Days of sales history the simulated demand is drawn from.
+    SIMULATION_DEMAND_LOOKBACK_DAYS: int = 56
+    # Default number of simulated demand paths per product.
+    SIMULATION_PATHS: int = 2000
+
 # --- Audit Log Settings ---
     # A list of field names that should be redacted in audit logs.
     AUDIT_PII_FIELDS: List[str] = ["password", "email", "token", "access_token", "refresh_token"]
     # How many days to retain audit logs. Set to 0 to retain forever.
     AUDIT_RETENTION_DAYS: int = 365
+    # Monthly audit_logs partitions kept ready beyond the current month.
+    AUDIT_PARTITION_MONTHS_AHEAD: int = 3
+    # Write audit events in background batches after the business transaction commits.
+    # When False, every event is inserted inside the business transaction.
+    AUDIT_SINK_ENABLED: bool = True
+    # Maximum events per multi-row INSERT.
+    AUDIT_SINK_BATCH_SIZE: int = 500
+    # Longest time an event waits in memory before its batch is written.
+    AUDIT_SINK_FLUSH_INTERVAL_SECONDS: float = 1.0
+    # Events buffered in memory before callers are made to wait.
+    AUDIT_SINK_MAX_PENDING: int = 10000
+    # How long a caller waits for buffer space before writing its event inside its own transaction.
+    AUDIT_SINK_ENQUEUE_TIMEOUT_SECONDS: float = 0.5
+    # Store updates as their `changes` only, plus the full `after` state every AUDIT_CHECKPOINT_EVERY
+    # updates of an entity; the before/after of a single log are rebuilt when it is read.
+    AUDIT_COMPACT_STORAGE: bool = False
+    # Updates of an entity between full-state checkpoints in compact storage.
+    AUDIT_CHECKPOINT_EVERY: int = 20
+    # TOAST compression for the audit JSONB columns ("lz4" needs PostgreSQL 14+; "" keeps the server default).
+    AUDIT_TOAST_COMPRESSION: str = "lz4"
+    # Monthly partitions older than this many days are moved to compressed files by `audit-partitions archive`.
+    # Set to 0 to keep every log in the database until retention drops it.
+    AUDIT_ARCHIVE_AFTER_DAYS: int = 90
+    # Directory (local or mounted storage) holding the archived audit log files and their manifest.
+    AUDIT_ARCHIVE_DIR: str = "audit_archive"
+
+# --- Request Telemetry Settings ---
+    # Share of successful read requests (GET/HEAD/OPTIONS) written to the audit log as `api.request`.
+    # Mutations and errors are always written; every request is counted in `request_metrics`.
+    TELEMETRY_READ_SAMPLE_RATE: float = 0.0
+    # Paths (and everything under them) that skip request telemetry and auditing entirely.
+    TELEMETRY_EXCLUDED_PATHS: List[str] = ["/healthz", "/api/v1/docs", "/api/v1/redoc", "/api/v1/openapi.json"]
+    # How often completed minutes of per-route request counters are written to `request_metrics`.
+    TELEMETRY_FLUSH_INTERVAL_SECONDS: float = 60.0
+    # How many days of per-minute request counters to keep.
+    TELEMETRY_RETENTION_DAYS: int = 30
 settings = Settings()
\ No newline at end of file
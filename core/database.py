@@ -1,29 +1,112 @@
 # /core/database.py
-from typing import AsyncGenerator
+import asyncio
+import logging
+from typing import Any, AsyncGenerator, Callable
+from sqlalchemy import event
+from starlette.requests import Request
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlmodel import SQLModel, text
 from core.config import settings
 
+logger = logging.getLogger(__name__)
+
 engine = create_async_engine(settings.DATABASE_URL, echo=settings.DEBUG, future=True)
 
 AsyncSessionFactory = sessionmaker(
     autocommit=False, autoflush=False, bind=engine, class_=AsyncSession
 )
 
-async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
+# Connections from the same pool, in autocommit: reads run without BEGIN/COMMIT round trips
+read_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+
+# HTTP methods whose requests only read
+READ_ONLY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Key of the request-scoped session in `request.state`, set by AuditLogMiddleware
+REQUEST_SESSION_KEY = "db"
+
+def new_request_session(method: str) -> AsyncSession:
+    """A session for a request; no connection is taken from the pool until the first query."""
+    if method in READ_ONLY_METHODS:
+        return AsyncSessionFactory(bind=read_engine)
+    return AsyncSessionFactory()
+
+def open_request_scope(scope: dict) -> None:
+    """Marks the request as having one shared session, created by the first `get_db_session`."""
+    scope.setdefault("state", {})[REQUEST_SESSION_KEY] = None
+
+async def close_request_scope(scope: dict) -> None:
+    session = scope.get("state", {}).pop(REQUEST_SESSION_KEY, None)
+    if session is not None:
+        await session.close()
+
+async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
     Provides a transactionally-scoped database session per request.
+
+    Behind AuditLogMiddleware this is the request's one session, which the
+    middleware reuses for its audit write and closes; elsewhere it is opened
+    and closed here. Read-only requests run in autocommit, so they send no
+    BEGIN/COMMIT; the session transaction still commits on success (firing
+    after-commit hooks) and rolls back on error.
     """
-    async with AsyncSessionFactory() as session:
+    state = request.scope.get("state", {})
+    shared = REQUEST_SESSION_KEY in state
+    session = state.get(REQUEST_SESSION_KEY) or new_request_session(request.method)
+    if shared:
+        state[REQUEST_SESSION_KEY] = session
+    try:
         async with session.begin(): # This starts the transaction
-            try:
-                yield session
-                # If no exception, the context manager will commit automatically.
-            except:
-                # If an exception occurs, the context manager will roll back.
-                await session.rollback()
-                raise
+            yield session
+            # If no exception, the context manager will commit automatically.
+            # If an exception occurs, the context manager will roll back.
+    finally:
+        if not shared:
+            await session.close()
+
+# --- After-commit hooks ---
+_AFTER_COMMIT_KEY = "after_commit_callbacks"
+_background_tasks = set()
+
+def run_after_commit(session: AsyncSession, callback: Callable[..., Any], *args: Any) -> None:
+    """
+    Calls `callback(*args)` once the session's current transaction commits.
+    Coroutine functions are scheduled as background tasks; plain functions
+    run inline and must not block. The call is dropped if the transaction
+    rolls back. Callbacks should only take plain values; ORM objects are
+    expired by the commit.
+    """
+    session.info.setdefault(_AFTER_COMMIT_KEY, []).append((callback, args))
+
+def _log_callback_failure(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"After-commit callback failed: {task.exception()}", exc_info=task.exception())
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit_callbacks(session: Session) -> None:
+    callbacks = session.info.pop(_AFTER_COMMIT_KEY, None)
+    if not callbacks:
+        return
+    loop = asyncio.get_running_loop()
+    for callback, args in callbacks:
+        try:
+            result = callback(*args)
+        except Exception as e:
+            logger.error(f"After-commit callback failed: {e}", exc_info=True)
+            continue
+        if asyncio.iscoroutine(result):
+            task = loop.create_task(result)
+            _background_tasks.add(task)
+            task.add_done_callback(_log_callback_failure)
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_after_commit_callbacks(session: Session, transaction) -> None:
+    # Runs after `after_commit`, so anything left belongs to a rolled back or
+    # closed transaction, including ones that never reached the database
+    if transaction.parent is None:
+        session.info.pop(_AFTER_COMMIT_KEY, None)
 
 async def drop_db_and_tables():
     async with engine.begin() as conn:
@@ -36,7 +119,11 @@ async def drop_db_and_tables():
         await conn.execute(text("DROP TABLE IF EXISTS role CASCADE"))
         await conn.execute(text("DROP TABLE IF EXISTS userrolelink CASCADE"))
         await conn.execute(text("DROP TABLE IF EXISTS sequencetracker CASCADE"))
-        await conn.execute(text("TRUNCATE TABLE audit_logs RESTART IDENTITY CASCADE"))
+        await conn.execute(text("DROP TABLE IF EXISTS stock_forecast CASCADE"))
+        await conn.execute(text("DROP TABLE IF EXISTS transaction_anomaly CASCADE"))
+        await conn.execute(text("DROP TABLE IF EXISTS request_metrics CASCADE"))
+        # Drops the monthly partitions with it
+        await conn.execute(text("DROP TABLE IF EXISTS audit_logs CASCADE"))
 async def create_db_and_tables():
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
\ No newline at end of file
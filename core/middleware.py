@@ -1,57 +1,108 @@
 # /core/middleware.py
+import logging
 import uuid
 import time
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.responses import Response
+from typing import Iterable, Optional
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from app.audit_log_service.services import AuditLogger
-from app.user_service.dependencies import get_current_user
-from core.database import AsyncSessionFactory
-
-class AuditLogMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        # Attach a unique ID to the request for tracing
-        request.state.request_id = str(uuid.uuid4())
-        
-        # Create a single session and transaction that will be used for the entire request
-        async with AsyncSessionFactory() as session:
-            request.state.db = session
+from app.telemetry_service import services as telemetry
+from app.user_service.dependencies import resolve_principal
+from core.database import REQUEST_SESSION_KEY, AsyncSessionFactory, close_request_scope, open_request_scope
+
+logger = logging.getLogger(__name__)
+
+class AuditLogMiddleware:
+    """
+    Counts every request in the per-minute telemetry (in memory, no I/O) and
+    writes an `api.request` audit event only for mutations, errors and a
+    sampled share of successful reads (see `should_audit_request`).
+
+    A plain ASGI middleware: the response passes through untouched, so
+    streaming responses are not buffered. Status and duration are taken
+    from `http.response.start` (time to the first byte). Requests under
+    `exclude_paths` (health checks, docs) are passed straight through.
+
+    It also owns the request's database session: `get_db_session` creates
+    it on first use, the audit write reuses it, and it is closed here once
+    the response is done, so a request holds at most one pool connection.
+    """
+
+    def __init__(self, app: ASGIApp, exclude_paths: Iterable[str] = ()):
+        self.app = app
+        self.exclude_paths = tuple(path.rstrip("/") for path in exclude_paths)
+
+    def _excluded(self, path: str) -> bool:
+        return any(path == excluded or path.startswith(excluded + "/") for excluded in self.exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._excluded(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        # Attach a unique ID to the request for tracing (read as request.state.request_id)
+        scope.setdefault("state", {})["request_id"] = str(uuid.uuid4())
+        open_request_scope(scope)
+
+        start_time = time.perf_counter()
+        status_code = 500
+        process_time: Optional[float] = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, process_time
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                process_time = (time.perf_counter() - start_time) * 1000
+            await send(message)
+
+        try:
             try:
-                # Attempt to get user, but don't fail if not authenticated
-                token = request.headers.get("authorization")
-                if token and token.startswith("Bearer "):
-                    try:
-                        request.state.user = await get_current_user(db=session, token=token.replace("Bearer ", ""))
-                    except Exception:
-                        request.state.user = None
-                else:
-                    request.state.user = None
-
-                start_time = time.time()
-                
-                # Process the request within a single transaction
-                async with session.begin():
-                    response = await call_next(request)
-                
-                process_time = (time.time() - start_time) * 1000
-
-                # Record the high-level API request event using the same session
-                audit_logger = AuditLogger(db=session, request=request)
-                await audit_logger.record_event(
-                    action="api.request",
-                    metadata={
-                        "method": request.method,
-                        "path": request.url.path,
-                        "query_params": str(request.query_params),
-                        "status_code": response.status_code,
-                        "process_time_ms": f"{process_time:.2f}",
-                    },
-                )
-                await session.commit() # Commit the audit log entry
+                await self.app(scope, receive, send_wrapper)
+            except Exception:
+                await self._finish(scope, 500, process_time, start_time)
+                raise
+            await self._finish(scope, status_code, process_time, start_time)
+        finally:
+            await close_request_scope(scope)
 
+    async def _finish(self, scope: Scope, status_code: int, process_time: Optional[float], start_time: float) -> None:
+        if process_time is None:
+            # No response was started
+            process_time = (time.perf_counter() - start_time) * 1000
+        telemetry.record_request(scope["method"], telemetry.route_template(scope), status_code, process_time)
+        if telemetry.should_audit_request(scope["method"], status_code):
+            request = Request(scope)
+            try:
+                await self._record_request(request, status_code, process_time)
             except Exception as e:
-                # If any exception occurs during the request, roll back the transaction
-                await session.rollback()
-                raise e
+                logger.error(f"Failed to record audit event for request {request.state.request_id}: {e}", exc_info=True)
+
+    async def _record_request(self, request: Request, status_code: int, process_time: float) -> None:
+        session = request.scope["state"].get(REQUEST_SESSION_KEY)
+        if session is None:
+            # The endpoint never touched the database; this session is closed with the request
+            session = request.scope["state"][REQUEST_SESSION_KEY] = AsyncSessionFactory()
+
+        # Attempt to get user, but don't fail if not authenticated. The
+        # request's own auth dependency has usually cached the principal.
+        user = None
+        token = request.headers.get("authorization")
+        if token and token.startswith("Bearer "):
+            try:
+                user = await resolve_principal(session, token.replace("Bearer ", ""))
+            except Exception:
+                user = None
 
-        return response
\ No newline at end of file
+        audit_logger = AuditLogger(db=session, current_user=user, request=request)
+        await audit_logger.record_event(
+            action="api.request",
+            metadata={
+                "request_id": request.state.request_id,
+                "method": request.method,
+                "path": request.url.path,
+                "query_params": str(request.query_params),
+                "status_code": status_code,
+                "process_time_ms": f"{process_time:.2f}",
+            },
+        )
+        await session.commit()
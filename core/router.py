@@ -3,15 +3,39 @@ from fastapi import APIRouter, Request, Response
 from fastapi.routing import APIRoute
 from typing import Callable
 import json
-from fastapi.responses import JSONResponse
 
-# This import is correct and necessary
-from .schemas import SuccessResponse
+# The envelope `SuccessResponse` describes, spliced around the already encoded body
+_ENVELOPE_PREFIX = b'{"status":"success","data":'
+_ENVELOPE_SUFFIX = b"}"
+_SUCCESS_STATUS = b'"status":"success"'
+
+
+def _is_enveloped(body: bytes) -> bool:
+    """Whether a JSON body is already a `SuccessResponse`, without parsing it in the usual case."""
+    if body.startswith(_ENVELOPE_PREFIX):
+        return True
+    if not body.startswith(b"{") or _SUCCESS_STATUS not in body:
+        return False
+    # Rare: a dict that mentions the status somewhere else; check it properly
+    try:
+        parsed = json.loads(body)
+    except json.JSONDecodeError:
+        return False
+    return isinstance(parsed, dict) and parsed.get('status') == 'success'
+
+
+def wrap_success_body(body: bytes) -> bytes:
+    """The `SuccessResponse` envelope around an encoded JSON body; an empty body becomes `null`."""
+    return b"".join((_ENVELOPE_PREFIX, body or b"null", _ENVELOPE_SUFFIX))
+
 
 class StandardAPIRoute(APIRoute):
     """
     A custom APIRoute that automatically wraps successful responses in a
     standardized JSON envelope.
+
+    The envelope is spliced around the response bytes, so the body FastAPI
+    encoded is neither parsed nor encoded again.
     """
     def get_route_handler(self) -> Callable:
         original_route_handler = super().get_route_handler()
@@ -26,22 +50,18 @@ class StandardAPIRoute(APIRoute):
                 and response.status_code != 204
                 and response.media_type == "application/json"
             ):
-                # We need to get the raw body and re-wrap it
-                try:
-                    body = json.loads(response.body)
-                except json.JSONDecodeError:
-                    # This can happen if the response body is empty but content-type is json
-                    body = None
+                body = response.body.strip()
 
                 # Check if the body is already in the desired format to avoid double-wrapping
-                if isinstance(body, dict) and body.get('status') == 'success':
+                if _is_enveloped(body):
                     return response
 
-                # Wrap it in our standard SuccessResponse format
-                return JSONResponse(
-                    content=SuccessResponse(data=body).model_dump(by_alias=True),
+                return Response(
+                    content=wrap_success_body(body),
                     status_code=response.status_code,
                     headers={k: v for k, v in dict(response.headers).items() if k.lower() != "content-length"},
+                    media_type="application/json",
+                    background=response.background,
                 )
 
             # For errors, 204s, or non-JSON responses, return them as is
@@ -0,0 +1,145 @@
+# /scripts/audit_partitions.py
+import asyncio
+import sys
+import os
+import typer
+import logging
+from datetime import datetime
+
+from sqlalchemy import text
+
+# --- Setup Project Path ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# --- Configure Logging ---
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    stream=sys.stdout,
+)
+log = logging.getLogger(__name__)
+
+# --- Explicit Model Imports (required for mapper configuration) ---
+from app.user_service import models as user_models
+from app.store_service import models as store_models
+from app.audit_log_service import models as audit_models
+
+from core.database import AsyncSessionFactory, engine
+from app.audit_log_service import crud as audit_crud, partitions, services as audit_services
+
+# --- Typer CLI Application ---
+cli = typer.Typer()
+
+_OLD_TABLE = "audit_logs_unpartitioned"
+
+
+async def run_maintain() -> dict:
+    async with AsyncSessionFactory() as session:
+        result = await audit_services.cleanup_old_audit_logs(session)
+        await session.commit()
+    return result
+
+
+async def run_archive() -> dict:
+    async with AsyncSessionFactory() as session:
+        return await audit_services.archive_old_audit_logs(session)
+
+
+def copy_statement(bounded: bool = True):
+    """
+    Copies rows from the old table from `:start` (up to `:end` if `bounded`).
+    Generated columns (`search_vector`) are left out: the old table has none,
+    and Postgres computes them on insert. Rows already copied are skipped,
+    so an interrupted migration can simply be run again.
+    """
+    columns = ", ".join(
+        f'"{column.name}"' for column in audit_models.AuditLog.__table__.columns if column.computed is None
+    )
+    window = "WHERE created_at >= :start AND created_at < :end" if bounded else "WHERE created_at >= :start"
+    return text(f'INSERT INTO "{partitions.PARENT_TABLE}" ({columns}) SELECT {columns} FROM "{_OLD_TABLE}" {window} '
+                "ON CONFLICT (id, created_at) DO NOTHING")
+
+
+async def run_migrate() -> None:
+    async with engine.begin() as conn:
+        partitioned = await conn.scalar(text(
+            "SELECT count(*) FROM pg_partitioned_table JOIN pg_class ON pg_class.oid = partrelid "
+            "WHERE relname = :table"
+        ), {"table": partitions.PARENT_TABLE})
+        leftover = await conn.scalar(text("SELECT to_regclass(:table) IS NOT NULL"), {"table": _OLD_TABLE})
+        if partitioned and not leftover:
+            log.info("audit_logs is already partitioned; nothing to do.")
+            return
+
+        if partitioned:
+            # A previous run swapped the tables but did not finish copying
+            log.info(f"Resuming the copy of the rows left in {_OLD_TABLE}.")
+        else:
+            # Keep the old table aside, with its index names out of the way
+            await conn.execute(text(f'ALTER TABLE "{partitions.PARENT_TABLE}" RENAME TO "{_OLD_TABLE}"'))
+            index_names = await conn.scalars(text("SELECT indexname FROM pg_indexes WHERE tablename = :table"), {"table": _OLD_TABLE})
+            for index_name in index_names.all():
+                await conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_old"'))
+
+            await conn.run_sync(audit_models.AuditLog.__table__.create)
+        oldest = await conn.scalar(text(f'SELECT min(created_at) FROM "{_OLD_TABLE}"'))
+
+    # Every month that has rows, up to the months kept ready ahead
+    first_month = partitions.month_start((oldest or datetime.utcnow()).date())
+    async with AsyncSessionFactory() as session:
+        for month in partitions.months_between(first_month, datetime.utcnow().date()):
+            await audit_crud.create_month_partition(session, month)
+        await audit_services.ensure_partitions(session)
+        await session.commit()
+
+    months = partitions.months_between(first_month, datetime.utcnow().date())
+    for month in months:
+        # One month per transaction keeps each copy's lock and WAL burst small
+        async with engine.begin() as conn:
+            result = await conn.execute(copy_statement(), {"start": month, "end": partitions.add_months(month, 1)})
+        log.info(f"Copied {result.rowcount} audit logs from {month:%Y-%m}.")
+
+    async with engine.begin() as conn:
+        # Anything newer than the last full month (clock skew) ends up in the default partition
+        await conn.execute(copy_statement(bounded=False), {"start": partitions.add_months(months[-1], 1)})
+        await conn.execute(text(f'DROP TABLE "{_OLD_TABLE}"'))
+
+
+@cli.command()
+def maintain():
+    """
+    Creates missing future audit_logs partitions and drops the ones past
+    AUDIT_RETENTION_DAYS. Safe to run as often as you like (e.g. daily from cron).
+    """
+    result = asyncio.run(run_maintain())
+    log.info(f"--- Audit log partitions maintained: {result} ---")
+
+
+@cli.command()
+def archive():
+    """
+    Moves monthly audit_logs partitions older than AUDIT_ARCHIVE_AFTER_DAYS
+    to gzip JSONL files under AUDIT_ARCHIVE_DIR and drops them from the
+    database. Safe to run repeatedly (e.g. daily from cron).
+    """
+    result = asyncio.run(run_archive())
+    log.info(f"--- Audit logs archived: {result} ---")
+
+
+@cli.command()
+def migrate():
+    """
+    Converts an existing, unpartitioned audit_logs table into the monthly
+    partitioned layout, copying rows one month at a time. Stop the API
+    first: events written during the copy would be lost. If the copy is
+    interrupted, run it again: it resumes and skips rows already copied.
+    """
+    log.info("--- Partitioning audit_logs ---")
+    asyncio.run(run_migrate())
+    log.info("--- audit_logs is now partitioned by month ---")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,170 @@
+# /scripts/bench_audit_snapshot.py
+import json
+import os
+import platform
+import sys
+import time
+import uuid
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import typer
+
+# --- Setup Project Path ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# --- Configure Logging ---
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    stream=sys.stdout,
+)
+log = logging.getLogger(__name__)
+
+from core.config import settings
+from app.audit_log_service import snapshot
+from app.category_service.schemas import Category
+from app.store_product_service.schemas import StoreProductOut
+from app.user_service.schemas import Role, User
+
+# --- Typer CLI Application ---
+cli = typer.Typer()
+
+
+# --- Previous Implementation (for comparison) ---
+
+def _legacy_mask(data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not data:
+        return None
+    clean_data = {}
+    for key, value in data.items():
+        if key in settings.AUDIT_PII_FIELDS:
+            clean_data[key] = f"<REDACTED:{key}>"
+        elif isinstance(value, dict):
+            clean_data[key] = _legacy_mask(value)
+        elif isinstance(value, list):
+            clean_data[key] = [_legacy_mask(item) if isinstance(item, dict) else item for item in value]
+        else:
+            clean_data[key] = value
+    return clean_data
+
+
+def _legacy_changes(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    changes = {}
+    for key in before.keys() | after.keys():
+        if before.get(key) != after.get(key):
+            changes[key] = {"before": before.get(key), "after": after.get(key)}
+    return changes
+
+
+def legacy_mutation(before, after):
+    before_state = json.loads(before.model_dump_json())
+    after_state = json.loads(after.model_dump_json())
+    changes = _legacy_changes(before_state, after_state)
+    return _legacy_mask(before_state), _legacy_mask(after_state), _legacy_mask(changes)
+
+
+def snapshot_mutation(before, after):
+    return snapshot.audit_states(before, after)
+
+
+# --- Sample Entities ---
+
+def _now() -> datetime:
+    return datetime(2026, 1, 1, 12, 0, 0)
+
+
+def sample_pairs() -> Dict[str, tuple]:
+    store_product = dict(
+        id=uuid.uuid4(), store_id=uuid.uuid4(), product_id=uuid.uuid4(), selling_price=49.5,
+        last_purchase_price=40.0, stock=120, reorder_point=10, max_quantity=200, is_active=True,
+        created_at=_now(), updated_at=_now(), product={"name": "Parle-G Biscuit", "sku": "GROC-PGB37-001"},
+    )
+    user = dict(
+        id=uuid.uuid4(), user_id="EMP001", email="employee@example.com", first_name="Asha", last_name="Rao",
+        role=Role(name="employee", description="An employee of a retail shop."),
+    )
+    children = [
+        Category(id=uuid.uuid4(), name=f"Sub {i}", prefix="SUB", description="A subcategory.", children=[])
+        for i in range(5)
+    ]
+    category = dict(id=uuid.uuid4(), name="Groceries", prefix="GROC", description="Food and staples.", children=children)
+    return {
+        "store_product": (StoreProductOut(**store_product), StoreProductOut(**{**store_product, "stock": 95})),
+        "user": (User(**user), User(**{**user, "last_name": "Iyer"})),
+        "category": (Category(**category), Category(**{**category, "name": "Grocery"})),
+    }
+
+
+def _stored_bytes(*documents) -> int:
+    return sum(len(json.dumps(document, separators=(",", ":"))) for document in documents if document)
+
+
+def bytes_per_mutation(before, after, checkpoint_every: int) -> Dict[str, float]:
+    """JSON bytes of before/after/changes stored per update, in full and in compact storage."""
+    before_state, after_state, changes = snapshot.audit_states(before, after)
+    full = _stored_bytes(before_state, after_state, changes)
+    # Compact: changes for every update, the after state once per checkpoint interval
+    compact = _stored_bytes(changes) + _stored_bytes(after_state) / checkpoint_every
+    return {"full_bytes": full, "compact_bytes": round(compact, 1), "reduction": round(full / compact, 2)}
+
+
+def _time_per_call_us(fn: Callable, before, after, iterations: int, repeats: int) -> float:
+    """Best of `repeats` runs, in microseconds per call."""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter_ns()
+        for _ in range(iterations):
+            fn(before, after)
+        best = min(best, (time.perf_counter_ns() - started) / iterations / 1000)
+    return best
+
+
+@cli.command()
+def main(
+    iterations: int = typer.Option(20000, help="Mutations timed per run."),
+    repeats: int = typer.Option(5, help="Runs per entity; the fastest is reported."),
+    checkpoint_every: int = typer.Option(settings.AUDIT_CHECKPOINT_EVERY, help="Updates per full checkpoint in compact storage."),
+    output: Optional[str] = typer.Option(None, help="Where to write the JSON results."),
+):
+    """
+    Times building the audit before/after/changes of one update, for the
+    previous JSON round trip against the snapshot helper, and reports the
+    bytes each update stores in full and in compact storage.
+    """
+    results: List[Dict[str, Any]] = []
+    for entity, (before, after) in sample_pairs().items():
+        legacy_us = _time_per_call_us(legacy_mutation, before, after, iterations, repeats)
+        snapshot_us = _time_per_call_us(snapshot_mutation, before, after, iterations, repeats)
+        results.append({
+            "entity": entity,
+            "legacy_us": round(legacy_us, 2),
+            "snapshot_us": round(snapshot_us, 2),
+            "saved_us": round(legacy_us - snapshot_us, 2),
+            "speedup": round(legacy_us / snapshot_us, 2),
+            **bytes_per_mutation(before, after, checkpoint_every),
+        })
+        log.info(
+            f"{entity:>14}: round trip {legacy_us:7.2f} us, snapshot {snapshot_us:7.2f} us "
+            f"({legacy_us / snapshot_us:.2f}x, {legacy_us - snapshot_us:.2f} us saved per mutation); "
+            f"stored {results[-1]['full_bytes']} B full, {results[-1]['compact_bytes']} B compact "
+            f"({results[-1]['reduction']:.1f}x smaller)"
+        )
+
+    if output:
+        report = {
+            "python": platform.python_version(),
+            "iterations": iterations,
+            "checkpoint_every": checkpoint_every,
+            "results": results,
+        }
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        log.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,153 @@
+# /scripts/bench_auth.py
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import logging
+from typing import Any, Dict, Optional
+
+import typer
+
+# --- Setup Project Path ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# --- Configure Logging ---
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    stream=sys.stdout,
+)
+log = logging.getLogger(__name__)
+
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, select
+
+from core.database import AsyncSessionFactory, engine
+from core.security import create_access_token
+from app.user_service.dependencies import require_role
+from app.user_service.principal import principal_cache
+# Load every model so the relationships resolve
+from app.user_service import models as user_models
+from app.store_service import models as store_models  # noqa: F401
+from app.category_service import models as category_models  # noqa: F401
+from app.product_service import models as product_models  # noqa: F401
+from app.transaction_service import models as transaction_models  # noqa: F401
+from app.store_product_service import models as store_product_models  # noqa: F401
+
+# --- Typer CLI Application ---
+cli = typer.Typer()
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/guarded", dependencies=[Depends(require_role(["super_admin", "admin", "employee"]))])
+    async def guarded():
+        return {"ok": True}
+
+    return app
+
+
+async def _first_active_email() -> str:
+    async with AsyncSessionFactory() as session:
+        email = (await session.execute(
+            select(user_models.User.email).where(user_models.User.is_active == True).limit(1)  # noqa: E712
+        )).scalar_one_or_none()
+    if email is None:
+        raise RuntimeError("No active user to sign a token for; seed the database first.")
+    return email
+
+
+async def _request(app, token: str) -> int:
+    """Sends one authenticated GET through the ASGI app; returns the status code."""
+    received = False
+    status_code = 0
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    scope = {
+        "type": "http", "method": "GET", "path": "/guarded", "raw_path": b"/guarded", "query_string": b"",
+        "headers": [(b"authorization", f"Bearer {token}".encode())], "root_path": "", "scheme": "http",
+        "server": ("bench", 80), "client": ("127.0.0.1", 1), "http_version": "1.1",
+    }
+    await app(scope, receive, send)
+    return status_code
+
+
+async def _measure(app, token: str, requests: int, cached: bool, queries: list) -> Dict[str, float]:
+    principal_cache.clear()
+    await _request(app, token)
+    queries.clear()
+    started = time.perf_counter_ns()
+    for _ in range(requests):
+        if not cached:
+            principal_cache.clear()
+        status_code = await _request(app, token)
+        if status_code != 200:
+            raise RuntimeError(f"Guarded route answered {status_code}")
+    elapsed = time.perf_counter_ns() - started
+    return {
+        "us_per_request": round(elapsed / requests / 1000, 2),
+        "queries_per_request": round(len(queries) / requests, 2),
+    }
+
+
+async def run(requests: int) -> Dict[str, Any]:
+    queries = []
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+    try:
+        token = create_access_token(data={"sub": await _first_active_email()})
+        app = build_app()
+        uncached = await _measure(app, token, requests, cached=False, queries=queries)
+        cached = await _measure(app, token, requests, cached=True, queries=queries)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_query)
+        await engine.dispose()
+    return {"uncached": uncached, "cached": cached}
+
+
+@cli.command()
+def main(
+    requests: int = typer.Option(2000, help="Requests timed per variant."),
+    output: Optional[str] = typer.Option(None, help="Where to write the JSON results."),
+):
+    """
+    Sends requests to a `require_role`-guarded route through the real
+    database session dependency, with the principal cache cleared before
+    every request and with it warm, and reports the time and the number of
+    SQL statements per request. Needs the database from DATABASE_URL.
+    """
+    results = asyncio.run(run(requests))
+    for name, result in results.items():
+        log.info(
+            f"{name:>8}: {result['us_per_request']:8.2f} us and "
+            f"{result['queries_per_request']:.2f} queries per request"
+        )
+
+    if output:
+        report = {"python": platform.python_version(), "requests": requests, "results": results}
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        log.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,182 @@
+# /scripts/bench_envelope.py
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import uuid
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import typer
+
+# --- Setup Project Path ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# --- Configure Logging ---
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    stream=sys.stdout,
+)
+log = logging.getLogger(__name__)
+
+from fastapi import APIRouter, FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from app.product_service import schemas
+from core.router import StandardAPIRoute
+from core.schemas import SuccessResponse
+
+# --- Typer CLI Application ---
+cli = typer.Typer()
+
+
+# --- Previous Implementation (for comparison) ---
+
+class LegacyStandardAPIRoute(APIRoute):
+    """The envelope as it was: parse the body, wrap it in SuccessResponse, dump and encode again."""
+
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+
+        async def custom_route_handler(request: Request) -> Response:
+            response: Response = await original_route_handler(request)
+            if 200 <= response.status_code < 300 and response.status_code != 204 and response.media_type == "application/json":
+                try:
+                    body = json.loads(response.body)
+                except json.JSONDecodeError:
+                    body = None
+                if isinstance(body, dict) and body.get('status') == 'success':
+                    return response
+                return JSONResponse(
+                    content=SuccessResponse(data=body).model_dump(by_alias=True),
+                    status_code=response.status_code,
+                    headers={k: v for k, v in dict(response.headers).items() if k.lower() != "content-length"},
+                )
+            return response
+
+        return custom_route_handler
+
+
+# --- Sample App ---
+
+def sample_products(count: int) -> List[schemas.Product]:
+    now = datetime(2026, 1, 1, 12, 0, 0)
+    category_id = uuid.uuid4()
+    return [
+        schemas.Product(
+            id=uuid.uuid4(), name=f"Parle-G Biscuit {i}", category_id=category_id,
+            description="Glucose biscuits, 250 g family pack.", sku=f"GROC-PGB37-{i:04d}",
+            created_at=now, updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def build_app(route_class, products: List[schemas.Product]) -> FastAPI:
+    router = APIRouter(route_class=route_class)
+
+    @router.get("/products", response_model=List[schemas.Product])
+    async def list_products():
+        return products
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+async def _request(app) -> bytes:
+    """Sends one GET through the ASGI app; returns the response body."""
+    received = False
+    body = []
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    scope = {
+        "type": "http", "method": "GET", "path": "/products", "raw_path": b"/products", "query_string": b"",
+        "headers": [], "root_path": "", "scheme": "http", "server": ("bench", 80), "client": ("127.0.0.1", 1),
+        "http_version": "1.1",
+    }
+    await app(scope, receive, send)
+    return b"".join(body)
+
+
+async def _time_per_request_ms(app, requests: int, repeats: int) -> float:
+    """Best of `repeats` runs, in milliseconds per request."""
+    for _ in range(10):
+        await _request(app)
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter_ns()
+        for _ in range(requests):
+            await _request(app)
+        best = min(best, (time.perf_counter_ns() - started) / requests / 1_000_000)
+    return best
+
+
+async def run(items: int, requests: int, repeats: int) -> Dict[str, Any]:
+    products = sample_products(items)
+    variants = {
+        "plain": build_app(APIRoute, products),
+        "legacy": build_app(LegacyStandardAPIRoute, products),
+        "spliced": build_app(StandardAPIRoute, products),
+    }
+    legacy_body, spliced_body = await _request(variants["legacy"]), await _request(variants["spliced"])
+    if json.loads(legacy_body) != json.loads(spliced_body):
+        raise RuntimeError("The spliced envelope differs from the previous one")
+
+    timings = {name: await _time_per_request_ms(app, requests, repeats) for name, app in variants.items()}
+    return {
+        "items": items,
+        "body_bytes": len(spliced_body),
+        **{f"{name}_ms": round(ms, 3) for name, ms in timings.items()},
+        "legacy_envelope_ms": round(timings["legacy"] - timings["plain"], 3),
+        "spliced_envelope_ms": round(timings["spliced"] - timings["plain"], 3),
+        "speedup": round(timings["legacy"] / timings["spliced"], 2),
+    }
+
+
+@cli.command()
+def main(
+    items: int = typer.Option(1000, help="Products in the listed response."),
+    requests: int = typer.Option(200, help="Requests timed per run."),
+    repeats: int = typer.Option(5, help="Runs per variant; the fastest is reported."),
+    output: Optional[str] = typer.Option(None, help="Where to write the JSON results."),
+):
+    """
+    Times a product list endpoint with no envelope, the previous envelope
+    (parse, wrap, re-encode) and the spliced one, and reports what the
+    envelope adds to each request.
+    """
+    result = asyncio.run(run(items, requests, repeats))
+    log.info(
+        f"{items} products ({result['body_bytes']} B): no envelope {result['plain_ms']:.3f} ms, "
+        f"previous {result['legacy_ms']:.3f} ms (+{result['legacy_envelope_ms']:.3f}), "
+        f"spliced {result['spliced_ms']:.3f} ms (+{result['spliced_envelope_ms']:.3f}), "
+        f"{result['speedup']:.2f}x per request"
+    )
+
+    if output:
+        report = {"python": platform.python_version(), "requests": requests, "result": result}
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        log.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    cli()
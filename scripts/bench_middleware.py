@@ -0,0 +1,157 @@
+# /scripts/bench_middleware.py
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import uuid
+import logging
+from typing import Any, Dict, List, Optional
+
+import typer
+
+# --- Setup Project Path ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# --- Configure Logging ---
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    stream=sys.stdout,
+)
+log = logging.getLogger(__name__)
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.responses import Response
+
+from app.telemetry_service import services as telemetry
+from core.middleware import AuditLogMiddleware
+
+# --- Typer CLI Application ---
+cli = typer.Typer()
+
+
+# --- Previous Implementation (for comparison) ---
+
+class LegacyAuditLogMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware version, minus the audit write (reads are not audited by default)."""
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        request.state.request_id = str(uuid.uuid4())
+        start_time = time.perf_counter()
+        response = await call_next(request)
+        process_time = (time.perf_counter() - start_time) * 1000
+        telemetry.record_request(request.method, telemetry.route_template(request.scope), response.status_code, process_time)
+        return response
+
+
+# --- Sample App ---
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id, "name": f"Item {item_id}", "stock": 10}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(100):
+                yield b"x" * 1024
+        return StreamingResponse(chunks())
+
+    return app
+
+
+async def _request(app, path: str) -> int:
+    """Sends one GET through the ASGI app; returns the response body size."""
+    received = False
+    body = 0
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal body
+        if message["type"] == "http.response.body":
+            body += len(message.get("body", b""))
+
+    scope = {
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "headers": [], "root_path": "", "scheme": "http", "server": ("bench", 80), "client": ("127.0.0.1", 1),
+        "http_version": "1.1",
+    }
+    await app(scope, receive, send)
+    return body
+
+
+async def _time_per_request_us(app, path: str, requests: int, repeats: int) -> float:
+    """Best of `repeats` runs, in microseconds per request."""
+    for _ in range(100):
+        await _request(app, path)
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter_ns()
+        for _ in range(requests):
+            await _request(app, path)
+        best = min(best, (time.perf_counter_ns() - started) / requests / 1000)
+    return best
+
+
+async def run(requests: int, repeats: int) -> List[Dict[str, Any]]:
+    variants = {
+        "none": build_app(),
+        "base_http": LegacyAuditLogMiddleware(build_app()),
+        "asgi": AuditLogMiddleware(build_app()),
+    }
+    results = []
+    for path in ("/items/1", "/stream"):
+        timings = {name: await _time_per_request_us(app, path, requests, repeats) for name, app in variants.items()}
+        results.append({
+            "path": path,
+            **{f"{name}_us": round(us, 2) for name, us in timings.items()},
+            "base_http_overhead_us": round(timings["base_http"] - timings["none"], 2),
+            "asgi_overhead_us": round(timings["asgi"] - timings["none"], 2),
+        })
+    return results
+
+
+@cli.command()
+def main(
+    requests: int = typer.Option(5000, help="Requests timed per run."),
+    repeats: int = typer.Option(5, help="Runs per variant; the fastest is reported."),
+    output: Optional[str] = typer.Option(None, help="Where to write the JSON results."),
+):
+    """
+    Times requests through a sample app with no middleware, the previous
+    BaseHTTPMiddleware-based AuditLogMiddleware, and the ASGI one, and
+    reports the per-request overhead of each.
+    """
+    # Keep the counters in memory; nothing is flushed or audited
+    telemetry.should_audit_request = lambda method, status_code: False
+    results = asyncio.run(run(requests, repeats))
+    for result in results:
+        log.info(
+            f"{result['path']:>10}: no middleware {result['none_us']:7.2f} us, "
+            f"BaseHTTPMiddleware +{result['base_http_overhead_us']:.2f} us, ASGI +{result['asgi_overhead_us']:.2f} us per request"
+        )
+
+    if output:
+        report = {"python": platform.python_version(), "requests": requests, "results": results}
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        log.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,316 @@
+# /scripts/bench_ml.py
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import typer
+
+# --- Setup Project Path ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# --- Configure Logging ---
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    stream=sys.stdout,
+)
+log = logging.getLogger(__name__)
+
+import river
+from river import metrics
+
+# --- Explicit Model Imports (required for mapper configuration) ---
+from app.user_service import models as user_models
+from app.store_service import models as store_models
+from app.category_service import models as category_models
+from app.product_service import models as product_models
+from app.store_product_service import models as store_product_models
+from app.transaction_service.models import InventoryTransaction, TransactionType
+from app.ml_service.pipeline import get_ml_pipeline
+from app.ml_service.feature_store import DemandFeatureStore
+from app.ml_service.features import get_features
+
+# --- Typer CLI Application ---
+cli = typer.Typer()
+
+
+# --- Synthetic Transaction Stream ---
+
+def generate_transaction_stream(
+    n_products: int,
+    n_days: int,
+    seed: int,
+    start: Optional[datetime] = None,
+) -> Iterator[Tuple[InventoryTransaction, int]]:
+    """
+    Yields (transaction, new_stock_level) pairs in timestamp order for a
+    synthetic store.
+
+    Demand follows a weekly and a yearly cycle on top of a per-product base
+    rate. Random promotion windows lift demand and apply a discount, and
+    random supplier disruptions delay replenishment long enough for products
+    to stock out, during which sales are lost.
+    """
+    rng = np.random.default_rng(seed)
+    start = start or datetime(2024, 1, 1, tzinfo=timezone.utc)
+    store_id = uuid.UUID(int=seed)
+    user_id = uuid.UUID(int=seed + 1)
+
+    product_ids = [uuid.UUID(int=(seed << 32) + i + 2) for i in range(n_products)]
+    base_rate = rng.gamma(shape=2.0, scale=3.0, size=n_products)
+    price = rng.uniform(10.0, 500.0, size=n_products).round(2)
+    cost = (price * rng.uniform(0.55, 0.8, size=n_products)).round(2)
+    reorder_point = np.ceil(base_rate * 5).astype(int) + 5
+    max_quantity = reorder_point * 4
+    stock = max_quantity.copy()
+
+    weekday_factor = np.array([0.8, 0.85, 0.9, 1.0, 1.2, 1.5, 1.3])
+    # Outstanding purchase orders: product index -> day the delivery arrives
+    pending_delivery: Dict[int, int] = {}
+
+    for day in range(n_days):
+        current = start + timedelta(days=day)
+        yearly = 1.0 + 0.3 * math.sin(2 * math.pi * current.timetuple().tm_yday / 365.25)
+        seasonal = weekday_factor[current.weekday()] * yearly
+
+        # Promotions run on a small random subset of products each day
+        on_promo = rng.random(n_products) < 0.05
+        promo_lift = np.where(on_promo, rng.uniform(1.5, 3.0, size=n_products), 1.0)
+        demand = rng.poisson(base_rate * seasonal * promo_lift)
+
+        events: List[Tuple[float, InventoryTransaction, int]] = []
+
+        for idx in np.flatnonzero(demand):
+            remaining = int(demand[idx])
+            while remaining > 0 and stock[idx] > 0:
+                qty = int(min(remaining, stock[idx], rng.integers(1, 4)))
+                remaining -= qty
+                stock[idx] -= qty
+                discount = round(float(price[idx]) * qty * 0.15, 2) if on_promo[idx] else 0.0
+                transaction = InventoryTransaction(
+                    store_id=store_id,
+                    product_id=product_ids[idx],
+                    recorded_by_user_id=user_id,
+                    quantity=-qty,
+                    transaction_type=TransactionType.SALE,
+                    unit_price_at_sale=float(price[idx]),
+                    discount=discount,
+                    total_amount=float(price[idx]) * qty - discount,
+                    timestamp=current + timedelta(seconds=float(rng.uniform(8, 21) * 3600)),
+                )
+                events.append((transaction.timestamp.timestamp(), transaction, int(stock[idx])))
+
+        for idx in range(n_products):
+            if pending_delivery.get(idx) == day:
+                del pending_delivery[idx]
+                qty = int(max_quantity[idx] - stock[idx])
+                if qty <= 0:
+                    continue
+                stock[idx] += qty
+                transaction = InventoryTransaction(
+                    store_id=store_id,
+                    product_id=product_ids[idx],
+                    recorded_by_user_id=user_id,
+                    quantity=qty,
+                    transaction_type=TransactionType.PURCHASE,
+                    unit_cost=float(cost[idx]),
+                    total_amount=float(cost[idx]) * qty,
+                    timestamp=current + timedelta(hours=7),
+                )
+                events.append((transaction.timestamp.timestamp(), transaction, int(stock[idx])))
+            elif stock[idx] <= reorder_point[idx] and idx not in pending_delivery:
+                # Usual lead time is 2 days; disruptions push it out far enough to stock out
+                lead_time = 2 if rng.random() > 0.1 else int(rng.integers(7, 15))
+                pending_delivery[idx] = day + lead_time
+
+        # Occasional shrinkage adjustments (damage, miscounts)
+        for idx in np.flatnonzero(rng.random(n_products) < 0.01):
+            qty = -int(min(stock[idx], rng.integers(1, 3)))
+            if qty == 0:
+                continue
+            stock[idx] += qty
+            transaction = InventoryTransaction(
+                store_id=store_id,
+                product_id=product_ids[idx],
+                recorded_by_user_id=user_id,
+                quantity=qty,
+                transaction_type=TransactionType.ADJUSTMENT,
+                total_amount=0,
+                timestamp=current + timedelta(hours=22),
+            )
+            events.append((transaction.timestamp.timestamp(), transaction, int(stock[idx])))
+
+        events.sort(key=lambda event: event[0])
+        for _, transaction, new_stock_level in events:
+            yield transaction, new_stock_level
+
+
+# --- Prequential Evaluation ---
+
+def _latency_summary(samples_ns: np.ndarray) -> Dict[str, float]:
+    """Summarises per-sample latencies (nanoseconds) as microsecond percentiles."""
+    if samples_ns.size == 0:
+        return {}
+    p50, p90, p99 = np.percentile(samples_ns, [50, 90, 99]) / 1_000
+    return {
+        "mean": float(samples_ns.mean() / 1_000),
+        "p50": float(p50),
+        "p90": float(p90),
+        "p99": float(p99),
+        "max": float(samples_ns.max() / 1_000),
+    }
+
+
+def _throughput(samples_ns: np.ndarray) -> float:
+    total = samples_ns.sum()
+    return float(samples_ns.size / (total / 1e9)) if total else 0.0
+
+
+def run_prequential(stream: Iterator[Tuple[InventoryTransaction, int]], model=None) -> Dict[str, Any]:
+    """
+    Test-then-train evaluation: every transaction is first scored by the
+    model, the error recorded, and only then learned from.
+    """
+    model = model or get_ml_pipeline()
+    feature_store = DemandFeatureStore()
+    mae, rmse = metrics.MAE(), metrics.RMSE()
+
+    feature_ns: List[int] = []
+    predict_ns: List[int] = []
+    learn_ns: List[int] = []
+
+    clock = time.perf_counter_ns
+    for transaction, target in stream:
+        t0 = clock()
+        feature_store.record(transaction)
+        features = get_features(transaction, feature_store)
+        t1 = clock()
+        y_pred = model.predict_one(features)
+        t2 = clock()
+        model.learn_one(features, target)
+        t3 = clock()
+
+        feature_ns.append(t1 - t0)
+        predict_ns.append(t2 - t1)
+        learn_ns.append(t3 - t2)
+        mae.update(target, y_pred)
+        rmse.update(target, y_pred)
+
+    features_arr = np.asarray(feature_ns, dtype=np.int64)
+    predict_arr = np.asarray(predict_ns, dtype=np.int64)
+    learn_arr = np.asarray(learn_ns, dtype=np.int64)
+
+    return {
+        "samples": int(predict_arr.size),
+        "accuracy": {"mae": mae.get(), "rmse": rmse.get()},
+        "throughput_per_s": {
+            "predict_one": _throughput(predict_arr),
+            "learn_one": _throughput(learn_arr),
+            "end_to_end": _throughput(features_arr + predict_arr + learn_arr),
+        },
+        "latency_us": {
+            "get_features": _latency_summary(features_arr),
+            "predict_one": _latency_summary(predict_arr),
+            "learn_one": _latency_summary(learn_arr),
+        },
+        "model_memory_bytes": model._raw_memory_usage,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Returns human readable deltas for the headline numbers of two runs."""
+    rows = []
+    checks = [
+        ("accuracy.mae", False),
+        ("accuracy.rmse", False),
+        ("throughput_per_s.learn_one", True),
+        ("throughput_per_s.predict_one", True),
+        ("latency_us.learn_one.p99", False),
+        ("latency_us.predict_one.p99", False),
+        ("model_memory_bytes", False),
+    ]
+    for path, higher_is_better in checks:
+        old, new = baseline, current
+        for part in path.split("."):
+            old = old.get(part, {}) if isinstance(old, dict) else None
+            new = new.get(part, {}) if isinstance(new, dict) else None
+        if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or old == 0:
+            continue
+        change = (new - old) / abs(old) * 100
+        worse = change < 0 if higher_is_better else change > 0
+        rows.append(f"{path:<32} {old:>14.3f} -> {new:>14.3f} ({change:+.1f}%{' WORSE' if worse else ''})")
+    return rows
+
+
+@cli.command()
+def main(
+    products: int = typer.Option(200, help="Number of synthetic products in the store."),
+    days: int = typer.Option(180, help="Number of days of transactions to generate."),
+    seed: int = typer.Option(42, help="Random seed for the synthetic stream."),
+    output: str = typer.Option("ml_benchmark.json", help="Where to write the JSON results."),
+    baseline: Optional[str] = typer.Option(None, help="A previous results file to compare against."),
+):
+    """
+    Benchmarks the ML pipeline with prequential evaluation on a synthetic
+    transaction stream and writes the results to a JSON file.
+    """
+    log.info(f"Running prequential benchmark: products={products}, days={days}, seed={seed}")
+
+    started = time.perf_counter()
+    results = run_prequential(generate_transaction_stream(products, days, seed))
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "river": river.__version__,
+            "numpy": np.__version__,
+            "params": {"products": products, "days": days, "seed": seed},
+            "wall_time_s": elapsed,
+        },
+        **results,
+    }
+
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    log.info(f"Samples: {results['samples']}  MAE: {results['accuracy']['mae']:.3f}  RMSE: {results['accuracy']['rmse']:.3f}")
+    log.info(
+        f"learn_one: {results['throughput_per_s']['learn_one']:.0f}/s  "
+        f"predict_one: {results['throughput_per_s']['predict_one']:.0f}/s  "
+        f"memory: {results['model_memory_bytes']} bytes"
+    )
+    log.info(f"Results written to {output}")
+
+    if baseline:
+        with open(baseline) as f:
+            previous = json.load(f)
+        log.info(f"Comparison against {baseline} (commit {previous.get('meta', {}).get('commit')}):")
+        for row in _compare(previous, report):
+            print(row)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,69 @@
+# /scripts/forecast_stock.py
+import asyncio
+import sys
+import os
+import time
+import typer
+import logging
+from typing import Optional
+
+# --- Setup Project Path ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# --- Configure Logging ---
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    stream=sys.stdout,
+)
+log = logging.getLogger(__name__)
+
+# --- Explicit Model Imports (required for mapper configuration) ---
+from app.user_service import models as user_models
+from app.store_service import models as store_models
+from app.category_service import models as category_models
+from app.product_service import models as product_models
+from app.transaction_service import models as transaction_models
+from app.store_product_service import models as store_product_models
+from app.ml_service import models as ml_models
+
+from core.config import settings
+from core.database import AsyncSessionFactory
+from app.ml_service import services as ml_services
+
+# --- Typer CLI Application ---
+cli = typer.Typer()
+
+
+async def run_forecast(horizon_days: int, batch_size: int) -> int:
+    await ml_services.start()
+    try:
+        async with AsyncSessionFactory() as session:
+            return await ml_services.generate_forecasts(session, horizon_days, batch_size)
+    finally:
+        await ml_services.shutdown()
+
+
+@cli.command()
+def main(
+    horizon: Optional[int] = typer.Option(None, help="Days to forecast, starting today. Defaults to ML_FORECAST_HORIZON_DAYS."),
+    batch_size: Optional[int] = typer.Option(None, help="Store-product pairs per batch. Defaults to ML_FORECAST_BATCH_SIZE."),
+):
+    """
+    Precomputes stock forecasts for every active store-product pair into the
+    `stock_forecast` table. Intended to run nightly (e.g. from cron).
+    """
+    horizon = horizon or settings.ML_FORECAST_HORIZON_DAYS
+    batch_size = batch_size or settings.ML_FORECAST_BATCH_SIZE
+    log.info(f"--- Generating {horizon}-day stock forecasts ---")
+
+    started = time.perf_counter()
+    written = asyncio.run(run_forecast(horizon, batch_size))
+
+    log.info(f"--- Wrote {written} forecasts in {time.perf_counter() - started:.1f}s ---")
+
+
+if __name__ == "__main__":
+    cli()
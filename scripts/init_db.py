@@ -29,6 +29,10 @@ from app.category_service import models as category_models
 from app.product_service import models as product_models
 from app.transaction_service import models as transaction_models
 from app.store_product_service import models as store_product_models
+from app.ml_service import models as ml_models
+from app.telemetry_service import models as telemetry_models
+from app.audit_log_service import models as audit_models
+from app.audit_log_service import services as audit_services
 
 # --- Core Imports ---
 from core.database import create_db_and_tables, drop_db_and_tables, AsyncSessionFactory
@@ -123,6 +127,11 @@ async def run_init_db():
     
     log.info("Creating all tables...")
     await create_db_and_tables()
+
+    log.info("Creating audit log partitions...")
+    async with AsyncSessionFactory() as session:
+        await audit_services.ensure_partitions(session)
+        await session.commit()
     
     log.info("Seeding initial data...")
     async with AsyncSessionFactory() as session:
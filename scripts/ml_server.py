@@ -0,0 +1,53 @@
+# /scripts/ml_server.py
+import asyncio
+import sys
+import os
+import typer
+import logging
+from typing import Optional
+
+# --- Setup Project Path ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# --- Configure Logging ---
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    stream=sys.stdout,
+)
+log = logging.getLogger(__name__)
+
+# --- Explicit Model Imports (required for mapper configuration) ---
+from app.user_service import models as user_models
+from app.store_service import models as store_models
+from app.category_service import models as category_models
+from app.product_service import models as product_models
+from app.transaction_service import models as transaction_models
+from app.store_product_service import models as store_product_models
+
+from core.config import settings
+from app.ml_service.model_server import serve
+
+# --- Typer CLI Application ---
+cli = typer.Typer()
+
+
+@cli.command()
+def main(
+    socket: Optional[str] = typer.Option(None, help="Unix socket path. Defaults to ML_SERVER_SOCKET."),
+):
+    """
+    Runs the shared model server. Point every API worker at the same socket
+    with ML_SERVER_SOCKET so they all train and query a single model.
+    """
+    socket_path = socket or settings.ML_SERVER_SOCKET
+    if not socket_path:
+        log.error("No socket path given. Pass --socket or set ML_SERVER_SOCKET.")
+        raise typer.Exit(code=1)
+    asyncio.run(serve(socket_path))
+
+
+if __name__ == "__main__":
+    cli()